@@ -0,0 +1,85 @@
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import click
+
+
+@click.command()
+@click.option(
+    "--scenario",
+    "scenarios",
+    type=click.Choice(["discover", "generate", "repair"]),
+    multiple=True,
+    help="Scenario to run (repeatable). Defaults to all.",
+)
+@click.option("--files", "file_counts", type=int, multiple=True, help="Project sizes to run.")
+@click.option("--latency", type=float, default=0.0, help="Fake LLM latency per call (seconds).")
+@click.option("--tokens-per-sec", type=float, default=0.0, help="Fake LLM output token rate.")
+@click.option("--fail-rate", type=float, default=0.0, help="Share of generations that fail.")
+@click.option(
+    "--cassette",
+    type=click.Path(exists=True),
+    help="Replay recorded LLM responses instead of the fake provider.",
+)
+@click.option("--replay-timing", is_flag=True, help="Replay responses with recorded latency.")
+@click.option("--output", type=click.Path(), default="bench_results.json", help="Results file.")
+@click.option("--baseline", type=click.Path(exists=True), help="Previous results to compare.")
+@click.option("--threshold", type=float, default=0.1, help="Allowed per-file slowdown.")
+def main(
+    scenarios,
+    file_counts,
+    latency,
+    tokens_per_sec,
+    fail_rate,
+    cassette,
+    replay_timing,
+    output,
+    baseline,
+    threshold,
+):
+    """Run the offline AutoQA benchmark suite against the fake LLM provider."""
+    # Must be set before any module that builds an LLM at import time is loaded
+    os.environ["AUTOQA_LLM_PROVIDER"] = "fake"
+    os.environ["AUTOQA_FAKE_LATENCY"] = str(latency)
+    os.environ["AUTOQA_FAKE_TOKENS_PER_SEC"] = str(tokens_per_sec)
+    os.environ["AUTOQA_FAKE_FAIL_RATE"] = str(fail_rate)
+    if cassette:
+        os.environ["AUTOQA_LLM_CASSETTE"] = str(Path(cassette).resolve())
+        os.environ["AUTOQA_LLM_CASSETTE_MODE"] = "replay"
+        os.environ["AUTOQA_LLM_REPLAY_TIMING"] = "1" if replay_timing else "0"
+
+    from bench.scenarios import SCENARIOS, compare_results, write_results
+
+    results = []
+    for name in scenarios or SCENARIOS:
+        for n_files in file_counts or (100,):
+            with tempfile.TemporaryDirectory() as workdir:
+                cwd = os.getcwd()
+                os.chdir(workdir)
+                try:
+                    result = SCENARIOS[name](Path(workdir), n_files)
+                finally:
+                    os.chdir(cwd)
+            click.echo(
+                f"[AutoQA] [Bench]: {name} x{n_files}: {result['seconds']}s "
+                f"({result['per_file_ms']}ms/file)"
+            )
+            results.append(result)
+
+    write_results(output, results)
+    click.echo(f"[AutoQA] [Bench]: Results written to {output}")
+
+    if baseline:
+        with open(baseline, "r") as f:
+            regressions = compare_results(json.load(f), results, threshold)
+        for line in regressions:
+            click.echo(f"[AutoQA] [Bench]: REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import json
+import os
+import platform
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from bench.synthetic import generate_project
+
+FAILING_TEST = """def test_module():
+    assert 1 == -1
+"""
+
+
+def _timed(scenario: str, n_files: int, fn: Callable[[], dict]) -> dict:
+    start = time.perf_counter()
+    extra = fn() or {}
+    seconds = time.perf_counter() - start
+    return {
+        "scenario": scenario,
+        "files": n_files,
+        "seconds": round(seconds, 4),
+        "per_file_ms": round(seconds * 1000 / max(n_files, 1), 4),
+        "extra": extra,
+    }
+
+
+def bench_discover(workdir: Path, n_files: int, language: str = "python") -> dict:
+    """
+    Times discover_source_files, including classification, over a synthetic project.
+    """
+    from common.utils import discover_source_files
+
+    project = workdir / "project"
+    generate_project(str(project), n_files, language=language)
+    test_type = "unit" if language == "python" else "e2e"
+
+    def run():
+        files, _ = discover_source_files(str(project), test_type)
+        return {"accepted": len(files)}
+
+    return _timed("discover", n_files, run)
+
+
+def bench_generate(workdir: Path, n_files: int, max_workers: int = 4) -> dict:
+    """
+    Times the full generate command: discovery, generation, save, run and repair.
+    """
+    from click.testing import CliRunner
+
+    from cli.main import cli
+
+    project = workdir / "project"
+    output = workdir / "output"
+    generate_project(str(project), n_files)
+    output.mkdir(parents=True, exist_ok=True)
+
+    def run():
+        result = CliRunner().invoke(
+            cli,
+            [
+                "generate",
+                "--project",
+                str(project),
+                "--output-project",
+                str(output),
+                "--type",
+                "unit",
+                "--framework",
+                "pytest",
+                "--max-workers",
+                str(max_workers),
+            ],
+        )
+        return {"exit_code": result.exit_code, "written": len(list(output.rglob("test_*.py")))}
+
+    return _timed("generate", n_files, run)
+
+
+def bench_repair(workdir: Path, n_files: int) -> dict:
+    """
+    Times the repair workflow on n_files failing test files.
+    """
+    from graph.workflow import GraphState, build_repair_workflow
+
+    project = workdir / "project"
+    sources = generate_project(str(project), n_files)
+    tests = []
+    for source in sources:
+        test_file = source.parent / f"test_{source.stem}.py"
+        test_file.write_text(FAILING_TEST)
+        tests.append((source, test_file))
+
+    def run():
+        passed = 0
+        workflow = build_repair_workflow()
+        for source, test_file in tests:
+            state = GraphState(
+                input_code=source.read_text(),
+                generated_tests=test_file.read_text(),
+                file_path=str(test_file.relative_to(project)),
+                test_type="unit",
+                framework="pytest",
+                project_root=str(project),
+                output_project_root=str(project),
+                output_path=str(test_file),
+            )
+            final = workflow.invoke(state)
+            passed += final["status"] in ("passed", "completed")
+        return {"passed": passed}
+
+    return _timed("repair", n_files, run)
+
+
+SCENARIOS: Dict[str, Callable[..., dict]] = {
+    "discover": bench_discover,
+    "generate": bench_generate,
+    "repair": bench_repair,
+}
+
+
+def write_results(path: str, results: List[dict]):
+    payload = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "fake_latency": float(os.environ.get("AUTOQA_FAKE_LATENCY", "0")),
+        "results": results,
+    }
+    with open(path, "w") as f:
+        json.dump(payload, f, indent=2)
+
+
+def compare_results(baseline: dict, results: List[dict], threshold: float = 0.1) -> List[str]:
+    """
+    Returns a message for every scenario that got slower than the baseline by
+    more than threshold (as a fraction of the baseline per-file time).
+    """
+    previous = {(r["scenario"], r["files"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        before = previous.get((result["scenario"], result["files"]))
+        if not before or not before["per_file_ms"]:
+            continue
+        change = (result["per_file_ms"] - before["per_file_ms"]) / before["per_file_ms"]
+        if change > threshold:
+            regressions.append(
+                f"{result['scenario']} ({result['files']} files): "
+                f"{before['per_file_ms']}ms -> {result['per_file_ms']}ms per file (+{change:.0%})"
+            )
+    return regressions
@@ -0,0 +1,66 @@
+import random
+from pathlib import Path
+from typing import List
+
+PYTHON_FUNCTION = '''
+
+def {name}(value, factor={factor}):
+    """Scale value by factor and clamp it."""
+    result = value * factor
+    if result > {limit}:
+        return {limit}
+    return result
+'''
+
+JS_FUNCTION = """
+export function {name}(value, factor = {factor}) {{
+  // Scale value by factor and clamp it
+  const result = value * factor;
+  return result > {limit} ? {limit} : result;
+}}
+"""
+
+EXTENSIONS = {"python": ".py", "js": ".js"}
+
+
+def generate_project(
+    root: str,
+    n_files: int,
+    language: str = "python",
+    seed: int = 0,
+    files_per_dir: int = 50,
+) -> List[Path]:
+    """
+    Writes a synthetic project of n_files modules under root.
+
+    Files are spread over nested directories of files_per_dir entries and hold a
+    seeded, varying number of functions, so runs with the same seed are identical.
+    """
+    if language not in EXTENSIONS:
+        raise ValueError(f"Unsupported language: {language}")
+
+    rng = random.Random(seed)
+    template = PYTHON_FUNCTION if language == "python" else JS_FUNCTION
+    ext = EXTENSIONS[language]
+    root = Path(root)
+
+    files = []
+    for i in range(n_files):
+        # Two directory levels keep any single directory small at 100k files
+        bucket = i // files_per_dir
+        directory = root / f"pkg_{bucket // files_per_dir}" / f"mod_{bucket % files_per_dir}"
+        directory.mkdir(parents=True, exist_ok=True)
+
+        body = "".join(
+            template.format(
+                name=f"func_{i}_{j}",
+                factor=rng.randint(1, 9),
+                limit=rng.randint(10, 1000),
+            )
+            for j in range(rng.randint(1, 20))
+        )
+        path = directory / f"module_{i}{ext}"
+        path.write_text(body)
+        files.append(path)
+
+    return files
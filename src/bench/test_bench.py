@@ -0,0 +1,46 @@
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from bench.scenarios import compare_results
+from bench.synthetic import generate_project
+
+
+def test_generate_project_python():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        files = generate_project(temp_dir, 120, files_per_dir=10)
+        assert len(files) == 120
+        assert all(f.suffix == ".py" and f.exists() for f in files)
+        # Files are spread over nested directories
+        assert len({f.parent for f in files}) == 12
+
+
+def test_generate_project_is_deterministic():
+    with tempfile.TemporaryDirectory() as a, tempfile.TemporaryDirectory() as b:
+        first = generate_project(a, 5, language="js", seed=3)
+        second = generate_project(b, 5, language="js", seed=3)
+        assert [f.read_text() for f in first] == [f.read_text() for f in second]
+        assert first[0].suffix == ".js"
+
+
+def test_generate_project_invalid_language():
+    with pytest.raises(ValueError, match="Unsupported language: ruby"):
+        generate_project(str(Path(tempfile.gettempdir()) / "x"), 1, language="ruby")
+
+
+def test_compare_results_flags_regressions():
+    baseline = {
+        "results": [
+            {"scenario": "discover", "files": 100, "per_file_ms": 1.0},
+            {"scenario": "repair", "files": 100, "per_file_ms": 10.0},
+        ]
+    }
+    results = [
+        {"scenario": "discover", "files": 100, "per_file_ms": 1.5},
+        {"scenario": "repair", "files": 100, "per_file_ms": 10.5},
+        {"scenario": "generate", "files": 100, "per_file_ms": 99.0},
+    ]
+    regressions = compare_results(baseline, results, threshold=0.1)
+    assert len(regressions) == 1
+    assert regressions[0].startswith("discover (100 files)")
@@ -1,4 +1,5 @@
 import asyncio
+import itertools
 import json
 import sys
 from pathlib import Path
@@ -8,8 +9,32 @@ import toml
 from dotenv import load_dotenv
 from rich.progress import Progress
 
-from common.utils import discover_source_files, resolve_output_path
-from graph.workflow import GraphState, build_repair_workflow, build_workflow
+from cli.pipeline import (
+    RunOptions,
+    augment_file,
+    job_payload,
+    repair_file,
+    repair_many,
+    run_pipeline,
+    run_worker,
+)
+from common.blobstore import blobs
+from common.budget import PRIORITY_RANK, RunBudget
+from common.e2e import e2e_sessions
+from common.forkserver import forkservers
+from common.ingest import OVERSIZED_POLICIES, sources
+from common.jobqueue import open_job_queue
+from common.journal import RunJournal, latest_run
+from common.report import RunReport, load_durations, load_hard_files, merge_reports
+from common.runcache import run_cache
+from common.sharding import parse_shard, select_shard
+from common.slack import notifier
+from common.suite import SOURCE_EXTENSIONS, find_source_file, index_sources, run_suite
+from common.testindex import example_indexes
+from common.tracing import TRACE_FORMATS, tracer
+from common.utils import classify_candidates, classify_groups, collect_candidate_files
+from graph.retry_policy import RetryPolicy
+from graph.workflow import GraphState, build_workflow
 
 # Load environment variables from .env file
 load_dotenv()
@@ -24,6 +49,178 @@ def load_config(config_path=".autoqa.toml"):
     return toml.load(config_path)
 
 
+def _validate_shard(value):
+    if value is None:
+        return None
+    try:
+        parse_shard(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+    return value
+
+
+def _configure_runner(
+    config_defaults,
+    fork_server=None,
+    preload=(),
+    app_command=None,
+    base_url=None,
+    e2e_batch=None,
+    run_cache_enabled=None,
+):
+    runner = config_defaults.get("runner", {})
+    run_cache.configure(
+        run_cache_enabled if run_cache_enabled is not None else runner.get("cache", True)
+    )
+    enabled = fork_server if fork_server is not None else runner.get("fork_server", False)
+    forkservers.configure(enabled, list(preload) or runner.get("preload", []))
+    if enabled and not forkservers.enabled:
+        click.echo("[AutoQA] [Runner]: The fork server needs os.fork; using subprocesses.")
+
+    e2e = config_defaults.get("e2e", {})
+    try:
+        e2e_sessions.configure(
+            app_command=app_command or e2e.get("app_command"),
+            base_url=base_url or e2e.get("base_url"),
+            health_url=e2e.get("health_url"),
+            batch_size=e2e_batch or e2e.get("batch_size", 1),
+            batch_window=e2e.get("batch_window", 2.0),
+            startup_timeout=e2e.get("startup_timeout", 120.0),
+        )
+    except ValueError as e:
+        raise click.UsageError(str(e))
+
+
+def _configure_examples(config_defaults, examples=None):
+    top_k = examples if examples is not None else config_defaults.get("examples", 3)
+    if top_k < 0:
+        raise click.UsageError("--examples must be 0 or more.")
+    example_indexes.configure(top_k)
+
+
+def _example_options(command):
+    return click.option(
+        "--examples",
+        type=int,
+        help="Show the N most relevant existing tests and fixtures in prompts (0 to disable).",
+    )(command)
+
+
+def _configure_trace(trace_path=None, trace_format=None):
+    try:
+        tracer.configure(trace_path, trace_format)
+    except ValueError as e:
+        raise click.UsageError(str(e))
+    if tracer.enabled:
+        # Written when the command exits, also after an error or Ctrl-C
+        click.get_current_context().call_on_close(_write_trace)
+
+
+def _write_trace():
+    path = tracer.export()
+    if path:
+        click.echo(f"[AutoQA] Trace written to {path}")
+
+
+def _trace_options(command):
+    command = click.option(
+        "--trace-format",
+        type=click.Choice(TRACE_FORMATS),
+        help="Write --trace as a Chrome trace (default, opens in Perfetto) or OTLP JSON.",
+    )(command)
+    return click.option(
+        "--trace",
+        "trace_path",
+        type=click.Path(),
+        help="Record workflow, node, LLM call, test run and Slack spans to this file.",
+    )(command)
+
+
+def _configure_ingest(config_defaults, max_file_bytes=None, oversized=None):
+    ingest = config_defaults.get("ingest", {})
+    try:
+        sources.configure(
+            max_file_bytes or ingest.get("max_file_bytes"), oversized or ingest.get("oversized")
+        )
+    except ValueError as e:
+        raise click.UsageError(str(e))
+
+
+def _ingest_options(command):
+    command = click.option(
+        "--oversized",
+        type=click.Choice(OVERSIZED_POLICIES),
+        help="Skip source files over --max-file-bytes, or generate from their outline.",
+    )(command)
+    return click.option(
+        "--max-file-bytes",
+        type=int,
+        help="Size cap for source files (default 512 KiB).",
+    )(command)
+
+
+def _speculation(config_defaults, candidates=None, candidates_from=None) -> dict:
+    speculate = config_defaults.get("speculate", {})
+    count = candidates or speculate.get("candidates", 1)
+    if count < 1:
+        raise click.UsageError("--candidates must be at least 1.")
+    report = candidates_from or speculate.get("candidates_from")
+    files = None
+    if report and count > 1:
+        files = load_hard_files(report, speculate.get("min_retries", 2))
+        click.echo(
+            f"[AutoQA] [Speculate]: {len(files)} files from {report} get {count} candidates."
+        )
+    return {"candidates": count, "candidate_files": files}
+
+
+def _speculation_options(command):
+    command = click.option(
+        "--candidates-from",
+        type=click.Path(exists=True),
+        help="Previous run report; only files that needed repairs there get --candidates.",
+    )(command)
+    return click.option(
+        "--candidates",
+        type=int,
+        help="Generate and run N candidate test files per file at once; the first to pass wins.",
+    )(command)
+
+
+def _runner_options(command):
+    command = click.option(
+        "--run-cache/--no-run-cache",
+        "run_cache_enabled",
+        default=None,
+        help="Reuse the last result of tests whose code, source and environment are unchanged.",
+    )(command)
+    command = click.option(
+        "--e2e-batch",
+        type=int,
+        help="Run up to N e2e specs together in one Cypress/Playwright session.",
+    )(command)
+    command = click.option(
+        "--base-url",
+        type=str,
+        help="URL of the app under test, passed to e2e runs and health-checked.",
+    )(command)
+    command = click.option(
+        "--app-command",
+        type=str,
+        help="Shell command that starts the app under test once for all e2e runs.",
+    )(command)
+    command = click.option(
+        "--preload",
+        multiple=True,
+        help="Module the fork server imports once up front (repeatable, e.g. django).",
+    )(command)
+    return click.option(
+        "--fork-server/--no-fork-server",
+        default=None,
+        help="Run pytest files in forks of a warm process with the project's imports loaded.",
+    )(command)
+
+
 @click.group()
 def cli():
     """AutoQA CLI"""
@@ -80,6 +277,70 @@ def version():
     help="Prefix to strip from input file paths when determining output paths.",
 )
 @click.option("--slack-webhook", type=str, help="Override Slack webhook URL.")
+@click.option(
+    "--slack-digest",
+    is_flag=True,
+    help="Post one Slack summary for the run instead of one message per file.",
+)
+@click.option(
+    "--slack-digest-interval",
+    type=float,
+    help="Post the Slack summary every N seconds (implies --slack-digest).",
+)
+@click.option("--max-retries", type=int, help="Maximum repair attempts per file.")
+@click.option(
+    "--file-time-budget",
+    type=float,
+    help="Stop repairing a file after this many seconds.",
+)
+@click.option(
+    "--time-budget",
+    type=float,
+    help="Stop starting new work after this many seconds (low priority stops first).",
+)
+@click.option(
+    "--token-budget",
+    type=int,
+    help="Stop starting new work after this many LLM tokens (low priority stops first).",
+)
+@click.option(
+    "--shard",
+    type=str,
+    callback=lambda _ctx, _param, value: _validate_shard(value),
+    help="Only process shard i of N (e.g. 2/5) for multi-machine runs.",
+)
+@click.option(
+    "--durations-from",
+    type=click.Path(exists=True),
+    help="Previous run report used to balance shards by historical duration.",
+)
+@click.option("--report", "report_path", type=click.Path(), help="Write a JSON run report.")
+@click.option(
+    "--dedupe/--no-dedupe",
+    default=True,
+    help="Generate once for identical files and reuse the tests for each copy.",
+)
+@click.option(
+    "--resume-run",
+    type=str,
+    help="Continue an interrupted run by its id (or 'latest') from its run journal.",
+)
+@click.option(
+    "--keep-runs",
+    is_flag=True,
+    default=False,
+    help="Keep the run journal and its blobs after the run completes.",
+)
+@click.option(
+    "--pack-tokens",
+    type=int,
+    help="Generate tests for small files together, up to N source tokens per request.",
+)
+@_ingest_options
+@_speculation_options
+@_runner_options
+@_example_options
+@_trace_options
 @click.option("--max-recursion", type=int, help="Set maximum recursion limit for LLM calls.")
 def generate(
     project,
@@ -92,10 +353,58 @@ def generate(
     file_glob,
     strip_prefix,
     slack_webhook=None,
+    slack_digest=False,
+    slack_digest_interval=None,
+    max_retries=None,
+    file_time_budget=None,
+    time_budget=None,
+    token_budget=None,
+    shard=None,
+    durations_from=None,
+    report_path=None,
+    dedupe=True,
+    resume_run=None,
+    keep_runs=False,
+    pack_tokens=None,
+    max_file_bytes=None,
+    oversized=None,
+    candidates=None,
+    candidates_from=None,
+    fork_server=None,
+    run_cache_enabled=None,
+    examples=None,
+    preload=(),
+    app_command=None,
+    base_url=None,
+    e2e_batch=None,
+    trace_path=None,
+    trace_format=None,
     max_recursion=None,
 ):
     """Generate tests for the provided project."""
     config_defaults = load_config()
+    _configure_trace(trace_path, trace_format)
+    _configure_ingest(config_defaults, max_file_bytes, oversized)
+    _configure_runner(
+        config_defaults, fork_server, preload, app_command, base_url, e2e_batch, run_cache_enabled
+    )
+    _configure_examples(config_defaults, examples)
+
+    resumed = None
+    if resume_run:
+        run_id = latest_run() if resume_run == "latest" else resume_run
+        try:
+            resumed = RunJournal.load(run_id or "")
+        except FileNotFoundError:
+            raise click.UsageError(f"No run journal found for {resume_run}.")
+        # The interrupted run's settings win over the ones given now
+        stored, discovery = resumed.options, resumed.discovery
+        project, output_project = stored["project"], stored["output_project"]
+        test_type, framework = stored["test_type"], stored["framework"]
+        strip_prefix, max_recursion = stored["strip_prefix"], stored["max_recursion"]
+        include_dirs, exclude_dirs = discovery["include_dirs"], discovery["exclude_dirs"]
+        file_glob, shard = discovery["file_glob"], discovery["shard"]
+        durations_from, dedupe = discovery["durations_from"], discovery["dedupe"]
 
     # For example, fallback to config if CLI arg is None
     framework = framework or config_defaults.get("framework")
@@ -108,105 +417,403 @@ def generate(
     if not framework:
         framework = ""
 
-    click.echo(f"Scanning project: {project}")
-    click.echo(f"Output project: {output_project}")
-
-    source_files, file_metadata = discover_source_files(
-        project,
-        test_type,
-        include_dirs=list(include_dirs) if include_dirs else None,
-        exclude_dirs=list(exclude_dirs) if exclude_dirs else None,
-        file_glob=file_glob,
+    notifier.configure(
+        digest=slack_digest or config_defaults.get("slack_digest", False),
+        digest_interval=slack_digest_interval or config_defaults.get("slack_digest_interval"),
     )
 
-    if not source_files:
-        click.echo("No source files found.")
-        return
-
-    click.echo(f"Discovered {len(source_files)} files to process.")
-
-    async def process_file(source_file: Path, progress, task_id):
-        relative_path = source_file.relative_to(project)
-        info = file_metadata[str(source_file)]
+    if resumed:
+        retry_policy = RetryPolicy(**resumed.options["retry_policy"])
+        speculation = {
+            "candidates": resumed.options.get("candidates", 1),
+            "candidate_files": resumed.options.get("candidate_files"),
+        }
+        pack_tokens = resumed.options.get("pack_tokens")
+    else:
+        retry_policy = RetryPolicy.from_config(
+            config_defaults, framework, max_retries=max_retries, time_budget=file_time_budget
+        )
+        speculation = _speculation(config_defaults, candidates, candidates_from)
+        pack_tokens = pack_tokens or config_defaults.get("pack_tokens")
 
-        # Read file once
-        with open(source_file, "r") as f:
-            input_code = f.read()
+    click.echo(f"Scanning project: {project}")
+    click.echo(f"Output project: {output_project}")
 
-        effective_test_type = test_type or info.get("test_type")
-        if not effective_test_type:
-            raise ValueError(f"Could not determine test_type for {source_file}")
+    options = RunOptions(
+        project=project,
+        output_project=output_project,
+        test_type=test_type,
+        framework=framework,
+        strip_prefix=strip_prefix,
+        slack_webhook=slack_webhook,
+        max_recursion=max_recursion,
+        retry_policy=retry_policy,
+        pack_tokens=pack_tokens,
+        **speculation,
+    )
 
-        output_path = resolve_output_path(
-            Path(project),
-            Path(output_project or project),
-            source_file,
-            test_type,
-            framework,
-            strip_prefix=strip_prefix,
+    if resumed:
+        journal = RunJournal(resumed.run_id)
+        journal.resumed()
+        pending = [(Path(project) / f, info) for f, info in resumed.pending()]
+        click.echo(
+            f"[AutoQA] [Journal]: Resuming run {resumed.run_id}: {len(resumed.finished)} files "
+            f"finished, {len(pending)} to continue."
         )
-
-        workflow = build_workflow()
-        state = GraphState(
-            input_code=input_code,
-            file_path=str(relative_path),
-            test_type=test_type,
-            framework=framework,
-            project_root=str(project),
-            output_project_root=str(output_project),
-            output_path=str(output_path),
-            slack_webhook=slack_webhook or None,
+    else:
+        journal = RunJournal.create()
+        journal.start(
+            # The webhook is a secret; a resumed run takes it from the command line again
+            options.model_dump(mode="json", exclude={"slack_webhook"}),
+            {
+                "include_dirs": list(include_dirs),
+                "exclude_dirs": list(exclude_dirs),
+                "file_glob": file_glob,
+                "shard": shard,
+                "durations_from": durations_from,
+                "dedupe": dedupe,
+            },
+        )
+        click.echo(
+            f"[AutoQA] [Journal]: Run {journal.run_id}; if interrupted, continue it with "
+            f"--resume-run {journal.run_id}."
         )
 
-        final_state = None
-        for step in workflow.stream(
-            state, {"recursion_limit": max_recursion if max_recursion else 100}
-        ):
-            node_name, state_dict = next(iter(step.items()))
-            current_state = GraphState(**state_dict)
+    report = RunReport(shard=shard)
 
-            click.echo(f"[AutoQA] [{relative_path}] Step ({node_name}): {current_state.status}")
+    def discover():
+        if resumed and resumed.discovery_complete:
+            return iter(pending)
+        candidates = collect_candidate_files(
+            project,
+            test_type,
+            include_dirs=list(include_dirs) if include_dirs else None,
+            exclude_dirs=list(exclude_dirs) if exclude_dirs else None,
+            file_glob=file_glob,
+        )
+        if shard:
+            # Sharding needs the whole tree, but only this shard's files get classified
+            index, total = parse_shard(shard)
+            durations = load_durations(durations_from) if durations_from else None
+            candidates = select_shard(list(candidates), project, index, total, durations)
+            report.set_manifest([str(f.relative_to(project)) for f in candidates])
+            click.echo(f"[AutoQA] [Shard {shard}]: {len(candidates)} candidate files.")
+        if resumed:
+            # Files accepted before the interruption, and their copies, are not classified again
+            known = resumed.known_files()
+            candidates = [f for f in candidates if str(f.relative_to(project)) not in known]
 
-            if node_name == "run":
-                click.echo("=== Test Results ===")
-                click.echo(current_state.test_results)
+        def not_selected(source_file: Path, reason: str):
+            # Recorded so that merged reports only count files that never got a verdict
+            report.add(
+                str(source_file.relative_to(project)), "not_selected", 0.0, stop_reason=reason
+            )
 
-            final_state = current_state
+        def grouped(source_file: Path, duplicate: str):
+            # Journaled as found, so a resumed run still generates copies of unfinished files
+            journal.grouped(str(source_file.relative_to(project)), duplicate)
 
-        if final_state.status == "awaiting_approval":
-            with open(f"pending_state_{relative_path.name}.json", "w") as f:
-                f.write(final_state.model_dump_json())
-            click.echo(f"[AutoQA] [{relative_path}] Workflow awaiting approval.")
+        if dedupe:
+            classified = classify_groups(candidates, test_type, project, not_selected, grouped)
         else:
-            click.echo(f"[AutoQA] [{relative_path}] Workflow completed.")
+            classified = classify_candidates(candidates, test_type, not_selected)
+        return itertools.chain(pending, classified) if resumed else classified
 
-        progress.advance(task_id)
+    budget = RunBudget(
+        time_budget=time_budget or config_defaults.get("time_budget"),
+        token_budget=token_budget or config_defaults.get("token_budget"),
+    )
 
-    # Launch all workflows with proper concurrency control
+    # Files are generated while discovery is still classifying the rest
     async def run_all():
         progress = Progress()
         progress.start()
+        try:
+            return await run_pipeline(
+                discover, options, max_workers, progress, budget, report, journal, resumed
+            )
+        finally:
+            progress.stop()
 
-        task_id = progress.add_task("[cyan]Processing files...", total=len(source_files))
+    # Entry point
+    if not asyncio.run(run_all()):
+        click.echo("No source files found.")
+    if not keep_runs and RunJournal.load(journal.run_id).complete:
+        # Nothing is left to resume, so the journal and its blobs only take up space
+        journal.delete()
+        click.echo(f"[AutoQA] [Journal]: Run {journal.run_id} completed; journal removed.")
+    click.echo(f"[AutoQA] [Budget]: Used {budget.tokens_used} tokens in {budget.elapsed:.0f}s.")
+    if report_path:
+        report.tokens = budget.tokens_used
+        report.elapsed = budget.elapsed
+        report.write(report_path)
+        click.echo(f"[AutoQA] Run report written to {report_path}")
+    notifier.close()
 
-        # Use semaphore to limit concurrent operations
-        semaphore = asyncio.Semaphore(max_workers)
 
-        async def semaphore_wrapped_process(source_file: Path):
-            async with semaphore:
-                await process_file(source_file, progress, task_id)
+@cli.command("merge-reports")
+@click.argument("reports", nargs=-1, required=True, type=click.Path(exists=True))
+@click.option(
+    "--output",
+    type=click.Path(),
+    default="autoqa-report.json",
+    help="Path of the merged report.",
+)
+def merge_reports_command(reports, output):
+    """Merge per-shard run reports into one."""
+    loaded = []
+    for path in reports:
+        with open(path, "r") as f:
+            loaded.append(json.load(f))
+
+    merged = merge_reports(loaded)
+    totals = [int(s.split("/")[1]) for s in merged["shards"]]
+    if totals:
+        expected = {f"{i}/{max(totals)}" for i in range(1, max(totals) + 1)}
+        missing = sorted(expected - set(merged["shards"]))
+        if missing:
+            click.echo(f"Warning: missing reports for shards {', '.join(missing)}.")
 
-        # Process files in batches to avoid overwhelming the system
-        batch_size = max_workers * 2
-        for i in range(0, len(source_files), batch_size):
-            batch = source_files[i : i + batch_size]
-            tasks = [semaphore_wrapped_process(f) for f in batch]
-            await asyncio.gather(*tasks, return_exceptions=True)
+    with open(output, "w") as f:
+        json.dump(merged, f, indent=2, sort_keys=True)
+    totals = merged["totals"]
+    click.echo(
+        f"Merged {len(reports)} reports: {totals['files']} files, "
+        f"{totals['missing']} without results -> {output}"
+    )
 
-        progress.stop()
 
-    # Entry point
-    asyncio.run(run_all())
+@cli.command()
+@click.option(
+    "--queue",
+    "queue_url",
+    required=True,
+    help="Job queue URL (sqlite:///path/queue.db or redis://host:port/db).",
+)
+@click.option(
+    "--project",
+    type=click.Path(exists=True),
+    required=True,
+    help="Target project directory to scan.",
+)
+@click.option(
+    "--output-project",
+    type=click.Path(exists=True),
+    help="Directory to write generated tests.",
+)
+@click.option(
+    "--type",
+    "test_type",
+    type=click.Choice(["unit", "e2e", "manual"]),
+    required=True,
+    help="Type of tests to generate.",
+)
+@click.option(
+    "--framework",
+    type=click.Choice(["pytest", "jest", "playwright", "cypress"]),
+    help="Framework to use.",
+)
+@click.option(
+    "--include-dirs",
+    type=click.Path(),
+    multiple=True,
+    help="One or more subdirectories to include (relative to project root).",
+)
+@click.option(
+    "--exclude-dirs",
+    type=click.Path(),
+    multiple=True,
+    help="One or more subdirectories to exclude (relative to project root).",
+)
+@click.option("--file-glob", type=str, help="Glob pattern to filter files (e.g., '*.service.js').")
+@click.option(
+    "--strip-prefix",
+    type=click.Path(),
+    help="Prefix to strip from input file paths when determining output paths.",
+)
+@click.option("--slack-webhook", type=str, help="Override Slack webhook URL.")
+@click.option("--max-retries", type=int, help="Maximum repair attempts per file.")
+@click.option(
+    "--file-time-budget",
+    type=float,
+    help="Stop repairing a file after this many seconds.",
+)
+@click.option(
+    "--dedupe/--no-dedupe",
+    default=True,
+    help="Generate once for identical files and reuse the tests for each copy.",
+)
+@_ingest_options
+@_speculation_options
+@click.option("--max-recursion", type=int, help="Set maximum recursion limit for LLM calls.")
+def submit(
+    queue_url,
+    project,
+    output_project,
+    test_type,
+    framework,
+    include_dirs,
+    exclude_dirs,
+    file_glob,
+    strip_prefix,
+    slack_webhook=None,
+    max_retries=None,
+    file_time_budget=None,
+    dedupe=True,
+    max_file_bytes=None,
+    oversized=None,
+    candidates=None,
+    candidates_from=None,
+    max_recursion=None,
+):
+    """Classify a project and queue one job per file for `auto worker`."""
+    config_defaults = load_config()
+    _configure_ingest(config_defaults, max_file_bytes, oversized)
+
+    framework = framework or config_defaults.get("framework")
+    output_project = output_project or config_defaults.get("output_project")
+    if test_type != "manual" and not framework:
+        click.echo(f"Error: --framework is required for {test_type} tests.")
+        return
+
+    options = RunOptions(
+        project=project,
+        output_project=output_project,
+        test_type=test_type,
+        framework=framework or "",
+        strip_prefix=strip_prefix,
+        slack_webhook=slack_webhook,
+        max_recursion=max_recursion,
+        retry_policy=RetryPolicy.from_config(
+            config_defaults, framework or "", max_retries=max_retries, time_budget=file_time_budget
+        ),
+        **_speculation(config_defaults, candidates, candidates_from),
+    )
+
+    queue = open_job_queue(queue_url)
+    candidates = collect_candidate_files(
+        project,
+        test_type,
+        include_dirs=list(include_dirs) if include_dirs else None,
+        exclude_dirs=list(exclude_dirs) if exclude_dirs else None,
+        file_glob=file_glob,
+    )
+    if dedupe:
+        # Queued jobs cannot change, so copies must all be grouped before submitting
+        classified = list(classify_groups(candidates, test_type, project))
+    else:
+        classified = classify_candidates(candidates, test_type)
+    submitted = 0
+    for source_file, info in classified:
+        rank = PRIORITY_RANK.get(info.get("priority"), PRIORITY_RANK["medium"])
+        queue.submit(job_payload(source_file, info, options), priority=rank)
+        submitted += 1
+
+    click.echo(f"[AutoQA] [Queue]: Submitted {submitted} jobs to {queue_url}.")
+
+
+@cli.command()
+@click.option(
+    "--queue",
+    "queue_url",
+    required=True,
+    help="Job queue URL (sqlite:///path/queue.db or redis://host:port/db).",
+)
+@click.option("--max-workers", default=4, help="Max parallel workflows.")
+@click.option(
+    "--lease",
+    type=float,
+    default=300.0,
+    help="Seconds a claimed job stays leased without a heartbeat.",
+)
+@click.option(
+    "--max-attempts",
+    type=int,
+    default=3,
+    help="Give up on a job after this many failed or abandoned attempts.",
+)
+@click.option("--poll-interval", type=float, default=5.0, help="Seconds between empty polls.")
+@click.option(
+    "--exit-when-empty",
+    is_flag=True,
+    help="Exit once no jobs are queued or running instead of waiting for more.",
+)
+@click.option(
+    "--project",
+    type=click.Path(exists=True),
+    help="Local checkout of the project, if it differs from the submitted path.",
+)
+@click.option(
+    "--output-project",
+    type=click.Path(exists=True),
+    help="Local directory to write generated tests, if it differs from the submitted path.",
+)
+@_runner_options
+@_example_options
+@_ingest_options
+@_trace_options
+def worker(
+    queue_url,
+    max_workers,
+    lease,
+    max_attempts,
+    poll_interval,
+    exit_when_empty,
+    project=None,
+    output_project=None,
+    fork_server=None,
+    run_cache_enabled=None,
+    examples=None,
+    preload=(),
+    app_command=None,
+    base_url=None,
+    e2e_batch=None,
+    max_file_bytes=None,
+    oversized=None,
+    trace_path=None,
+    trace_format=None,
+):
+    """Run queued jobs submitted with `auto submit`."""
+    config_defaults = load_config()
+    _configure_trace(trace_path, trace_format)
+    _configure_ingest(config_defaults, max_file_bytes, oversized)
+    _configure_runner(
+        config_defaults, fork_server, preload, app_command, base_url, e2e_batch, run_cache_enabled
+    )
+    _configure_examples(config_defaults, examples)
+    queue = open_job_queue(queue_url, max_attempts=max_attempts)
+    click.echo(f"[AutoQA] [Queue]: Worker started on {queue_url}.")
+    finished = run_worker(
+        queue,
+        max_workers=max_workers,
+        lease_seconds=lease,
+        poll_interval=poll_interval,
+        exit_when_empty=exit_when_empty,
+        overrides={"project": project, "output_project": output_project},
+    )
+    click.echo(f"[AutoQA] [Queue]: Worker finished {finished} jobs.")
+    notifier.close()
+
+
+@cli.command("queue-status")
+@click.option(
+    "--queue",
+    "queue_url",
+    required=True,
+    help="Job queue URL (sqlite:///path/queue.db or redis://host:port/db).",
+)
+@click.option("--report", "report_path", type=click.Path(), help="Write a JSON run report.")
+def queue_status(queue_url, report_path=None):
+    """Show job counts of a queue and optionally write its run report."""
+    queue = open_job_queue(queue_url)
+    stats = queue.stats()
+    summary = ", ".join(f"{status}: {count}" for status, count in sorted(stats.items()))
+    click.echo(f"[AutoQA] [Queue]: {summary or 'empty'}")
+    if report_path:
+        report = RunReport()
+        report.files = queue.results()
+        report.write(report_path)
+        click.echo(f"[AutoQA] Run report written to {report_path}")
 
 
 @cli.command()
@@ -247,29 +854,29 @@ def resume(state, slack_webhook):
 
         if node_name == "run":
             click.echo("\n=== Test Results ===")
-            click.echo(step_state.test_results)
+            click.echo(blobs.resolve(step_state.test_results))
 
         final_state = step_state
 
     if final_state.status == "awaiting_approval":
         click.echo("Workflow is awaiting further approval. Saving state again.")
+        blobs.persist(final_state.input_code, final_state.generated_tests, final_state.test_results)
         with open(state, "w") as f:
             f.write(final_state.json())
     else:
         click.echo("Workflow completed.")
+    notifier.close()
 
 
 @cli.command("repair-test")
 @click.option(
     "--source-file",
     type=click.Path(exists=True, dir_okay=False, readable=True),
-    required=True,
     help="Source code file the tests cover.",
 )
 @click.option(
     "--test-file",
     type=click.Path(exists=True, dir_okay=False, readable=True),
-    required=True,
     help="Test file to repair.",
 )
 @click.option(
@@ -284,50 +891,214 @@ def resume(state, slack_webhook):
     required=True,
     help="Framework to use.",
 )
-@click.option("--max-retries", default=5, help="Maximum repair attempts.")
+@click.option(
+    "--all",
+    "repair_all",
+    is_flag=True,
+    help="Run the whole suite once and repair every failing test file.",
+)
+@click.option(
+    "--tests",
+    "test_paths",
+    multiple=True,
+    help="Limit --all to these test files or directories (relative to project root).",
+)
+@click.option("--max-workers", default=4, help="Max parallel repairs with --all.")
+@click.option("--report", "report_path", type=click.Path(), help="Write a JSON run report.")
+@click.option("--max-retries", type=int, help="Maximum repair attempts.")
+@click.option(
+    "--time-budget",
+    type=float,
+    help="Stop repairing after this many seconds.",
+)
 @click.option("--slack-webhook", type=str, help="Slack webhook URL.")
-def repair_test(source_file, test_file, project_root, framework, max_retries, slack_webhook):
-    """Repair a failing test file against its source code."""
+@_runner_options
+@_example_options
+@_trace_options
+def repair_test(
+    source_file,
+    test_file,
+    project_root,
+    framework,
+    repair_all,
+    test_paths,
+    max_workers,
+    report_path,
+    max_retries,
+    time_budget,
+    slack_webhook,
+    fork_server=None,
+    run_cache_enabled=None,
+    examples=None,
+    preload=(),
+    app_command=None,
+    base_url=None,
+    e2e_batch=None,
+    trace_path=None,
+    trace_format=None,
+):
+    """Repair a failing test file, or with --all every failing file of a suite."""
+    config_defaults = load_config()
+    _configure_trace(trace_path, trace_format)
+    _configure_runner(
+        config_defaults, fork_server, preload, app_command, base_url, e2e_batch, run_cache_enabled
+    )
+    _configure_examples(config_defaults, examples)
+    retry_policy = RetryPolicy.from_config(
+        config_defaults, framework, max_retries=max_retries, time_budget=time_budget
+    )
+
+    if repair_all:
+        _repair_suite(
+            project_root,
+            framework,
+            list(test_paths),
+            retry_policy,
+            max_workers,
+            slack_webhook,
+            report_path,
+        )
+        notifier.close()
+        return
+
+    if not source_file or not test_file:
+        raise click.UsageError("--source-file and --test-file are required without --all.")
+
     click.echo(f"Repairing test: {test_file} against source: {source_file}")
+    final_state = repair_file(
+        Path(source_file), Path(test_file), project_root, framework, retry_policy, slack_webhook
+    )
 
-    async def process():
-        with open(source_file, "r") as f:
-            input_code = f.read()
-        with open(test_file, "r") as f:
-            test_code = f.read()
-
-        output_path = Path(test_file)
-
-        state = GraphState(
-            input_code=input_code,
-            generated_tests=test_code,
-            file_path=str(Path(test_file).relative_to(project_root)),
-            test_type="unit",
-            framework=framework,
-            project_root=str(project_root),
-            output_project_root=str(project_root),
-            output_path=str(output_path),
-            retry_count=0,
-            slack_webhook=slack_webhook,
+    if final_state.stop_reason == "passed":
+        click.echo(f"✅ Test repaired successfully: {test_file}")
+    else:
+        click.echo(
+            f"⚠️ Repair incomplete after {final_state.retry_count} retries "
+            f"({final_state.stop_reason})."
         )
+    notifier.close()
 
-        workflow = build_repair_workflow()
-        final_state = None
 
-        for step in workflow.stream(state):
-            node_name, state_dict = next(iter(step.items()))
-            current_state = GraphState(**state_dict)
-            click.echo(f"[AutoQA] Step: {node_name} - Status: {current_state.status}")
+def _repair_suite(
+    project_root, framework, test_paths, retry_policy, max_workers, slack_webhook, report_path
+):
+    if framework not in SOURCE_EXTENSIONS:
+        raise click.UsageError(f"--all supports pytest and jest, not {framework}.")
 
-            if node_name == "run":
-                click.echo("=== Test Results ===")
-                click.echo(current_state.test_results)
+    click.echo(f"[AutoQA] [Suite]: Running {framework} suite in {project_root}")
+    failures = run_suite(project_root, framework, test_paths)
+    if not failures:
+        click.echo("✅ All tests pass, nothing to repair.")
+        return
 
-            final_state = current_state
+    report = RunReport()
+    report.set_manifest(list(failures))
+    index = index_sources(project_root, framework)
+    pairs = []
+    for relative_test, output in sorted(failures.items()):
+        test_file = Path(project_root) / relative_test
+        source_file = find_source_file(Path(relative_test), project_root, framework, index)
+        if source_file is None:
+            click.echo(f"[AutoQA] [Suite]: No source file found for {relative_test}, skipping.")
+            report.add(relative_test, "skipped", 0.0, stop_reason="no_source")
+            continue
+        click.echo(f"[AutoQA] [Suite]: {relative_test} -> {source_file}")
+        pairs.append((source_file, test_file, output))
+
+    click.echo(f"[AutoQA] [Suite]: Repairing {len(pairs)} of {len(failures)} failing test files.")
+    outcomes = asyncio.run(
+        repair_many(
+            pairs, project_root, framework, retry_policy, max_workers, slack_webhook, report
+        )
+    )
+    repaired = sum(1 for reason in outcomes.values() if reason == "passed")
+    click.echo(f"[AutoQA] [Suite]: Repaired {repaired} of {len(failures)} failing test files.")
+    for relative_test, reason in sorted(outcomes.items()):
+        if reason != "passed":
+            click.echo(f"⚠️ {relative_test}: {reason}")
+
+    if report_path:
+        report.write(report_path)
+        click.echo(f"[AutoQA] Run report written to {report_path}")
 
-        if final_state.status == "passed":
-            click.echo(f"✅ Test repaired successfully: {test_file}")
-        else:
-            click.echo(f"⚠️ Repair incomplete after {max_retries} retries.")
 
-    asyncio.run(process())
+@cli.command()
+@click.option(
+    "--test-file",
+    "test_files",
+    type=click.Path(exists=True, dir_okay=False, readable=True),
+    multiple=True,
+    required=True,
+    help="Existing test file to extend (repeatable).",
+)
+@click.option(
+    "--source-file",
+    type=click.Path(exists=True, dir_okay=False, readable=True),
+    help="Source file the test covers (found by name or imports if omitted).",
+)
+@click.option(
+    "--project-root",
+    type=click.Path(exists=True, file_okay=False),
+    required=True,
+    help="Project root directory.",
+)
+@click.option(
+    "--framework",
+    type=click.Choice(["pytest", "jest"]),
+    required=True,
+    help="Framework to use.",
+)
+@click.option("--max-retries", type=int, help="Maximum repair attempts for the new tests.")
+@click.option(
+    "--time-budget",
+    type=float,
+    help="Stop repairing the new tests after this many seconds.",
+)
+@click.option("--slack-webhook", type=str, help="Slack webhook URL.")
+@_runner_options
+@_trace_options
+def augment(
+    test_files,
+    source_file,
+    project_root,
+    framework,
+    max_retries,
+    time_budget,
+    slack_webhook,
+    fork_server=None,
+    run_cache_enabled=None,
+    preload=(),
+    app_command=None,
+    base_url=None,
+    e2e_batch=None,
+    trace_path=None,
+    trace_format=None,
+):
+    """Add tests for the code existing tests do not cover."""
+    if source_file and len(test_files) > 1:
+        raise click.UsageError("--source-file can only be used with a single --test-file.")
+
+    config_defaults = load_config()
+    _configure_trace(trace_path, trace_format)
+    _configure_runner(
+        config_defaults, fork_server, preload, app_command, base_url, e2e_batch, run_cache_enabled
+    )
+    retry_policy = RetryPolicy.from_config(
+        config_defaults, framework, max_retries=max_retries, time_budget=time_budget
+    )
+    index = None if source_file else index_sources(project_root, framework)
+    for test_file in test_files:
+        test_path = Path(test_file)
+        source = (
+            Path(source_file)
+            if source_file
+            else find_source_file(test_path.resolve(), project_root, framework, index)
+        )
+        if source is None:
+            click.echo(f"[AutoQA] [Augment]: No source file found for {test_file}, skipping.")
+            continue
+        try:
+            augment_file(source, test_path, project_root, framework, retry_policy, slack_webhook)
+        except (ValueError, RuntimeError) as e:
+            click.echo(f"[AutoQA] [Augment]: {test_file}: {e}")
+    notifier.close()
@@ -0,0 +1,755 @@
+import asyncio
+import itertools
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import click
+from pydantic import BaseModel
+
+from common.augment import (
+    append_tests,
+    fixture_context,
+    measure_coverage,
+    render_regions,
+    uncovered_regions,
+)
+from common.blobstore import blobs
+from common.budget import PRIORITY_RANK, RunBudget
+from common.dedupe import rewrite_test_imports
+from common.ingest import sources
+from common.jobqueue import Job, JobQueue
+from common.journal import JournalState, RunJournal
+from common.packing import FilePack, Packer, parse_tests, render_sources
+from common.report import RunReport
+from common.tracing import tracer
+from common.utils import clean_code_fences, resolve_output_path
+from graph.prompt_node import PACK_TARGETS, create_augment_chain, create_pack_chain
+from graph.retry_policy import RetryPolicy, content_hash, error_hash
+from graph.workflow import GraphState, build_repair_workflow, build_workflow, next_node
+
+
+class RunCancelled(Exception):
+    """
+    Raised between workflow steps of a file whose run was cancelled.
+    """
+
+
+class RunOptions(BaseModel):
+    """
+    Settings shared by every file workflow in a `generate` run.
+    """
+
+    project: str
+    output_project: Optional[str] = None
+    test_type: str
+    framework: str = ""
+    strip_prefix: Optional[str] = None
+    slack_webhook: Optional[str] = None
+    max_recursion: Optional[int] = None
+    retry_policy: RetryPolicy = RetryPolicy()
+    candidates: int = 1
+    # Relative paths that get the candidates; None means every file
+    candidate_files: Optional[List[str]] = None
+    # Source tokens per packed generation request for small files; None disables packing
+    pack_tokens: Optional[int] = None
+
+    def candidates_for(self, relative_path: str) -> int:
+        if self.candidate_files is None or relative_path in self.candidate_files:
+            return self.candidates
+        return 1
+
+
+def process_file(
+    source_file: Path,
+    info: dict,
+    options: RunOptions,
+    on_step: Optional[Callable[[str, GraphState], None]] = None,
+    checkpoint: Optional[Tuple[str, dict]] = None,
+):
+    """
+    Runs the generation workflow for one source file and returns its final state.
+    on_step is called after every node. With a (node, state) checkpoint from a
+    run journal, the workflow continues after that node instead of starting over.
+    """
+    relative_path = source_file.relative_to(options.project)
+
+    if checkpoint is not None:
+        node, state_data = checkpoint
+        state = GraphState(**state_data)
+        entry = next_node(node, state)
+        if entry is None:
+            return state
+        click.echo(f"[AutoQA] [{relative_path}] Resuming after step {node}.")
+        return _stream_workflow(build_workflow(entry), state, relative_path, options, on_step)
+
+    # Usually still cached from classification
+    source = sources.read(source_file, detect_minified=options.test_type != "manual")
+    if source.skip_reason:
+        raise ValueError(f"Skipped {relative_path}: {source.skip_reason}")
+    if source.summarized:
+        click.echo(f"[AutoQA] [{relative_path}] {source.size} bytes, generating from its outline.")
+    input_code = source.text
+
+    effective_test_type = options.test_type or info.get("test_type")
+    if not effective_test_type:
+        raise ValueError(f"Could not determine test_type for {source_file}")
+
+    output_path = resolve_output_path(
+        Path(options.project),
+        Path(options.output_project or options.project),
+        source_file,
+        options.test_type,
+        options.framework,
+        strip_prefix=options.strip_prefix,
+    )
+
+    workflow = build_workflow()
+    state = GraphState(
+        input_code=blobs.externalize(input_code),
+        file_path=str(relative_path),
+        test_type=options.test_type,
+        framework=options.framework,
+        project_root=str(options.project),
+        output_project_root=str(options.output_project),
+        output_path=str(output_path),
+        slack_webhook=options.slack_webhook or None,
+        candidates=options.candidates_for(str(relative_path)),
+        **options.retry_policy.to_state(),
+    )
+
+    template = info.get("template_tests")
+    if template is not None:
+        # Duplicate of a file whose tests passed: reuse them and only verify
+        tests = rewrite_test_imports(
+            template,
+            options.project,
+            Path(options.project) / info["duplicate_of"],
+            Path(options.project) / info["template_output"],
+            source_file,
+            output_path,
+        )
+        click.echo(f"[AutoQA] [{relative_path}] Reusing tests of {info['duplicate_of']}.")
+        state = state.copy(
+            update={
+                "generated_tests": blobs.externalize(tests),
+                "approved": True,
+                "output_hashes": [content_hash(tests)],
+            }
+        )
+
+    packed = info.get("packed_tests")
+    if packed is not None:
+        # Generated together with other small files: continue as if generated alone
+        state = state.copy(
+            update={
+                "generated_tests": blobs.externalize(packed),
+                "status": "generating",
+                "output_hashes": [content_hash(packed)],
+            }
+        )
+        workflow = build_workflow("validate")
+
+    return _stream_workflow(workflow, state, relative_path, options, on_step)
+
+
+def generate_pack(pack: FilePack, options: RunOptions) -> Dict[str, str]:
+    """
+    Generates the tests of every file in pack with one request and returns
+    {relative path: test code} for the files the response covered.
+    """
+    files = []
+    for source_file, _info in pack.items:
+        files.append(
+            (str(source_file.relative_to(options.project)), sources.read(source_file).text)
+        )
+    chain = create_pack_chain(options.test_type, options.framework)
+    with tracer.span("pack", "workflow", files=len(files)):
+        result = chain.invoke({"sources": render_sources(files)})
+    return parse_tests(result.content, [path for path, _code in files])
+
+
+def _stream_workflow(workflow, state, relative_path: Path, options: RunOptions, on_step=None):
+    final_state = None
+    config = {"recursion_limit": options.max_recursion if options.max_recursion else 100}
+    with tracer.span("workflow", "workflow", file=str(relative_path)) as span:
+        for step in workflow.stream(state, config):
+            node_name, state_dict = next(iter(step.items()))
+            current_state = GraphState(**state_dict)
+
+            click.echo(f"[AutoQA] [{relative_path}] Step ({node_name}): {current_state.status}")
+            if on_step:
+                on_step(node_name, current_state)
+
+            if node_name == "run":
+                click.echo("=== Test Results ===")
+                click.echo(blobs.resolve(current_state.test_results))
+
+            final_state = current_state
+        if span is not None and final_state is not None:
+            span.attributes["status"] = final_state.status
+
+    if final_state.status == "awaiting_approval":
+        blobs.persist(final_state.input_code, final_state.generated_tests, final_state.test_results)
+        with open(f"pending_state_{relative_path.name}.json", "w") as f:
+            f.write(final_state.model_dump_json())
+        click.echo(f"[AutoQA] [{relative_path}] Workflow awaiting approval.")
+    else:
+        click.echo(f"[AutoQA] [{relative_path}] Workflow completed.")
+
+    return final_state
+
+
+def duplicate_items(
+    source_file: Path, info: dict, final_state, options: RunOptions
+) -> List[Tuple[Path, dict]]:
+    """
+    Returns the work items for the duplicates discovery grouped under
+    source_file. If its tests passed, they become the template for every
+    member. Otherwise each member is generated on its own.
+    """
+    members = info.get("duplicates") or []
+    member_info = {k: v for k, v in info.items() if k not in ("duplicates", "packed_tests")}
+    if members and final_state is not None and final_state.stop_reason == "passed":
+        member_info.update(
+            duplicate_of=str(source_file.relative_to(options.project)),
+            template_output=os.path.relpath(final_state.output_path, options.project),
+            template_tests=Path(final_state.output_path).read_text(),
+        )
+    return [(Path(options.project) / member, member_info) for member in members]
+
+
+def repair_file(
+    source_file: Path,
+    test_file: Path,
+    project_root: str,
+    framework: str,
+    retry_policy: RetryPolicy,
+    slack_webhook: Optional[str] = None,
+    failure_output: Optional[str] = None,
+):
+    """
+    Runs the repair workflow for one test file and returns its final state.
+    With failure_output from an earlier run, the first test run is skipped.
+    """
+    with open(source_file, "r") as f:
+        input_code = f.read()
+    with open(test_file, "r") as f:
+        test_code = f.read()
+
+    relative_path = Path(test_file).relative_to(project_root)
+    state = GraphState(
+        input_code=blobs.externalize(input_code),
+        generated_tests=blobs.externalize(test_code),
+        file_path=str(relative_path),
+        source_path=os.path.relpath(source_file, project_root),
+        test_type="unit",
+        framework=framework,
+        project_root=str(project_root),
+        output_project_root=str(project_root),
+        output_path=str(test_file),
+        retry_count=0,
+        slack_webhook=slack_webhook,
+        output_hashes=[content_hash(test_code)],
+        **retry_policy.to_state(),
+    )
+    if failure_output:
+        state = state.copy(
+            update={
+                "status": "failed",
+                "test_results": blobs.externalize(failure_output),
+                "error_hashes": [error_hash(failure_output)],
+            }
+        )
+
+    final_state = None
+    with tracer.span("repair workflow", "workflow", file=str(relative_path)):
+        for step in build_repair_workflow().stream(state):
+            node_name, state_dict = next(iter(step.items()))
+            current_state = GraphState(**state_dict)
+            click.echo(
+                f"[AutoQA] [{relative_path}] Step: {node_name} - Status: {current_state.status}"
+            )
+
+            if node_name == "run":
+                click.echo("=== Test Results ===")
+                click.echo(blobs.resolve(current_state.test_results))
+
+            final_state = current_state
+
+    return final_state
+
+
+def augment_file(
+    source_file: Path,
+    test_file: Path,
+    project_root: str,
+    framework: str,
+    retry_policy: RetryPolicy,
+    slack_webhook: Optional[str] = None,
+):
+    """
+    Adds tests for the code the existing test file does not cover. Only the
+    uncovered functions and the test file's imports and fixtures go into the
+    prompt. The new tests are appended and the file goes through the repair
+    workflow, which runs it and repairs it if needed. Returns the final state
+    of that workflow, or None when there was nothing to add.
+    """
+    # Paths may be relative to the current directory rather than the project
+    project_root = str(Path(project_root).resolve())
+    source_file, test_file = Path(source_file).resolve(), Path(test_file).resolve()
+    relative_path = test_file.relative_to(project_root)
+    coverage = measure_coverage(source_file, test_file, project_root, framework)
+    if not coverage.passed:
+        click.echo(f"[AutoQA] [{relative_path}] Existing tests fail, run `auto repair-test` first.")
+        click.echo(coverage.output)
+        return None
+
+    with open(source_file, "r") as f:
+        code = f.read()
+    regions = uncovered_regions(code, coverage, framework)
+    if not regions:
+        click.echo(f"[AutoQA] [{relative_path}] Fully covered ({coverage.percent:.0f}%).")
+        return None
+
+    with open(test_file, "r") as f:
+        test_code = f.read()
+    rendered = render_regions(code, regions)
+    sent_lines = sum(region.end - region.start + 1 for region in regions)
+    click.echo(
+        f"[AutoQA] [{relative_path}] Coverage {coverage.percent:.0f}%, sending "
+        f"{len(regions)} uncovered regions ({sent_lines} of {len(code.splitlines())} source lines)."
+    )
+
+    result = create_augment_chain(framework).invoke(
+        {
+            "file_path": os.path.relpath(source_file, project_root),
+            "regions": rendered,
+            "fixtures": fixture_context(test_code, framework),
+        }
+    )
+    with open(test_file, "w") as f:
+        f.write(append_tests(test_code, clean_code_fences(result.content)))
+
+    final_state = repair_file(
+        source_file, test_file, project_root, framework, retry_policy, slack_webhook
+    )
+    if final_state.stop_reason == "passed":
+        after = measure_coverage(source_file, test_file, project_root, framework)
+        click.echo(
+            f"[AutoQA] [{relative_path}] Coverage {coverage.percent:.0f}% -> {after.percent:.0f}%."
+        )
+    return final_state
+
+
+async def repair_many(
+    pairs: List[Tuple[Path, Path, str]],
+    project_root: str,
+    framework: str,
+    retry_policy: RetryPolicy,
+    max_workers: int,
+    slack_webhook: Optional[str] = None,
+    report: Optional[RunReport] = None,
+) -> Dict[str, str]:
+    """
+    Repairs (source_file, test_file, failure_output) pairs on max_workers
+    threads. Each workflow only re-runs its own test file. Returns the stop
+    reason (or "error") for every test file.
+    """
+    semaphore = asyncio.Semaphore(max_workers)
+    outcomes: Dict[str, str] = {}
+
+    async def repair(source_file: Path, test_file: Path, failure_output: str):
+        relative_path = str(test_file.relative_to(project_root))
+        async with semaphore:
+            started = time.monotonic()
+            try:
+                final_state = await asyncio.to_thread(
+                    repair_file,
+                    source_file,
+                    test_file,
+                    project_root,
+                    framework,
+                    retry_policy,
+                    slack_webhook,
+                    failure_output,
+                )
+                outcomes[relative_path] = final_state.stop_reason
+                if report:
+                    report.add(
+                        relative_path,
+                        final_state.status,
+                        time.monotonic() - started,
+                        stop_reason=final_state.stop_reason,
+                        retries=final_state.retry_count,
+                    )
+            except Exception as e:
+                click.echo(f"[AutoQA] [{relative_path}] Repair failed: {e}")
+                outcomes[relative_path] = "error"
+                if report:
+                    report.add(relative_path, "error", time.monotonic() - started, error=str(e))
+
+    await asyncio.gather(*(repair(*pair) for pair in pairs))
+    return outcomes
+
+
+async def run_pipeline(
+    discover: Callable[[], Iterator[Tuple[Path, dict]]],
+    options: RunOptions,
+    max_workers: int,
+    progress=None,
+    budget: Optional[RunBudget] = None,
+    report: Optional[RunReport] = None,
+    journal: Optional[RunJournal] = None,
+    resume: Optional[JournalState] = None,
+) -> int:
+    """
+    Runs discovery on a background thread and feeds accepted files to
+    max_workers workflow workers as soon as they are classified, so generation
+    starts before the project walk has finished. Files waiting in the queue are
+    taken highest priority first. With a budget, discovery stops once it is
+    spent and queued files are skipped when their priority no longer fits.
+    Duplicates grouped under a file are queued once it finishes. With
+    options.pack_tokens, small files are packed together and their tests
+    generated in one request; each file then continues on its own. Per-file
+    outcomes are recorded in report when one is given. With a journal, each
+    accepted file, workflow step and finished file is recorded; resume is the
+    journal state of an interrupted run whose checkpoints are continued.
+    Errors are collected per file and listed at the end. When the run is
+    cancelled, discovery stops and in-flight files stop after their current
+    step. Returns the number of files that were discovered, duplicates included.
+    """
+    loop = asyncio.get_running_loop()
+    # Unbounded so that high-priority files can overtake everything still waiting
+    queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+    done_rank = len(PRIORITY_RANK) + 1
+    task_id = progress.add_task("[cyan]Processing files...", total=None) if progress else None
+    discovered = 0
+    duplicates = 0
+    sequence = itertools.count()
+    discovery_errors = []
+    failures: Dict[str, str] = {}
+    cancelled = threading.Event()
+
+    def step_hook(relative_path: str):
+        def on_step(node: str, state):
+            if journal:
+                journal.step(relative_path, node, state)
+            if cancelled.is_set():
+                raise RunCancelled(f"{relative_path} stopped after step {node}")
+
+        return on_step
+
+    packer = None
+    if options.pack_tokens and (options.test_type, options.framework) in PACK_TARGETS:
+        packer = Packer(options.pack_tokens)
+
+    def packable(item: Tuple[Path, dict]) -> bool:
+        relative_path = str(item[0].relative_to(options.project))
+        if packer is None or "template_tests" in item[1]:
+            return False
+        # Continued checkpoints and speculative files keep their own workflow
+        if resume and relative_path in resume.checkpoints:
+            return False
+        return options.candidates_for(relative_path) == 1 and packer.fits(item[0])
+
+    def rank_of(info: dict) -> int:
+        return PRIORITY_RANK.get(info.get("priority"), PRIORITY_RANK["medium"])
+
+    # Packs whose files are not back in the queue yet; workers stop only after they are
+    open_packs = 0
+    discovery_finished = False
+
+    async def put(item):
+        nonlocal open_packs
+        if isinstance(item, FilePack) and len(item.items) == 1:
+            item = item.items[0]
+        # A pack goes as early as its most urgent file
+        if isinstance(item, FilePack):
+            open_packs += 1
+            rank = min(rank_of(info) for _file, info in item.items)
+        else:
+            rank = rank_of(item[1])
+        await queue.put((rank, next(sequence), item))
+
+    # Finished files whose duplicate lists discovery may still append to
+    settled: List[Tuple[Path, dict, Optional[GraphState], int]] = []
+
+    async def queue_duplicates(source_file: Path, info: dict, final_state):
+        nonlocal duplicates
+        members = duplicate_items(source_file, info, final_state, options)
+        if not members:
+            return
+        duplicates += len(members)
+        if progress:
+            progress.update(task_id, total=discovered + duplicates)
+        for member in members:
+            if journal:
+                journal.classified(str(member[0].relative_to(options.project)), member[1])
+            await queue.put((rank_of(info), next(sequence), member))
+
+    async def stop_when_drained():
+        if discovery_finished and not open_packs:
+            # Ranked after every real priority so workers drain the queue first
+            for i in range(max_workers):
+                await queue.put((done_rank, i, None))
+
+    async def finish_discovery():
+        nonlocal discovery_finished
+        discovery_finished = True
+        for source_file, info, final_state, seen in settled:
+            late = info["duplicates"][seen:]
+            if late:
+                await queue_duplicates(source_file, {**info, "duplicates": late}, final_state)
+        settled.clear()
+        await stop_when_drained()
+
+    def enqueue(item):
+        asyncio.run_coroutine_threadsafe(put(item), loop).result()
+
+    def produce():
+        nonlocal discovered
+        try:
+            for item in discover():
+                if cancelled.is_set():
+                    break
+                if journal:
+                    journal.classified(str(item[0].relative_to(options.project)), item[1])
+                discovered += 1
+                if progress:
+                    progress.update(task_id, total=discovered)
+                if packable(item):
+                    pack = packer.add(item)
+                    if pack:
+                        enqueue(pack)
+                else:
+                    enqueue(item)
+                if budget and budget.exhausted():
+                    click.echo("[AutoQA] [Budget]: Budget spent, stopping discovery.")
+                    break
+            else:
+                if journal:
+                    journal.discovered()
+        except Exception as e:
+            discovery_errors.append(e)
+        finally:
+            pack = packer.flush() if packer else None
+            if pack:
+                enqueue(pack)
+            asyncio.run_coroutine_threadsafe(finish_discovery(), loop).result()
+
+    async def generate_together(pack: FilePack):
+        nonlocal open_packs
+        paths = [str(f.relative_to(options.project)) for f, _info in pack.items]
+        urgent = min((info for _file, info in pack.items), key=rank_of)
+        tests: Dict[str, str] = {}
+        # Without budget for the most urgent file, each file is skipped on its own
+        if not budget or budget.allows(urgent.get("priority")):
+            click.echo(f"[AutoQA] [Pack]: Generating tests for {len(paths)} small files at once.")
+            try:
+                tests = await asyncio.to_thread(generate_pack, pack, options)
+            except Exception as e:
+                click.echo(f"[AutoQA] [Pack]: Packed generation failed: {e}")
+            missing = [path for path in paths if path not in tests]
+            if missing:
+                click.echo(f"[AutoQA] [Pack]: Generating alone: {', '.join(missing)}")
+        for source_file, info in pack.items:
+            relative_path = str(source_file.relative_to(options.project))
+            if relative_path in tests:
+                info = {**info, "packed_tests": tests[relative_path]}
+            await queue.put((rank_of(info), next(sequence), (source_file, info)))
+        open_packs -= 1
+        await stop_when_drained()
+
+    async def worker():
+        while True:
+            _rank, _seq, item = await queue.get()
+            if item is None:
+                return
+            if isinstance(item, FilePack):
+                await generate_together(item)
+                continue
+            source_file, info = item
+            relative_path = str(source_file.relative_to(options.project))
+            if budget and not budget.allows(info.get("priority")):
+                click.echo(
+                    f"[AutoQA] [Budget]: Skipping {source_file} "
+                    f"(priority: {info.get('priority')}), budget nearly spent."
+                )
+                if report:
+                    report.add(relative_path, "skipped", 0.0, stop_reason="run_budget")
+                if progress:
+                    progress.advance(task_id)
+                continue
+            started = time.monotonic()
+            final_state = None
+            kwargs = {"on_step": step_hook(relative_path)}
+            if resume and relative_path in resume.checkpoints:
+                kwargs["checkpoint"] = resume.checkpoints[relative_path]
+            try:
+                final_state = await asyncio.to_thread(
+                    process_file, source_file, info, options, **kwargs
+                )
+                if journal:
+                    journal.done(relative_path, final_state.status)
+                if report:
+                    report.add(
+                        relative_path,
+                        final_state.status,
+                        time.monotonic() - started,
+                        stop_reason=final_state.stop_reason,
+                        retries=final_state.retry_count,
+                    )
+            except Exception as e:
+                click.echo(f"[AutoQA] [{source_file}] Workflow failed: {e}")
+                failures[relative_path] = f"{type(e).__name__}: {e}"
+                if report:
+                    report.add(relative_path, "error", time.monotonic() - started, error=str(e))
+            live = info.get("duplicates")
+            if live is not None:
+                # Discovery may still be appending to the list, so work from a copy
+                info = {**info, "duplicates": list(live)}
+            await queue_duplicates(source_file, info, final_state)
+            if live is not None and not discovery_finished:
+                # Copies found from now on are queued when discovery finishes
+                settled.append((source_file, item[1], final_state, len(info["duplicates"])))
+            if progress:
+                progress.advance(task_id)
+
+    producer = threading.Thread(target=produce, name="autoqa-discovery", daemon=True)
+    producer.start()
+    try:
+        await asyncio.gather(*(worker() for _ in range(max_workers)))
+    except asyncio.CancelledError:
+        # Workflow threads cannot be interrupted, so stop them at their next step
+        cancelled.set()
+        click.echo("[AutoQA] Cancelled: in-flight files stop after their current step.")
+        raise
+    producer.join()
+    if failures:
+        click.echo(f"[AutoQA] {len(failures)} files failed:")
+        for relative_path, error in failures.items():
+            click.echo(f"  {relative_path}: {error}")
+    if discovery_errors:
+        raise discovery_errors[0]
+    return discovered + duplicates
+
+
+def job_payload(source_file: Path, info: dict, options: RunOptions) -> dict:
+    """
+    Serializes one file of a run for `auto submit`.
+    """
+    return {
+        "file": str(source_file.relative_to(options.project)),
+        "info": info,
+        "options": options.model_dump(),
+    }
+
+
+def _job_options(job: Job, overrides: dict) -> RunOptions:
+    return RunOptions(**{**job.payload["options"], **overrides})
+
+
+def _member_payloads(job: Job, options: RunOptions, final_state) -> List[dict]:
+    source_file = Path(options.project) / job.payload["file"]
+    return [
+        {
+            "file": str(member.relative_to(options.project)),
+            "info": member_info,
+            "options": job.payload["options"],
+        }
+        for member, member_info in duplicate_items(
+            source_file, job.payload["info"], final_state, options
+        )
+    ]
+
+
+def _run_job(job: Job, overrides: dict) -> Tuple[dict, List[dict]]:
+    options = _job_options(job, overrides)
+    source_file = Path(options.project) / job.payload["file"]
+    started = time.monotonic()
+    final_state = process_file(source_file, job.payload["info"], options)
+    result = {
+        "status": final_state.status,
+        "stop_reason": final_state.stop_reason,
+        "retries": final_state.retry_count,
+        "duration": round(time.monotonic() - started, 3),
+    }
+    return result, _member_payloads(job, options, final_state)
+
+
+def run_worker(
+    queue: JobQueue,
+    max_workers: int = 1,
+    lease_seconds: float = 300.0,
+    poll_interval: float = 5.0,
+    exit_when_empty: bool = False,
+    overrides: Optional[dict] = None,
+) -> int:
+    """
+    Claims jobs from queue on max_workers threads and runs each through the
+    same workflow as `generate`. Leases are renewed every third of
+    lease_seconds while a job runs, so only jobs of dead workers expire.
+    overrides replace RunOptions fields, for example when the project is
+    checked out at a different path on this machine. Returns the number of
+    jobs this process finished.
+    """
+    worker_prefix = uuid.uuid4().hex[:8]
+    overrides = {k: v for k, v in (overrides or {}).items() if v is not None}
+    finished = 0
+    finished_lock = threading.Lock()
+
+    def heartbeat(job: Job, worker_id: str, stop: threading.Event):
+        while not stop.wait(lease_seconds / 3):
+            if not queue.heartbeat(job.id, worker_id, lease_seconds):
+                click.echo(f"[AutoQA] [Worker {worker_id}]: Lost lease on {job.payload['file']}.")
+                return
+
+    def work(worker_id: str):
+        nonlocal finished
+        while True:
+            requeued = queue.requeue_expired()
+            if requeued:
+                click.echo(f"[AutoQA] [Worker {worker_id}]: Requeued {requeued} abandoned jobs.")
+            job = queue.claim(worker_id, lease_seconds)
+            if job is None:
+                stats = queue.stats()
+                if exit_when_empty and not stats.get("queued") and not stats.get("leased"):
+                    return
+                time.sleep(poll_interval)
+                continue
+
+            stop = threading.Event()
+            beat = threading.Thread(target=heartbeat, args=(job, worker_id, stop), daemon=True)
+            beat.start()
+            try:
+                result, members = _run_job(job, overrides)
+            except Exception as e:
+                click.echo(f"[AutoQA] [{job.payload['file']}] Workflow failed: {e}")
+                queue.fail(job.id, worker_id, str(e))
+                # Once the job is given up, its duplicates are generated on their own
+                members = []
+                if job.attempts >= queue.max_attempts:
+                    members = _member_payloads(job, _job_options(job, overrides), None)
+            else:
+                queue.complete(job.id, worker_id, result)
+            finally:
+                stop.set()
+                beat.join()
+            for payload in members:
+                queue.submit(payload, priority=job.priority)
+            with finished_lock:
+                finished += 1
+
+    threads = [
+        threading.Thread(target=work, args=(f"{worker_prefix}-{i}",), name=f"autoqa-worker-{i}")
+        for i in range(max_workers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return finished
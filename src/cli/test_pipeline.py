@@ -0,0 +1,658 @@
+import asyncio
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from cli.pipeline import (
+    RunCancelled,
+    RunOptions,
+    augment_file,
+    duplicate_items,
+    job_payload,
+    process_file,
+    repair_file,
+    repair_many,
+    run_pipeline,
+    run_worker,
+)
+from common.augment import CoverageResult
+from common.budget import RunBudget
+from common.jobqueue import InMemoryRedis, RedisJobQueue
+from common.journal import RunJournal
+from common.report import RunReport
+from common.utils import classify_groups
+from graph.retry_policy import RetryPolicy
+from graph.workflow import GraphState
+
+
+@pytest.fixture
+def options():
+    """Provides run options for a unit test run."""
+    return RunOptions(project="/tmp/proj", test_type="unit", framework="pytest")
+
+
+def test_run_pipeline_streams_before_discovery_finishes(options):
+    first_done = threading.Event()
+    seen_before_second = []
+
+    def discover():
+        yield Path("/tmp/proj/a.py"), {"priority": "high"}
+        # Only continues once the first file went through a worker
+        seen_before_second.append(first_done.wait(timeout=5))
+        yield Path("/tmp/proj/b.py"), {"priority": "high"}
+
+    processed = []
+
+    def fake_process(source_file, info, _options, **_kwargs):
+        processed.append(source_file.name)
+        first_done.set()
+
+    with patch("cli.pipeline.process_file", side_effect=fake_process):
+        discovered = asyncio.run(run_pipeline(discover, options, max_workers=2))
+
+    assert discovered == 2
+    assert seen_before_second == [True]
+    assert sorted(processed) == ["a.py", "b.py"]
+
+
+def test_run_pipeline_keeps_going_after_file_failure(options, capsys):
+    def discover():
+        return iter([(Path(f"/tmp/proj/{name}.py"), {}) for name in ("a", "b", "c")])
+
+    processed = []
+
+    def fake_process(source_file, info, _options, **_kwargs):
+        if source_file.name == "a.py":
+            raise ValueError("boom")
+        processed.append(source_file.name)
+
+    with patch("cli.pipeline.process_file", side_effect=fake_process):
+        asyncio.run(run_pipeline(discover, options, max_workers=1))
+
+    assert processed == ["b.py", "c.py"]
+    assert "1 files failed:\n  a.py: ValueError: boom" in capsys.readouterr().out
+
+
+def test_run_pipeline_cancellation_stops_files_after_their_current_step(options):
+    started = threading.Event()
+    outcomes = []
+
+    def slow_process(source_file, info, _options, on_step=None, **_kwargs):
+        started.set()
+        try:
+            for node in ("generate", "validate", "approve", "save", "run", "notify"):
+                time.sleep(0.05)
+                on_step(node, None)
+        except RunCancelled as e:
+            outcomes.append(str(e))
+            raise
+        outcomes.append(f"{source_file.name} finished")
+
+    def discover():
+        return iter([(Path("/tmp/proj/a.py"), {}), (Path("/tmp/proj/b.py"), {})])
+
+    async def cancel_once_started():
+        task = asyncio.create_task(run_pipeline(discover, options, max_workers=1))
+        await asyncio.to_thread(started.wait, 5)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    with patch("cli.pipeline.process_file", side_effect=slow_process):
+        asyncio.run(cancel_once_started())
+
+    assert len(outcomes) == 1
+    assert outcomes[0].startswith("a.py stopped after step")
+
+
+def test_run_pipeline_raises_discovery_errors(options):
+    def discover():
+        raise ValueError("Unsupported test type: bogus")
+
+    with pytest.raises(ValueError, match="Unsupported test type"):
+        asyncio.run(run_pipeline(discover, options, max_workers=2))
+
+
+def test_run_pipeline_takes_high_priority_first(options):
+    discovery_done = threading.Event()
+
+    def discover():
+        yield Path("/tmp/proj/low_1.py"), {"priority": "low"}
+        yield Path("/tmp/proj/low_2.py"), {"priority": "low"}
+        yield Path("/tmp/proj/high.py"), {"priority": "high"}
+        discovery_done.set()
+
+    processed = []
+
+    def fake_process(source_file, info, _options, **_kwargs):
+        # Hold the only worker until everything else is queued
+        discovery_done.wait(timeout=5)
+        processed.append(source_file.name)
+
+    with patch("cli.pipeline.process_file", side_effect=fake_process):
+        asyncio.run(run_pipeline(discover, options, max_workers=1))
+
+    assert processed == ["low_1.py", "high.py", "low_2.py"]
+
+
+def test_run_pipeline_skips_low_priority_when_budget_nearly_spent(options):
+    budget = RunBudget(token_budget=1000)
+
+    def discover():
+        return iter(
+            [(Path(f"/tmp/proj/{p}.py"), {"priority": p}) for p in ("high", "medium", "low")]
+        )
+
+    processed = []
+
+    with patch(
+        "cli.pipeline.process_file", side_effect=lambda f, *_, **__: processed.append(f.name)
+    ):
+        with patch.object(RunBudget, "fraction_spent", return_value=0.85):
+            asyncio.run(run_pipeline(discover, options, max_workers=1, budget=budget))
+
+    assert processed == ["high.py", "medium.py"]
+
+
+def test_run_worker_processes_submitted_jobs(options):
+    queue = RedisJobQueue(InMemoryRedis(), max_attempts=1)
+    for name in ("a", "b"):
+        queue.submit(job_payload(Path(f"/tmp/proj/{name}.py"), {"priority": "high"}, options))
+
+    processed = []
+
+    def fake_process(source_file, info, run_options):
+        processed.append((str(source_file), run_options.project))
+        if source_file.name == "b.py":
+            raise ValueError("boom")
+        return SimpleNamespace(status="completed", stop_reason="passed", retry_count=1)
+
+    with patch("cli.pipeline.process_file", side_effect=fake_process):
+        finished = run_worker(
+            queue,
+            max_workers=2,
+            poll_interval=0.01,
+            exit_when_empty=True,
+            overrides={"project": "/srv/proj"},
+        )
+
+    assert finished == 2
+    assert sorted(processed) == [("/srv/proj/a.py", "/srv/proj"), ("/srv/proj/b.py", "/srv/proj")]
+    results = queue.results()
+    assert results["a.py"]["stop_reason"] == "passed"
+    assert results["b.py"] == {
+        "status": "error",
+        "stop_reason": None,
+        "retries": 0,
+        "duration": 0.0,
+        "error": "boom",
+    }
+
+
+def test_repair_file_prompts_with_the_source_path(tmp_path):
+    (tmp_path / "src").mkdir()
+    (tmp_path / "tests").mkdir()
+    source_file = tmp_path / "src" / "calc.py"
+    source_file.write_text("def add(a, b):\n    return a + b\n")
+    test_file = tmp_path / "tests" / "test_calc.py"
+    test_file.write_text("def test_add():\n    assert add(1, 1) == 3\n")
+
+    with patch("graph.workflow.create_repair_chain") as mock_chain, patch(
+        "graph.workflow.subprocess.run",
+        return_value=SimpleNamespace(returncode=0, stdout="1 passed", stderr=""),
+    ), patch("graph.workflow.notifier"):
+        mock_chain.return_value.invoke.return_value = SimpleNamespace(
+            content="def test_add():\n    assert add(1, 1) == 2\n"
+        )
+        repair_file(
+            source_file,
+            test_file,
+            str(tmp_path),
+            "pytest",
+            RetryPolicy(),
+            failure_output="E   assert 2 == 3",
+        )
+
+    inputs = mock_chain.return_value.invoke.call_args.args[0]
+    assert inputs["file_path"] == "src/calc.py"
+
+
+def test_repair_many_runs_each_failing_file(tmp_path):
+    pairs = [
+        (tmp_path / f"{name}.py", tmp_path / f"test_{name}.py", f"{name} failed")
+        for name in ("a", "b", "c")
+    ]
+    seen = []
+
+    def fake_repair(source_file, test_file, *_args):
+        seen.append((source_file.name, test_file.name, _args[-1]))
+        if source_file.name == "c.py":
+            raise ValueError("boom")
+        stop = "passed" if source_file.name == "a.py" else "max_retries"
+        return SimpleNamespace(status="completed", stop_reason=stop, retry_count=2)
+
+    report = RunReport()
+    with patch("cli.pipeline.repair_file", side_effect=fake_repair):
+        outcomes = asyncio.run(
+            repair_many(pairs, str(tmp_path), "pytest", RetryPolicy(), 2, report=report)
+        )
+
+    assert outcomes == {"test_a.py": "passed", "test_b.py": "max_retries", "test_c.py": "error"}
+    assert sorted(seen) == [
+        ("a.py", "test_a.py", "a failed"),
+        ("b.py", "test_b.py", "b failed"),
+        ("c.py", "test_c.py", "c failed"),
+    ]
+    assert report.files["test_c.py"]["error"] == "boom"
+
+
+def test_augment_file_sends_only_uncovered_code(tmp_path):
+    source_file = tmp_path / "calc.py"
+    source_file.write_text(
+        "def add(a, b):\n    return a + b\n\n\ndef sub(a, b):\n    return a - b\n"
+    )
+    test_file = tmp_path / "test_calc.py"
+    test_file.write_text("from calc import add\n\n\ndef test_add():\n    assert add(1, 2) == 3\n")
+    before = CoverageResult(passed=True, output="", percent=75.0, uncovered_lines=[6])
+    after = CoverageResult(passed=True, output="", percent=100.0)
+    new_tests = "```python\ndef test_sub():\n    assert sub(3, 1) == 2\n```"
+
+    with patch("cli.pipeline.measure_coverage", side_effect=[before, after]), patch(
+        "cli.pipeline.create_augment_chain"
+    ) as mock_chain, patch("cli.pipeline.repair_file") as mock_repair:
+        mock_chain.return_value.invoke.return_value = SimpleNamespace(content=new_tests)
+        mock_repair.return_value = SimpleNamespace(stop_reason="passed")
+        augment_file(source_file, test_file, str(tmp_path), "pytest", RetryPolicy())
+
+    prompt_input = mock_chain.return_value.invoke.call_args[0][0]
+    assert "def sub(a, b):" in prompt_input["regions"]
+    assert "def add(a, b):" not in prompt_input["regions"]
+    assert prompt_input["fixtures"] == "from calc import add"
+    assert test_file.read_text().endswith("\n\n\ndef test_sub():\n    assert sub(3, 1) == 2\n")
+    assert "def test_add():" in test_file.read_text()
+    mock_repair.assert_called_once()
+
+
+def test_augment_file_skips_failing_tests(tmp_path):
+    failing = CoverageResult(passed=False, output="1 failed")
+
+    with patch("cli.pipeline.measure_coverage", return_value=failing), patch(
+        "cli.pipeline.create_augment_chain"
+    ) as mock_chain:
+        result = augment_file(
+            tmp_path / "calc.py", tmp_path / "test_calc.py", str(tmp_path), "pytest", RetryPolicy()
+        )
+
+    assert result is None
+    mock_chain.assert_not_called()
+
+
+def test_augment_file_accepts_paths_relative_to_the_working_directory(tmp_path, monkeypatch):
+    project = tmp_path / "proj"
+    project.mkdir()
+    monkeypatch.chdir(tmp_path)
+    failing = CoverageResult(passed=False, output="1 failed")
+
+    with patch("cli.pipeline.measure_coverage", return_value=failing) as mock_coverage:
+        augment_file(
+            Path("proj/calc.py"), Path("proj/test_calc.py"), "proj", "pytest", RetryPolicy()
+        )
+
+    assert mock_coverage.call_args[0][:3] == (
+        project / "calc.py",
+        project / "test_calc.py",
+        str(project),
+    )
+
+
+def test_run_pipeline_reuses_passing_tests_for_duplicates(tmp_path):
+    options = RunOptions(project=str(tmp_path), test_type="unit", framework="pytest")
+    (tmp_path / "test_a.py").write_text("from a import f\n")
+
+    def discover():
+        yield tmp_path / "a.py", {"priority": "high", "duplicates": ["copy/a.py", "b.py"]}
+
+    processed = []
+
+    def fake_process(source_file, info, _options, **_kwargs):
+        processed.append((source_file.relative_to(tmp_path).as_posix(), info))
+        return SimpleNamespace(
+            status="completed",
+            stop_reason="passed",
+            retry_count=0,
+            output_path=str(tmp_path / "test_a.py"),
+        )
+
+    with patch("cli.pipeline.process_file", side_effect=fake_process):
+        discovered = asyncio.run(run_pipeline(discover, options, max_workers=2))
+
+    assert discovered == 3
+    assert [name for name, _info in processed] == ["a.py", "copy/a.py", "b.py"]
+    member_info = processed[1][1]
+    assert "duplicates" not in member_info
+    assert member_info["duplicate_of"] == "a.py"
+    assert member_info["template_output"] == "test_a.py"
+    assert member_info["template_tests"] == "from a import f\n"
+
+
+def test_run_pipeline_queues_copies_found_after_their_file_finished(tmp_path):
+    options = RunOptions(project=str(tmp_path), test_type="unit", framework="pytest")
+    (tmp_path / "test_a.py").write_text("from a import f\n")
+    leader_done = threading.Event()
+
+    def discover():
+        duplicates = []
+        yield tmp_path / "a.py", {"priority": "high", "duplicates": duplicates}
+        # Discovery is still walking when a.py finishes, and only then finds its copy
+        leader_done.wait(5)
+        duplicates.append("copy/a.py")
+
+    processed = []
+
+    def fake_process(source_file, info, _options, **_kwargs):
+        processed.append((source_file.relative_to(tmp_path).as_posix(), info))
+        leader_done.set()
+        return SimpleNamespace(
+            status="completed",
+            stop_reason="passed",
+            retry_count=0,
+            output_path=str(tmp_path / "test_a.py"),
+        )
+
+    with patch("cli.pipeline.process_file", side_effect=fake_process):
+        discovered = asyncio.run(run_pipeline(discover, options, max_workers=2))
+
+    assert discovered == 2
+    assert [name for name, _info in processed] == ["a.py", "copy/a.py"]
+    assert processed[1][1]["duplicate_of"] == "a.py"
+
+
+def test_duplicates_generate_on_their_own_when_template_fails(options):
+    info = {"priority": "low", "duplicates": ["b.py"]}
+    failed = SimpleNamespace(stop_reason="max_retries")
+
+    assert duplicate_items(Path("/tmp/proj/a.py"), info, failed, options) == [
+        (Path("/tmp/proj/b.py"), {"priority": "low"})
+    ]
+    assert duplicate_items(Path("/tmp/proj/a.py"), {}, failed, options) == []
+
+
+def test_process_file_starts_duplicates_from_template(tmp_path):
+    options = RunOptions(project=str(tmp_path), test_type="unit", framework="pytest")
+    (tmp_path / "billing").mkdir()
+    (tmp_path / "billing/money.py").write_text("def f():\n    return 1\n")
+    info = {
+        "duplicate_of": "orders/money.py",
+        "template_output": "orders/test_money.py",
+        "template_tests": "from orders.money import f\n",
+    }
+    states = []
+
+    def fake_stream(state, _config):
+        states.append(state)
+        yield {"notify": state.copy(update={"status": "completed"}).model_dump()}
+
+    with patch("cli.pipeline.build_workflow") as mock_build:
+        mock_build.return_value.stream.side_effect = fake_stream
+        process_file(tmp_path / "billing/money.py", info, options)
+
+    assert states[0].approved
+    assert states[0].generated_tests == "from billing.money import f\n"
+    assert states[0].output_path == str(tmp_path / "billing/test_money.py")
+
+
+def test_process_file_gives_candidates_to_listed_files(tmp_path):
+    options = RunOptions(
+        project=str(tmp_path),
+        test_type="unit",
+        framework="pytest",
+        candidates=3,
+        candidate_files=["hard.py"],
+    )
+    (tmp_path / "hard.py").write_text("def f():\n    return 1\n")
+    (tmp_path / "easy.py").write_text("def g():\n    return 2\n")
+    states = []
+
+    def fake_stream(state, _config):
+        states.append(state)
+        yield {"notify": state.copy(update={"status": "completed"}).model_dump()}
+
+    with patch("cli.pipeline.build_workflow") as mock_build:
+        mock_build.return_value.stream.side_effect = fake_stream
+        process_file(tmp_path / "hard.py", {}, options)
+        process_file(tmp_path / "easy.py", {}, options)
+
+    assert [state.candidates for state in states] == [3, 1]
+
+
+def test_run_pipeline_packs_small_files(tmp_path):
+    options = RunOptions(
+        project=str(tmp_path), test_type="unit", framework="pytest", pack_tokens=2000
+    )
+    for name in ("a.py", "b.py", "c.py"):
+        (tmp_path / name).write_text("def f():\n    return 1\n")
+    (tmp_path / "large.py").write_text("x = 1\n" * 2000)
+
+    def discover():
+        for name in ("a.py", "large.py", "b.py", "c.py"):
+            yield tmp_path / name, {"priority": "medium"}
+
+    packs = []
+    processed = {}
+
+    def fake_generate_pack(pack, _options):
+        packs.append([f.name for f, _info in pack.items])
+        return {"a.py": "def test_a():\n    pass\n", "b.py": "def test_b():\n    pass\n"}
+
+    def fake_process(source_file, info, _options, **_kwargs):
+        processed[source_file.name] = info.get("packed_tests")
+
+    with patch("cli.pipeline.generate_pack", side_effect=fake_generate_pack), patch(
+        "cli.pipeline.process_file", side_effect=fake_process
+    ):
+        discovered = asyncio.run(run_pipeline(discover, options, max_workers=2))
+
+    assert discovered == 4
+    assert packs == [["a.py", "b.py", "c.py"]]
+    assert processed == {
+        "a.py": "def test_a():\n    pass\n",
+        "b.py": "def test_b():\n    pass\n",
+        "c.py": None,
+        "large.py": None,
+    }
+
+
+def test_run_pipeline_keeps_every_worker_for_the_last_pack(tmp_path):
+    options = RunOptions(
+        project=str(tmp_path), test_type="unit", framework="pytest", pack_tokens=2000
+    )
+    names = ["a.py", "b.py", "c.py"]
+    for name in names:
+        (tmp_path / name).write_text("def f():\n    return 1\n")
+
+    def discover():
+        for name in names:
+            yield tmp_path / name, {"priority": "medium"}
+
+    def slow_generate_pack(pack, _options):
+        # The other workers reach the end of the queue while the pack is generated
+        time.sleep(0.2)
+        return {}
+
+    running = []
+
+    def fake_process(source_file, _info, _options, **_kwargs):
+        running.append(source_file.name)
+        time.sleep(0.1)
+
+    with patch("cli.pipeline.generate_pack", side_effect=slow_generate_pack), patch(
+        "cli.pipeline.process_file", side_effect=fake_process
+    ):
+        started = time.monotonic()
+        asyncio.run(run_pipeline(discover, options, max_workers=3))
+        elapsed = time.monotonic() - started
+
+    assert sorted(running) == names
+    # Run side by side, not one after another on the last worker
+    assert elapsed < 0.2 + 3 * 0.1
+
+
+def test_process_file_continues_packed_tests_from_validation(tmp_path):
+    options = RunOptions(project=str(tmp_path), test_type="unit", framework="pytest")
+    (tmp_path / "a.py").write_text("def f():\n    return 1\n")
+    states = []
+
+    def fake_stream(state, _config):
+        states.append(state)
+        yield {"notify": state.copy(update={"status": "completed"}).model_dump()}
+
+    with patch("cli.pipeline.build_workflow") as mock_build:
+        mock_build.return_value.stream.side_effect = fake_stream
+        process_file(tmp_path / "a.py", {"packed_tests": "def test_f():\n    pass\n"}, options)
+
+    mock_build.assert_called_with("validate")
+    assert states[0].generated_tests == "def test_f():\n    pass\n"
+    assert not states[0].approved
+
+
+def test_run_pipeline_journals_and_resumes(tmp_path):
+    options = RunOptions(project=str(tmp_path), test_type="unit", framework="pytest")
+    journal = RunJournal("run", str(tmp_path / "runs"))
+
+    def discover():
+        return iter([(tmp_path / "a.py", {"priority": "high"}), (tmp_path / "b.py", {})])
+
+    def interrupted(source_file, info, _options, on_step=None, checkpoint=None):
+        state = SimpleNamespace(
+            status="saved",
+            input_code="x",
+            generated_tests="y",
+            test_results=None,
+            model_dump=lambda mode: {"status": "saved"},
+        )
+        on_step("save", state)
+        if source_file.name == "b.py":
+            raise KeyboardInterrupt
+        return SimpleNamespace(status="completed", stop_reason="passed", retry_count=0)
+
+    with patch("cli.pipeline.process_file", side_effect=interrupted):
+        with pytest.raises(KeyboardInterrupt):
+            asyncio.run(run_pipeline(discover, options, 1, journal=journal))
+
+    resumed = RunJournal.load("run", str(tmp_path / "runs"))
+    assert resumed.discovery_complete
+    assert resumed.finished == {"a.py": "completed"}
+    assert resumed.pending() == [("b.py", {})]
+
+    calls = []
+
+    def continued(source_file, info, _options, on_step=None, checkpoint=None):
+        calls.append((source_file.name, checkpoint))
+        return SimpleNamespace(status="completed", stop_reason="passed", retry_count=0)
+
+    pending = [(tmp_path / f, info) for f, info in resumed.pending()]
+    with patch("cli.pipeline.process_file", side_effect=continued):
+        asyncio.run(
+            run_pipeline(lambda: iter(pending), options, 1, journal=journal, resume=resumed)
+        )
+
+    assert calls == [("b.py", ("save", {"status": "saved"}))]
+    assert RunJournal.load("run", str(tmp_path / "runs")).pending() == []
+
+
+def test_resumed_dedupe_run_generates_each_copy_once(tmp_path):
+    options = RunOptions(project=str(tmp_path), test_type="unit", framework="pytest")
+    names = ("a.py", "copy_a.py", "b.py", "copy_b.py")
+    for name in names:
+        (tmp_path / name).write_text(f"def {name[-4]}():\n    return 1\n")
+    candidates = [tmp_path / n for n in names]
+    accepted = {"should_test": True, "test_type": "unit", "priority": "low"}
+    journal = RunJournal("run", str(tmp_path / "runs"))
+
+    def discover(files, pending=()):
+        def grouped(source_file, duplicate):
+            journal.grouped(str(source_file.relative_to(tmp_path)), duplicate)
+
+        yield from pending
+        yield from classify_groups(files, "unit", str(tmp_path), on_grouped=grouped)
+        discovered.set()
+
+    # The run is interrupted while a.py is generated, after discovery grouped every copy
+    discovered, in_flight, release = threading.Event(), threading.Event(), threading.Event()
+
+    def held(source_file, _info, _options, **_kwargs):
+        assert discovered.wait(10)
+        in_flight.set()
+        release.wait(10)
+
+    async def interrupted():
+        task = asyncio.create_task(
+            run_pipeline(lambda: discover(candidates), options, 1, journal=journal)
+        )
+        assert await asyncio.to_thread(in_flight.wait, 10)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        release.set()
+
+    with patch("common.utils.classify_file", return_value=accepted), patch(
+        "cli.pipeline.process_file", side_effect=held
+    ):
+        asyncio.run(interrupted())
+
+    resumed = RunJournal.load("run", str(tmp_path / "runs"))
+    assert resumed.known_files() == set(names)
+    remaining = [f for f in candidates if f.name not in resumed.known_files()]
+    pending = [(tmp_path / f, info) for f, info in resumed.pending()]
+    processed = []
+
+    def fake_process(source_file, info, _options, **_kwargs):
+        processed.append(source_file.name)
+        return SimpleNamespace(status="failed", stop_reason="max_retries", retry_count=3)
+
+    with patch("common.utils.classify_file", return_value=accepted), patch(
+        "cli.pipeline.process_file", side_effect=fake_process
+    ):
+        asyncio.run(
+            run_pipeline(
+                lambda: discover(remaining, pending), options, 2, journal=journal, resume=resumed
+            )
+        )
+
+    assert remaining == []
+    assert sorted(processed) == ["a.py", "b.py", "copy_a.py", "copy_b.py"]
+
+
+def test_process_file_continues_from_checkpoint(tmp_path):
+    options = RunOptions(project=str(tmp_path), test_type="unit", framework="pytest")
+    saved = GraphState(
+        input_code="def f():\n    return 1\n",
+        file_path="a.py",
+        test_type="unit",
+        framework="pytest",
+        project_root=str(tmp_path),
+        output_project_root=str(tmp_path),
+        output_path=str(tmp_path / "test_a.py"),
+        status="failed",
+        test_results="E   assert 1 == 2",
+    )
+
+    with patch("cli.pipeline.build_workflow") as mock_build:
+        mock_build.return_value.stream.return_value = iter(
+            [{"repair": saved.model_dump()}, {"notify": saved.model_dump()}]
+        )
+        process_file(tmp_path / "a.py", {}, options, checkpoint=("run", saved.model_dump()))
+
+        mock_build.assert_called_once_with("repair")
+        mock_build.reset_mock()
+        done = saved.model_copy(update={"status": "completed"})
+        final = process_file(
+            tmp_path / "a.py", {}, options, checkpoint=("notify", done.model_dump())
+        )
+
+    mock_build.assert_not_called()
+    assert final.status == "completed"
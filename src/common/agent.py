@@ -5,6 +5,7 @@ import click
 from dotenv import load_dotenv
 
 from common.llm import get_llm
+from common.skeleton import summarize
 
 load_dotenv()
 
@@ -19,15 +20,15 @@ def should_test_file(file_path: str, file_contents: str) -> bool:
         click.echo(f"[AutoQA] [Agent]: Skipping empty file {file_path}")
         return False
 
-    if len(file_contents) > 5000:
-        file_contents = file_contents[:5000]
+    summary = summarize(file_path, file_contents)
+    label = "Contents" if summary == file_contents else "Outline (bodies omitted)"
 
     prompt = (
         "You are an AI code reviewer. "
         "Given this file, decide if it should have tests generated.\n\n"
         f"File: {file_path}\n\n"
-        "Contents:\n"
-        f"{file_contents}\n\n"
+        f"{label}:\n"
+        f"{summary}\n\n"
         "Respond only with 'yes' or 'no'."
     )
     response = llm.invoke(prompt)
@@ -43,8 +44,8 @@ def classify_file(file_path: str, file_contents: str) -> dict:
         click.echo(f"[AutoQA] [Agent]: Skipping empty file {file_path}")
         return {"should_test": False, "test_type": None, "priority": None}
 
-    if len(file_contents) > 5000:
-        file_contents = file_contents[:5000]
+    summary = summarize(file_path, file_contents)
+    label = "Contents" if summary == file_contents else "Outline (bodies omitted)"
 
     prompt = (
         "You are an AI code reviewer. "
@@ -59,8 +60,8 @@ def classify_file(file_path: str, file_contents: str) -> dict:
         '  "priority": "high"\n'
         "}\n\n"
         f"File: {file_path}\n\n"
-        "Contents:\n"
-        f"{file_contents}\n"
+        f"{label}:\n"
+        f"{summary}\n"
     )
 
     response = llm.invoke(prompt)
@@ -0,0 +1,302 @@
+import ast
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from pydantic import BaseModel
+
+JS_SETUP = re.compile(r"^\s*(beforeAll|beforeEach|afterAll|afterEach|jest\.mock)\s*\(")
+JS_TOP_LEVEL = re.compile(r"^(import\s|export\s|const\s|let\s|var\s|function\s|async\s+function\s)")
+
+
+class CoverageResult(BaseModel):
+    """
+    Line coverage of one source file under its existing tests.
+    """
+
+    passed: bool
+    output: str
+    percent: float = 0.0
+    uncovered_lines: List[int] = []
+    # (start, end, name) of functions as reported by the coverage tool; empty for
+    # coverage.py, where uncovered_regions() finds them with ast instead
+    functions: List[Tuple[int, int, str]] = []
+
+
+class Region(BaseModel):
+    start: int
+    end: int
+    name: str
+    uncovered_lines: List[int]
+
+
+def measure_coverage(
+    source_file: Path, test_file: Path, project_root: str, framework: str
+) -> CoverageResult:
+    """
+    Runs test_file under coverage.py (pytest) or Istanbul (jest) and returns
+    which lines and branches of source_file it does not reach.
+    """
+    env = os.environ.copy()
+    env["CI"] = "1"
+    source = Path(source_file).resolve()
+    with tempfile.TemporaryDirectory() as tmp:
+        if framework == "pytest":
+            data_file = Path(tmp) / ".coverage"
+            report_path = Path(tmp) / "coverage.json"
+            commands = [
+                [
+                    sys.executable,
+                    "-m",
+                    "coverage",
+                    "run",
+                    "--branch",
+                    f"--data-file={data_file}",
+                    f"--include={source}",
+                    "-m",
+                    "pytest",
+                    "-q",
+                    str(Path(test_file).resolve()),
+                ],
+                [
+                    sys.executable,
+                    "-m",
+                    "coverage",
+                    "json",
+                    "-q",
+                    f"--data-file={data_file}",
+                    "-o",
+                    str(report_path),
+                ],
+            ]
+        elif framework == "jest":
+            report_path = Path(tmp) / "coverage-final.json"
+            commands = [
+                [
+                    "npx",
+                    "--yes",
+                    "jest",
+                    "--coverage",
+                    "--coverageReporters=json",
+                    f"--coverageDirectory={tmp}",
+                    f"--collectCoverageFrom={os.path.relpath(source, project_root)}",
+                    str(Path(test_file).resolve()),
+                ]
+            ]
+        else:
+            raise ValueError(
+                f"Coverage-guided augmentation supports pytest and jest, not {framework}"
+            )
+
+        results = [
+            subprocess.run(
+                command, capture_output=True, text=True, cwd=project_root, timeout=600, env=env
+            )
+            for command in commands
+        ]
+        output = results[0].stdout + "\n" + results[0].stderr
+        if not report_path.exists():
+            if framework == "pytest":
+                hint = f"is coverage.py installed for {sys.executable}?"
+            else:
+                hint = "is jest installed in the project?"
+            raise RuntimeError(
+                f"No coverage report produced ({hint}):" f"\n{output}\n{results[-1].stderr}"
+            )
+        report = json.loads(report_path.read_text())
+
+    passed = results[0].returncode == 0
+    if framework == "pytest":
+        return parse_coverage_py(report, source, project_root, passed, output)
+    return parse_istanbul(report, source, passed, output)
+
+
+def parse_coverage_py(
+    report: dict, source: Path, project_root: str, passed: bool, output: str
+) -> CoverageResult:
+    """
+    Reads a `coverage json` report; partially covered branch lines count as uncovered.
+    """
+    for name, data in report.get("files", {}).items():
+        if (Path(project_root) / name).resolve() != source:
+            continue
+        uncovered = set(data.get("missing_lines", []))
+        uncovered.update(start for start, _end in data.get("missing_branches", []))
+        return CoverageResult(
+            passed=passed,
+            output=output,
+            percent=data["summary"]["percent_covered"],
+            uncovered_lines=sorted(uncovered),
+        )
+    raise ValueError(f"{source} is never executed by the tests:\n{output}")
+
+
+def parse_istanbul(report: dict, source: Path, passed: bool, output: str) -> CoverageResult:
+    """
+    Reads an Istanbul coverage-final.json report (as written by jest).
+    """
+    data = next((d for name, d in report.items() if Path(name).resolve() == source), None)
+    if data is None:
+        raise ValueError(f"{source} is never executed by the tests:\n{output}")
+
+    uncovered = set()
+    for key, count in data["s"].items():
+        if not count:
+            loc = data["statementMap"][key]
+            uncovered.update(range(loc["start"]["line"], loc["end"]["line"] + 1))
+    for key, counts in data["b"].items():
+        branch = data["branchMap"][key]
+        for location, count in zip(branch["locations"], counts):
+            if not count:
+                uncovered.add(
+                    location.get("start", {}).get("line") or branch["loc"]["start"]["line"]
+                )
+
+    functions = [
+        (fn["loc"]["start"]["line"], fn["loc"]["end"]["line"], fn["name"])
+        for fn in data["fnMap"].values()
+    ]
+    statements = len(data["s"]) or 1
+    covered = sum(1 for count in data["s"].values() if count)
+    return CoverageResult(
+        passed=passed,
+        output=output,
+        percent=100.0 * covered / statements,
+        uncovered_lines=sorted(uncovered),
+        functions=functions,
+    )
+
+
+def python_functions(code: str) -> List[Tuple[int, int, str]]:
+    """
+    Returns (start, end, qualified name) of every function and method, decorators included.
+    """
+    functions = []
+
+    def visit(node, prefix: str):
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                name = f"{prefix}{child.name}"
+                if not isinstance(child, ast.ClassDef):
+                    start = min([d.lineno for d in child.decorator_list] + [child.lineno])
+                    functions.append((start, child.end_lineno, name))
+                visit(child, f"{name}.")
+
+    visit(ast.parse(code), "")
+    return functions
+
+
+def uncovered_regions(code: str, coverage: CoverageResult, framework: str) -> List[Region]:
+    """
+    Groups uncovered lines by the innermost function containing them. Lines
+    outside any function form one region per contiguous block.
+    """
+    functions = coverage.functions or (python_functions(code) if framework == "pytest" else [])
+    regions: Dict[Tuple[int, int, str], List[int]] = {}
+    loose: List[int] = []
+    for line in coverage.uncovered_lines:
+        containing = [f for f in functions if f[0] <= line <= f[1]]
+        if containing:
+            innermost = min(containing, key=lambda f: f[1] - f[0])
+            regions.setdefault(innermost, []).append(line)
+        else:
+            loose.append(line)
+
+    result = [
+        Region(start=s, end=e, name=n, uncovered_lines=lines)
+        for (s, e, n), lines in regions.items()
+    ]
+    for line in loose:
+        if result and result[-1].name == "module" and result[-1].end == line - 1:
+            result[-1].end = line
+            result[-1].uncovered_lines.append(line)
+        else:
+            result.append(Region(start=line, end=line, name="module", uncovered_lines=[line]))
+    return sorted(result, key=lambda r: r.start)
+
+
+def _line_ranges(lines: List[int]) -> str:
+    ranges = []
+    for line in lines:
+        if ranges and ranges[-1][1] == line - 1:
+            ranges[-1][1] = line
+        else:
+            ranges.append([line, line])
+    return ", ".join(str(a) if a == b else f"{a}-{b}" for a, b in ranges)
+
+
+def render_regions(code: str, regions: List[Region]) -> str:
+    """
+    Formats the uncovered regions with their line numbers for the prompt.
+    """
+    lines = code.splitlines()
+    blocks = []
+    for region in regions:
+        body = "\n".join(
+            f"{number:>5}: {lines[number - 1]}" for number in range(region.start, region.end + 1)
+        )
+        blocks.append(
+            f"{region.name} (lines {region.start}-{region.end}, not covered: "
+            f"{_line_ranges(region.uncovered_lines)})\n{body}"
+        )
+    return "\n\n".join(blocks)
+
+
+def fixture_context(test_code: str, framework: str) -> str:
+    """
+    Returns the parts of an existing test file new tests can build on: imports,
+    module-level setup, fixtures and helpers, without the test bodies.
+    """
+    if framework == "pytest":
+        return _pytest_context(test_code)
+    return _jest_context(test_code)
+
+
+def _pytest_context(test_code: str) -> str:
+    try:
+        tree = ast.parse(test_code)
+    except SyntaxError:
+        return ""
+    lines = test_code.splitlines()
+    keep = []
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name.startswith(
+            "test"
+        ):
+            continue
+        if isinstance(node, ast.ClassDef) and node.name.startswith("Test"):
+            continue
+        if isinstance(node, ast.Expr) and isinstance(getattr(node, "value", None), ast.Constant):
+            continue
+        decorators = getattr(node, "decorator_list", [])
+        start = min([d.lineno for d in decorators] + [node.lineno])
+        keep.append("\n".join(lines[start - 1 : node.end_lineno]))
+    return "\n\n".join(keep)
+
+
+def _jest_context(test_code: str) -> str:
+    keep = []
+    depth = 0
+    capturing = False
+    for line in test_code.splitlines():
+        if not capturing and (JS_SETUP.match(line) or (depth == 0 and JS_TOP_LEVEL.match(line))):
+            capturing = True
+            start_depth = depth
+        if capturing:
+            keep.append(line)
+        depth += line.count("{") + line.count("(") - line.count("}") - line.count(")")
+        if capturing and depth <= start_depth:
+            capturing = False
+    return "\n".join(keep)
+
+
+def append_tests(test_code: str, new_tests: str) -> str:
+    """
+    Appends generated tests to an existing test file.
+    """
+    return f"{test_code.rstrip()}\n\n\n{new_tests.strip()}\n"
@@ -0,0 +1,125 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+BLOB_PREFIX = "blob:sha256:"
+
+
+class BlobStore:
+    """
+    Content-addressed store for large text payloads.
+
+    Workflow state keeps a short ``blob:sha256:<hash>`` reference instead of the
+    text itself. Blobs live in memory up to max_memory_bytes, after which the
+    least recently used ones are spilled to spill_dir. Values shorter than
+    inline_threshold are never stored and stay inline in the state.
+    """
+
+    def __init__(
+        self,
+        spill_dir: str = ".autoqa/blobs",
+        max_memory_bytes: int = 64 * 1024 * 1024,
+        inline_threshold: int = 1024,
+    ):
+        self.spill_dir = Path(spill_dir)
+        self.max_memory_bytes = max_memory_bytes
+        self.inline_threshold = inline_threshold
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def is_ref(value) -> bool:
+        return isinstance(value, str) and value.startswith(BLOB_PREFIX)
+
+    def _path(self, digest: str) -> Path:
+        return self.spill_dir / digest[:2] / digest[2:]
+
+    def _write(self, digest: str, text: str):
+        path = self._path(digest)
+        if path.exists():
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, path)
+
+    def put(self, text: str) -> str:
+        """
+        Stores text and returns its reference. Storing the same text twice is free.
+        """
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        with self._lock:
+            if digest in self._memory:
+                self._memory.move_to_end(digest)
+            elif not self._path(digest).exists():
+                self._memory[digest] = text
+                self._memory_bytes += len(text)
+                self._evict()
+        return BLOB_PREFIX + digest
+
+    def _evict(self):
+        while self._memory_bytes > self.max_memory_bytes and len(self._memory) > 1:
+            digest, text = self._memory.popitem(last=False)
+            self._memory_bytes -= len(text)
+            self._write(digest, text)
+
+    def get(self, ref: str) -> str:
+        digest = ref[len(BLOB_PREFIX) :]
+        with self._lock:
+            if digest in self._memory:
+                self._memory.move_to_end(digest)
+                return self._memory[digest]
+        path = self._path(digest)
+        if not path.exists():
+            raise KeyError(f"Blob not found: {ref}")
+        return path.read_text(encoding="utf-8")
+
+    def externalize(self, text: Optional[str]) -> Optional[str]:
+        """
+        Returns a reference for large text, or the text itself when it is small.
+        """
+        if text is None or self.is_ref(text) or len(text) < self.inline_threshold:
+            return text
+        return self.put(text)
+
+    def resolve(self, value: Optional[str]) -> Optional[str]:
+        """
+        Returns the text behind a reference; other values are returned as is.
+        """
+        return self.get(value) if self.is_ref(value) else value
+
+    def persist(self, *values: Optional[str]):
+        """
+        Writes referenced blobs to disk so a saved state can be loaded by a
+        later process (for example `auto resume`).
+        """
+        for value in values:
+            if self.is_ref(value):
+                digest = value[len(BLOB_PREFIX) :]
+                with self._lock:
+                    text = self._memory.get(digest)
+                if text is not None:
+                    self._write(digest, text)
+
+    def delete(self, *refs: str):
+        """
+        Removes blobs from memory and disk, e.g. once no run journal needs them.
+        """
+        for ref in refs:
+            digest = ref[len(BLOB_PREFIX) :]
+            with self._lock:
+                text = self._memory.pop(digest, None)
+                if text is not None:
+                    self._memory_bytes -= len(text)
+            self._path(digest).unlink(missing_ok=True)
+
+
+# Shared by every workflow in the process
+blobs = BlobStore(
+    spill_dir=os.environ.get("AUTOQA_BLOB_DIR", ".autoqa/blobs"),
+    max_memory_bytes=int(os.environ.get("AUTOQA_BLOB_MEMORY_MB", "64")) * 1024 * 1024,
+)
@@ -0,0 +1,83 @@
+import threading
+import time
+from typing import Any, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+PRIORITY_RANK = {"high": 0, "medium": 1, "low": 2}
+
+# Share of the run budget after which new work of each priority is no longer started
+PRIORITY_CUTOFFS = {"high": 1.0, "medium": 0.9, "low": 0.8}
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token estimate used when a provider does not report usage.
+    """
+    return max(1, len(text) // 4)
+
+
+class UsageTracker(BaseCallbackHandler):
+    """
+    LangChain callback that totals token usage over every LLM call in the process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.total_tokens = 0
+        self.calls = 0
+
+    def on_llm_end(self, response: Any, **kwargs: Any) -> None:
+        tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                reported = getattr(message, "usage_metadata", None)
+                if reported:
+                    tokens += reported.get("total_tokens", 0)
+                else:
+                    tokens += estimate_tokens(generation.text or "")
+        with self._lock:
+            self.total_tokens += tokens
+            self.calls += 1
+
+
+# Attached to every model returned by get_llm
+usage = UsageTracker()
+
+
+class RunBudget:
+    """
+    Time and token budget for a whole run.
+
+    allows() stops admitting low-priority work first as the budget is spent
+    (see PRIORITY_CUTOFFS); work that was already started is never interrupted.
+    """
+
+    def __init__(self, time_budget: Optional[float] = None, token_budget: Optional[int] = None):
+        self.time_budget = time_budget
+        self.token_budget = token_budget
+        self.started_at = time.monotonic()
+        self._start_tokens = usage.total_tokens
+
+    @property
+    def tokens_used(self) -> int:
+        return usage.total_tokens - self._start_tokens
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    def fraction_spent(self) -> float:
+        spent = 0.0
+        if self.time_budget:
+            spent = max(spent, self.elapsed / self.time_budget)
+        if self.token_budget:
+            spent = max(spent, self.tokens_used / self.token_budget)
+        return spent
+
+    def exhausted(self) -> bool:
+        return self.fraction_spent() >= 1.0
+
+    def allows(self, priority: Optional[str]) -> bool:
+        return self.fraction_spent() < PRIORITY_CUTOFFS.get(priority, PRIORITY_CUTOFFS["medium"])
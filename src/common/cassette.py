@@ -0,0 +1,123 @@
+import gzip
+import hashlib
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import PrivateAttr
+
+from common.llm import message_text
+
+# Shared by every instance: agent and prompt chains may record to the same file
+_write_lock = threading.Lock()
+
+
+def prompt_key(messages: List[BaseMessage]) -> str:
+    """
+    Stable hash of a prompt, used to look responses up in a cassette. Cache
+    breakpoints are ignored so recordings replay with any provider.
+    """
+    payload = json.dumps(
+        [[m.type, message_text(m.content)] for m in messages], separators=(",", ":")
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _open(path: Path, mode: str):
+    if path.suffix == ".gz":
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def load_cassette(path: str) -> Dict[str, List[dict]]:
+    """
+    Reads a cassette into {prompt key: [entries in recorded order]}.
+    """
+    entries: Dict[str, List[dict]] = {}
+    with _open(Path(path), "r") as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                entries.setdefault(entry["key"], []).append(entry)
+    return entries
+
+
+class CassetteChatModel(BaseChatModel):
+    """
+    Records LLM responses to a cassette file, or replays them offline.
+
+    A cassette is JSON lines (gzip-compressed when the path ends in ``.gz``), one
+    entry per call with the prompt hash, response, usage and latency. When the
+    same prompt was recorded several times, replay serves the responses in
+    order and then keeps returning the last one.
+    """
+
+    path: str
+    mode: str = "replay"
+    inner: Optional[BaseChatModel] = None
+    replay_timing: bool = False
+
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _entries: Dict[str, List[dict]] = PrivateAttr(default_factory=dict)
+    _cursors: Dict[str, int] = PrivateAttr(default_factory=dict)
+
+    def model_post_init(self, __context: Any) -> None:
+        if self.mode == "replay":
+            self._entries = load_cassette(self.path)
+        elif self.mode == "record":
+            if self.inner is None:
+                raise ValueError("Record mode requires a provider to record from.")
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        else:
+            raise ValueError(f"Unsupported cassette mode: {self.mode}")
+
+    @property
+    def _llm_type(self) -> str:
+        return "autoqa-cassette"
+
+    def _replay(self, key: str) -> dict:
+        with self._lock:
+            recorded = self._entries.get(key)
+            if not recorded:
+                raise ValueError(f"No recorded response for prompt {key[:12]} in {self.path}")
+            index = self._cursors.get(key, 0)
+            self._cursors[key] = index + 1
+        return recorded[min(index, len(recorded) - 1)]
+
+    def _record(self, key: str, messages: List[BaseMessage], **kwargs: Any) -> dict:
+        start = time.perf_counter()
+        response = self.inner.invoke(messages, **kwargs)
+        entry = {
+            "key": key,
+            "content": response.content,
+            "usage": getattr(response, "usage_metadata", None),
+            "latency": round(time.perf_counter() - start, 4),
+        }
+        with _write_lock:
+            # Append per call so a crashed run keeps everything recorded so far
+            with _open(Path(self.path), "a") as f:
+                f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        return entry
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        key = prompt_key(messages)
+        if self.mode == "record":
+            entry = self._record(key, messages, **kwargs)
+        else:
+            entry = self._replay(key)
+            if self.replay_timing:
+                time.sleep(entry.get("latency") or 0)
+
+        message = AIMessage(content=entry["content"], usage_metadata=entry.get("usage"))
+        return ChatResult(generations=[ChatGeneration(message=message)])
@@ -0,0 +1,150 @@
+import ast
+import hashlib
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+from common.ingest import sources
+
+JS_EXTENSIONS = (".js", ".jsx", ".ts", ".tsx")
+
+JS_COMMENTS = re.compile(r"/\*.*?\*/|(?<![:'\"\\])//[^\n]*", re.DOTALL)
+
+JS_SPECIFIER = re.compile(
+    r"""((?:from\s+|require\(\s*|import\(\s*|jest\.mock\(\s*)(['"]))(\.{1,2}/[^'"]+)(\2)"""
+)
+
+
+def normalized_hash(path: Path) -> str:
+    """
+    Hashes a file so that copies differing only in comments, blank lines or
+    indentation collide. Python files are compared by syntax tree. Skipped
+    and summarized files only collide with exact copies.
+    """
+    source = sources.read(path)
+    if source.skip_reason or source.summarized:
+        return f"exact:{source.sha256}"
+    text = source.text
+    normalized = None
+    if path.suffix == ".py":
+        try:
+            normalized = ast.dump(ast.parse(text))
+        except SyntaxError:
+            pass
+    elif path.suffix in JS_EXTENSIONS:
+        text = JS_COMMENTS.sub("", text)
+    if normalized is None:
+        normalized = "\n".join(line.strip() for line in text.splitlines() if line.strip())
+    return hashlib.sha256(f"{path.suffix}\0{normalized}".encode("utf-8")).hexdigest()
+
+
+def duplicate_key(path: Path) -> str:
+    """
+    Returns the key files are grouped by: their normalized hash, or a key of
+    their own for files that cannot be read.
+    """
+    try:
+        return normalized_hash(path)
+    except OSError:
+        # Unreadable files are passed on alone and fail later with a proper error
+        return f"unreadable:{path}"
+
+
+def group_duplicates(files: Iterable[Path]) -> Dict[Path, List[Path]]:
+    """
+    Groups files by normalized content. Returns {representative: [duplicates]}
+    with the first file seen of each group as its representative, in walk order.
+    """
+    groups: Dict[str, List[Path]] = {}
+    for path in files:
+        groups.setdefault(duplicate_key(path), []).append(path)
+    return {members[0]: members[1:] for members in groups.values()}
+
+
+def _module_parts(path: Path, root: Path) -> List[str]:
+    parts = list(path.relative_to(root).with_suffix("").parts)
+    return parts[:-1] if parts and parts[-1] == "__init__" else parts
+
+
+def _rewrite_python(
+    test_code: str, project_root: Path, template_source: Path, member_source: Path
+) -> str:
+    old_parts = _module_parts(template_source, project_root)
+    new_parts = _module_parts(member_source, project_root)
+    # Tests may import the module by any trailing part of its dotted path
+    # (e.g. without a src. prefix), so rewrite the longest one that is used
+    for n in range(min(len(old_parts), len(new_parts)), 0, -1):
+        old, new = ".".join(old_parts[-n:]), ".".join(new_parts[-n:])
+        if old == new:
+            break
+        pattern = re.compile(rf"(?<![\w.]){re.escape(old)}(?!\w)")
+        if n > 1:
+            rewritten = pattern.sub(new, test_code)
+        else:
+            # A bare module name is only rewritten where it is imported
+            rewritten = re.sub(
+                r"^\s*(from|import)\s.*$",
+                lambda m: pattern.sub(new, m.group(0)),
+                test_code,
+                flags=re.MULTILINE,
+            )
+        if rewritten != test_code:
+            return rewritten
+    return test_code
+
+
+def _rewrite_js(
+    test_code: str,
+    template_source: Path,
+    template_test: Path,
+    member_source: Path,
+    member_test: Path,
+) -> str:
+    def replace(match):
+        specifier = match.group(3)
+        target = Path(os.path.normpath(template_test.parent / specifier))
+        has_extension = target.suffix in JS_EXTENSIONS
+        if target in (template_source, template_source.with_suffix("")):
+            mapped = member_source if has_extension else member_source.with_suffix("")
+        elif template_source.parent in target.parents:
+            # Siblings of a vendored copy are taken from the member's own copy
+            mapped = member_source.parent / target.relative_to(template_source.parent)
+        else:
+            mapped = target
+        new = os.path.relpath(mapped, member_test.parent).replace(os.sep, "/")
+        if not new.startswith("."):
+            new = f"./{new}"
+        return f"{match.group(1)}{new}{match.group(4)}"
+
+    return JS_SPECIFIER.sub(replace, test_code)
+
+
+def rewrite_test_imports(
+    test_code: str,
+    project_root: str,
+    template_source: str,
+    template_test: str,
+    member_source: str,
+    member_test: str,
+) -> str:
+    """
+    Adapts a test written for template_source (saved at template_test) to a
+    duplicate at member_source whose test is written to member_test.
+    """
+    root = Path(os.path.abspath(project_root))
+    template_source_path, template_test_path, member_source_path, member_test_path = (
+        Path(os.path.abspath(p))
+        for p in (template_source, template_test, member_source, member_test)
+    )
+    if member_source_path.suffix == ".py":
+        return _rewrite_python(test_code, root, template_source_path, member_source_path)
+    if member_source_path.suffix in JS_EXTENSIONS:
+        return _rewrite_js(
+            test_code,
+            template_source_path,
+            template_test_path,
+            member_source_path,
+            member_test_path,
+        )
+    return test_code
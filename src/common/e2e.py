@@ -0,0 +1,394 @@
+import atexit
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import xml.etree.ElementTree as ET
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import click
+
+
+class E2ESessionError(RuntimeError):
+    pass
+
+
+def wait_until_healthy(
+    url: str,
+    timeout: float,
+    process: Optional[subprocess.Popen] = None,
+    interval: float = 0.5,
+):
+    """
+    Polls url until it answers without a server error, or raises
+    E2ESessionError when timeout passes or process exits first.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with urllib.request.urlopen(url, timeout=5):
+                return
+        except urllib.error.HTTPError as e:
+            if e.code < 500:
+                return
+        except (urllib.error.URLError, OSError):
+            pass
+        if process is not None and process.poll() is not None:
+            raise E2ESessionError(f"App server exited with code {process.returncode}")
+        if time.monotonic() >= deadline:
+            raise E2ESessionError(f"App server did not answer at {url} within {timeout:.0f}s")
+        time.sleep(interval)
+
+
+class AppServer:
+    """
+    The app under test, started with a shell command in project_root and
+    stopped together with the processes it spawned.
+    """
+
+    def __init__(self, command: str, url: str, project_root: str, startup_timeout: float = 120.0):
+        env = os.environ.copy()
+        env["CI"] = "1"
+        self._log = tempfile.TemporaryFile()
+        self.process = subprocess.Popen(
+            command,
+            shell=True,
+            cwd=project_root,
+            stdout=self._log,
+            stderr=subprocess.STDOUT,
+            env=env,
+            start_new_session=True,
+        )
+        try:
+            wait_until_healthy(url, startup_timeout, self.process)
+        except E2ESessionError as e:
+            self.stop()
+            raise E2ESessionError(f"{e}:\n{self._log_tail()}")
+
+    def _log_tail(self) -> str:
+        self._log.seek(0)
+        return self._log.read().decode("utf-8", errors="replace")[-2000:]
+
+    @property
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def _signal(self, sig):
+        try:
+            # Dev servers usually run behind npm/npx, so stop the whole group
+            os.killpg(self.process.pid, sig)
+        except (AttributeError, ProcessLookupError):
+            self.process.send_signal(sig)
+
+    def stop(self):
+        if not self.alive:
+            return
+        self._signal(signal.SIGTERM)
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self._signal(signal.SIGKILL)
+            self.process.wait()
+
+
+def parse_spec_results(reports: List[str], project_root: str) -> Dict[str, Tuple[int, List[str]]]:
+    """
+    Reads junit-xml reports into {resolved spec path: (test count, failures)}.
+    Cypress writes one report per spec with the spec on its root suite; pytest
+    writes one report per run with the file on each test case.
+    """
+    root = Path(project_root).resolve()
+    counts: Dict[str, int] = {}
+    failures: Dict[str, List[str]] = {}
+    for text in reports:
+        try:
+            document = ET.fromstring(text)
+        except ET.ParseError:
+            continue
+        document_spec = next(
+            (suite.get("file") for suite in document.iter("testsuite") if suite.get("file")), None
+        )
+        for case in document.iter("testcase"):
+            spec = case.get("file") or document_spec
+            if not spec:
+                spec = case.get("classname", "").replace(".", "/") + ".py"
+            key = str((root / spec).resolve())
+            counts[key] = counts.get(key, 0) + 1
+            messages = failures.setdefault(key, [])
+            for problem in case:
+                if problem.tag in ("failure", "error"):
+                    name = f"{case.get('classname')}::{case.get('name')}".lstrip(":")
+                    messages.append(f"{name}: {problem.get('message', '')}\n{problem.text or ''}")
+    return {key: (counts[key], failures[key]) for key in counts}
+
+
+def run_specs(
+    project_root: str,
+    framework: str,
+    specs: List[str],
+    base_url: Optional[str] = None,
+    timeout: float = 300.0,
+    cancelled: Optional[threading.Event] = None,
+) -> Dict[str, Tuple[int, str]]:
+    """
+    Runs specs (absolute paths) in one Cypress or Playwright session and returns
+    {spec: (exit code, output)} with each spec's own results. Once cancelled is
+    set, the session is killed and RuntimeError is raised.
+    """
+    env = os.environ.copy()
+    env["CI"] = "1"
+    with tempfile.TemporaryDirectory() as tmp:
+        if framework == "cypress":
+            command = [
+                "npx",
+                "cypress",
+                "run",
+                "--spec",
+                ",".join(specs),
+                "--reporter",
+                "junit",
+                "--reporter-options",
+                f"mochaFile={Path(tmp) / 'spec-[hash].xml'}",
+            ]
+            if base_url:
+                env["CYPRESS_BASE_URL"] = base_url
+        elif framework == "playwright":
+            command = [
+                str(Path(sys.executable).parent / "pytest"),
+                "-o",
+                "junit_family=xunit1",
+                f"--junitxml={Path(tmp) / 'results.xml'}",
+                # One spec that fails to import must not stop the others
+                "--continue-on-collection-errors",
+                *(["--base-url", base_url] if base_url else []),
+                *specs,
+            ]
+        else:
+            raise ValueError(f"Unsupported e2e framework: {framework}")
+
+        click.echo(f"[AutoQA] [E2E]: Running {len(specs)} specs in one {framework} session.")
+        deadline = time.monotonic() + timeout
+        with subprocess.Popen(
+            command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            cwd=project_root,
+            env=env,
+        ) as process:
+            while True:
+                wait = deadline - time.monotonic() if cancelled is None else 0.2
+                try:
+                    stdout, stderr = process.communicate(timeout=max(wait, 0))
+                    output = stdout + "\n" + stderr
+                    break
+                except subprocess.TimeoutExpired:
+                    if cancelled is not None and cancelled.is_set():
+                        process.kill()
+                        process.communicate()
+                        raise RuntimeError("Test run cancelled.")
+                    if time.monotonic() >= deadline:
+                        process.kill()
+                        process.communicate()
+                        output = f"Batched run timed out after {timeout:.0f}s."
+                        break
+        reports = [path.read_text() for path in sorted(Path(tmp).glob("*.xml"))]
+
+    results = parse_spec_results(reports, project_root)
+    outcomes = {}
+    for spec in specs:
+        if spec not in results:
+            outcomes[spec] = (1, f"No results were reported for this spec:\n{output}")
+            continue
+        count, failures = results[spec]
+        if failures:
+            outcomes[spec] = (1, "\n\n".join(failures))
+        else:
+            outcomes[spec] = (0, f"{count} tests passed ({len(specs)} specs in this session).")
+    return outcomes
+
+
+class SpecBatcher:
+    """
+    Collects specs from concurrent workflows and hands them to run_batch, one
+    batch of up to batch_size specs at a time. After the first spec arrives,
+    it waits batch_window seconds for others to join the batch.
+    """
+
+    def __init__(
+        self,
+        run_batch: Callable[[List[str]], Dict[str, Tuple[int, str]]],
+        batch_size: int = 8,
+        batch_window: float = 2.0,
+    ):
+        self._run_batch = run_batch
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self._pending: List[Tuple[str, Future]] = []
+        self._closed = False
+        self._condition = threading.Condition()
+        threading.Thread(target=self._loop, name="autoqa-e2e-batcher", daemon=True).start()
+
+    def submit(self, spec: str) -> Future:
+        future: Future = Future()
+        with self._condition:
+            if self._closed:
+                raise E2ESessionError("The e2e session is closed.")
+            self._pending.append((spec, future))
+            self._condition.notify()
+        return future
+
+    def _next_batch(self) -> List[Tuple[str, Future]]:
+        with self._condition:
+            while not self._pending and not self._closed:
+                self._condition.wait()
+            deadline = time.monotonic() + self.batch_window
+            while len(self._pending) < self.batch_size and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            if self._closed:
+                return []
+            batch = self._pending[: self.batch_size]
+            self._pending = self._pending[self.batch_size :]
+            return batch
+
+    def _loop(self):
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return
+            try:
+                results = self._run_batch([spec for spec, _ in batch])
+                for spec, future in batch:
+                    future.set_result(results[spec])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            pending, self._pending = self._pending, []
+            self._condition.notify()
+        for _, future in pending:
+            future.set_exception(E2ESessionError("The e2e session is closed."))
+
+
+class E2ESessions:
+    """
+    Per project root, the app server (started on the first spec) and one spec
+    batcher per e2e framework.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.app_command: Optional[str] = None
+        self.base_url: Optional[str] = None
+        self.health_url: Optional[str] = None
+        self.batch_size = 1
+        self.batch_window = 2.0
+        self.startup_timeout = 120.0
+        self._servers: Dict[str, AppServer] = {}
+        self._batchers: Dict[Tuple[str, str], SpecBatcher] = {}
+        self._broken: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def configure(
+        self,
+        app_command: Optional[str] = None,
+        base_url: Optional[str] = None,
+        health_url: Optional[str] = None,
+        batch_size: int = 1,
+        batch_window: float = 2.0,
+        startup_timeout: float = 120.0,
+    ):
+        if app_command and not (health_url or base_url):
+            raise ValueError("An app server command needs a base URL to health-check.")
+        if batch_size < 1:
+            raise ValueError("The e2e batch size must be at least 1.")
+        self.app_command = app_command
+        self.base_url = base_url
+        self.health_url = health_url or base_url
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.startup_timeout = startup_timeout
+        self.enabled = bool(app_command) or batch_size > 1
+
+    def _ensure_server(self, key: str):
+        server = self._servers.get(key)
+        if not self.app_command or (server is not None and server.alive):
+            return
+        if key in self._broken:
+            # Do not wait for a failing startup again on every spec
+            raise E2ESessionError(self._broken[key])
+        click.echo(f"[AutoQA] [E2E]: Starting app server: {self.app_command}")
+        try:
+            self._servers[key] = AppServer(
+                self.app_command, self.health_url, key, self.startup_timeout
+            )
+        except E2ESessionError as e:
+            self._broken[key] = str(e)
+            raise
+        click.echo(f"[AutoQA] [E2E]: App server is up at {self.health_url}")
+
+    def run(
+        self,
+        project_root: str,
+        framework: str,
+        spec: str,
+        timeout: float = 300.0,
+        cancelled: Optional[threading.Event] = None,
+    ) -> Tuple[int, str]:
+        """
+        Runs spec in the next batch for its project and framework and returns
+        (exit code, output) for that spec alone. A spec that may be cancelled
+        runs in its own session against the shared app server, since killing a
+        batch would take other workflows' specs down with it.
+        """
+        key = str(Path(project_root).resolve())
+        spec = str(Path(spec).resolve())
+        with self._lock:
+            self._ensure_server(key)
+            batcher = self._batchers.get((key, framework))
+            if batcher is None and cancelled is None:
+                batcher = SpecBatcher(
+                    lambda specs: run_specs(
+                        key, framework, specs, self.base_url, timeout * len(specs)
+                    ),
+                    self.batch_size,
+                    self.batch_window,
+                )
+                self._batchers[(key, framework)] = batcher
+        if cancelled is not None:
+            return run_specs(key, framework, [spec], self.base_url, timeout, cancelled)[spec]
+        future = batcher.submit(spec)
+        try:
+            # The batch ahead of this one may still be running
+            return future.result(2 * timeout * self.batch_size + 60)
+        except FutureTimeout:
+            raise E2ESessionError("No result from the batched e2e run.")
+
+    def close(self):
+        with self._lock:
+            batchers, self._batchers = self._batchers, {}
+            servers, self._servers = self._servers, {}
+        for batcher in batchers.values():
+            batcher.close()
+        for server in servers.values():
+            server.stop()
+
+
+# Used by runner_node for e2e runs when an app command or batching is configured
+e2e_sessions = E2ESessions()
+atexit.register(e2e_sessions.close)
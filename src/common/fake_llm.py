@@ -0,0 +1,138 @@
+import hashlib
+import json
+import os
+import time
+from typing import Any, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from common.budget import estimate_tokens
+from common.llm import message_text
+from common.packing import SOURCE_BLOCK
+
+PASSING_PYTEST = """import pytest
+
+
+def test_generated_{n}():
+    # Generated by the fake provider
+    assert {n} == {n}
+"""
+
+FAILING_PYTEST = """import pytest
+
+
+def test_generated_{n}():
+    # Generated by the fake provider, fails until repaired
+    assert {n} == -1
+"""
+
+PASSING_JEST = """describe("generated {n}", () => {{
+  it("passes", () => {{
+    expect({n}).toBe({n});
+  }});
+}});
+"""
+
+FAILING_JEST = """describe("generated {n}", () => {{
+  it("fails until repaired", () => {{
+    expect({n}).toBe(-1);
+  }});
+}});
+"""
+
+MANUAL_CHECKLIST = """Manual Testing Checklist
+
+Feature checklist:
+1. [ ] Verify the feature described in section {n} works.
+
+Feature user stories:
+1. As a user, I want section {n} to work so that I can rely on it.
+"""
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Deterministic offline chat model for benchmarks and tests.
+
+    Responses are derived from the prompt so that classification, generation
+    and repair all produce plausible output. Latency is simulated as a fixed
+    per-call delay plus output tokens divided by ``tokens_per_second``.
+    A temperature, when set, picks a different (still deterministic) response.
+    """
+
+    latency: float = 0.0
+    tokens_per_second: float = 0.0
+    fail_rate: float = 0.0
+    temperature: Optional[float] = None
+
+    @classmethod
+    def from_env(cls) -> "FakeChatModel":
+        return cls(
+            latency=float(os.environ.get("AUTOQA_FAKE_LATENCY", "0")),
+            tokens_per_second=float(os.environ.get("AUTOQA_FAKE_TOKENS_PER_SEC", "0")),
+            fail_rate=float(os.environ.get("AUTOQA_FAKE_FAIL_RATE", "0")),
+        )
+
+    @property
+    def _llm_type(self) -> str:
+        return "autoqa-fake"
+
+    def _respond(self, prompt: str) -> str:
+        seed = prompt if self.temperature is None else f"{prompt}\0{self.temperature}"
+        digest = hashlib.sha256(seed.encode("utf-8")).hexdigest()
+        n = int(digest[:6], 16) % 1000
+        lowered = prompt.lower()
+
+        if "respond only in this json format" in lowered:
+            priority = ("high", "medium", "low")[n % 3]
+            return json.dumps({"should_test": True, "test_type": "unit", "priority": priority})
+        if "respond only with 'yes' or 'no'" in lowered:
+            return "yes"
+        if "manual qa checklist" in lowered:
+            return MANUAL_CHECKLIST.format(n=n)
+
+        sources = SOURCE_BLOCK.findall(prompt)
+        if sources:
+            # Packed generation: answer each file as if it had been asked alone
+            task = prompt[prompt.rindex("=== END SOURCE ===") :]
+            return "\n\n".join(
+                f"=== TESTS: {path} ===\n{self._respond(f'{path}{code}{task}')}\n=== END TESTS ==="
+                for path, code in sources
+            )
+
+        is_repair = "failed" in lowered and "correct the tests" in lowered
+        # Fail a deterministic fraction of first attempts to exercise the repair loop
+        fails = not is_repair and (n % 100) < int(self.fail_rate * 100)
+        if "jest" in lowered or "javascript" in lowered:
+            return (FAILING_JEST if fails else PASSING_JEST).format(n=n)
+        return (FAILING_PYTEST if fails else PASSING_PYTEST).format(n=n)
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        prompt = "\n".join(message_text(m.content) for m in messages)
+        content = self._respond(prompt)
+        input_tokens = estimate_tokens(prompt)
+        output_tokens = estimate_tokens(content)
+
+        delay = self.latency
+        if self.tokens_per_second:
+            delay += output_tokens / self.tokens_per_second
+        if delay:
+            time.sleep(delay)
+
+        message = AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens,
+            },
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
@@ -0,0 +1,196 @@
+import atexit
+import itertools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import click
+
+SERVER_SCRIPT = Path(__file__).with_name("pytest_server.py")
+
+
+class ForkServerError(RuntimeError):
+    pass
+
+
+class PytestForkServer:
+    """
+    Client for one warm pytest process (see pytest_server.py) running in
+    project_root. Runs may be requested from several threads at once; each
+    one is executed in its own forked child.
+    """
+
+    def __init__(
+        self,
+        project_root: str,
+        preload: Optional[List[str]] = None,
+        startup_timeout: float = 120.0,
+    ):
+        if not hasattr(os, "fork"):
+            raise ForkServerError("The fork server needs a platform with os.fork.")
+
+        env = os.environ.copy()
+        env["CI"] = "1"
+        self._log = tempfile.TemporaryFile()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._pending: Dict[int, Future] = {0: Future()}
+        self.process = subprocess.Popen(
+            [sys.executable, str(SERVER_SCRIPT), "--preload", ",".join(preload or [])],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=self._log,
+            cwd=project_root,
+            env=env,
+        )
+        threading.Thread(target=self._read, name="autoqa-forkserver", daemon=True).start()
+
+        try:
+            ready = self._pending[0].result(startup_timeout)
+        except (FutureTimeout, ForkServerError):
+            self.close()
+            raise ForkServerError(f"Fork server did not start:\n{self._log_tail()}")
+        self.failed_preloads: Dict[str, str] = ready.get("failed", {})
+
+    def _log_tail(self) -> str:
+        self._log.seek(0)
+        return self._log.read().decode("utf-8", errors="replace")[-2000:]
+
+    def _read(self):
+        for line in self.process.stdout:
+            message = json.loads(line)
+            with self._lock:
+                future = self._pending.pop(message.get("id", 0), None)
+            if future:
+                future.set_result(message)
+        # The server exited: nothing pending will be answered
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            future.set_exception(ForkServerError("Fork server exited."))
+
+    @property
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def run(
+        self,
+        args: List[str],
+        timeout: float = 300.0,
+        cancelled: Optional[threading.Event] = None,
+    ) -> Tuple[int, str]:
+        """
+        Runs pytest with args in a fresh fork and returns (exit code, output).
+        Once cancelled is set, the fork is killed and RuntimeError is raised.
+        """
+        future: Future = Future()
+        with self._lock:
+            if not self.alive:
+                raise ForkServerError("Fork server exited.")
+            request_id = next(self._ids)
+            self._pending[request_id] = future
+            try:
+                request = {"id": request_id, "args": args, "timeout": timeout}
+                self.process.stdin.write((json.dumps(request) + "\n").encode("utf-8"))
+                self.process.stdin.flush()
+            except OSError as e:
+                self._pending.pop(request_id, None)
+                raise ForkServerError(f"Fork server exited: {e}")
+        # The server kills runs after timeout; the margin covers the reply itself
+        deadline = time.monotonic() + timeout + 30
+        while True:
+            try:
+                wait = deadline - time.monotonic() if cancelled is None else 0.2
+                reply = future.result(max(wait, 0))
+                return reply["exit_code"], reply["output"]
+            except FutureTimeout:
+                if cancelled is not None and cancelled.is_set():
+                    self._cancel(request_id)
+                    raise RuntimeError("Test run cancelled.")
+                if time.monotonic() >= deadline:
+                    raise ForkServerError("No reply from fork server.")
+
+    def _cancel(self, request_id: int):
+        with self._lock:
+            self._pending.pop(request_id, None)
+            try:
+                self.process.stdin.write((json.dumps({"cancel": request_id}) + "\n").encode())
+                self.process.stdin.flush()
+            except OSError:
+                # The server is gone, and its forks with it
+                pass
+
+    def close(self):
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            self.process.kill()
+
+
+class ForkServers:
+    """
+    One warm pytest process per project root, started on first use.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.preload: List[str] = []
+        self._servers: Dict[str, PytestForkServer] = {}
+        self._broken: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        # Held while a project's server starts, so other projects' runs go on meanwhile
+        self._project_locks: Dict[str, threading.Lock] = {}
+
+    def configure(self, enabled: bool, preload: Optional[List[str]] = None):
+        self.enabled = enabled and hasattr(os, "fork")
+        self.preload = list(preload or [])
+
+    def _server(self, key: str) -> PytestForkServer:
+        with self._lock:
+            project_lock = self._project_locks.setdefault(key, threading.Lock())
+        with project_lock:
+            if key in self._broken:
+                # Do not pay for a failing startup again on every run
+                raise ForkServerError(self._broken[key])
+            server = self._servers.get(key)
+            if server is not None and server.alive:
+                return server
+            try:
+                server = PytestForkServer(key, self.preload)
+            except ForkServerError as e:
+                self._broken[key] = str(e)
+                raise
+            for name, error in server.failed_preloads.items():
+                click.echo(f"[AutoQA] [Runner]: Could not preload {name}: {error}")
+            with self._lock:
+                self._servers[key] = server
+            return server
+
+    def run(
+        self,
+        project_root: str,
+        args: List[str],
+        timeout: float = 300.0,
+        cancelled: Optional[threading.Event] = None,
+    ) -> Tuple[int, str]:
+        return self._server(str(Path(project_root).resolve())).run(args, timeout, cancelled)
+
+    def close(self):
+        with self._lock:
+            servers, self._servers = self._servers, {}
+        for server in servers.values():
+            server.close()
+
+
+# Used by runner_node for pytest runs when enabled with --fork-server
+forkservers = ForkServers()
+atexit.register(forkservers.close)
@@ -0,0 +1,176 @@
+import hashlib
+import mmap
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Tuple
+
+from pydantic import BaseModel
+
+from common.skeleton import outline
+
+# Larger source files are skipped or summarized
+MAX_FILE_BYTES = 512 * 1024
+# Larger files are hashed through mmap instead of being read for hashing
+MMAP_HASH_BYTES = 1024 * 1024
+SNIFF_BYTES = 64 * 1024
+# Lines this long only occur in minified or generated code
+MINIFIED_LINE_CHARS = 1000
+# Above this share of undecodable characters a file is treated as binary
+MAX_REPLACED_RATIO = 0.01
+CACHE_BYTES = 64 * 1024 * 1024
+
+MINIFIED_SUFFIXES = (".min.js", ".min.mjs", ".min.css", ".bundle.js", ".chunk.js")
+# Only these get minified by build tools; prose and other code can have long lines
+MINIFIABLE_SUFFIXES = (".js", ".mjs", ".cjs", ".jsx", ".ts", ".tsx", ".css")
+OVERSIZED_POLICIES = ("skip", "summarize")
+
+
+class SourceFile(BaseModel):
+    """
+    A source file as classification and generation see it. text is empty
+    when the file is skipped, and an outline when it was summarized.
+    """
+
+    path: str
+    size: int
+    sha256: str
+    text: str = ""
+    skip_reason: Optional[str] = None
+    summarized: bool = False
+
+
+def hash_file(path: Path, size: Optional[int] = None) -> str:
+    """
+    Returns the sha256 of a file. Large files are hashed through mmap, so
+    they are neither copied into memory at once nor read in Python-sized chunks.
+    """
+    size = path.stat().st_size if size is None else size
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        if size >= MMAP_HASH_BYTES:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                digest.update(mapped)
+        elif size:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def sniff(path: Path, head: bytes, detect_minified: bool = True) -> Optional[str]:
+    """
+    Returns why the content starting with head is not source code worth
+    testing (binary, minified), or None. Without detect_minified, only binary
+    content is rejected, e.g. for the documents of manual test plans.
+    """
+    if b"\0" in head:
+        return "binary"
+    if not detect_minified:
+        return None
+    if path.name.endswith(MINIFIED_SUFFIXES):
+        return "minified"
+    if path.suffix not in MINIFIABLE_SUFFIXES:
+        return None
+    lines = head.splitlines() or [b""]
+    # The last line of a sample may be cut short, so judge by the longest
+    if max(len(line) for line in lines) > MINIFIED_LINE_CHARS:
+        return "minified"
+    return None
+
+
+def decode(data: bytes) -> Tuple[str, float]:
+    """
+    Decodes source bytes as UTF-8 (with or without BOM), replacing what does
+    not decode. Returns the text and the share of replaced characters.
+    """
+    try:
+        return data.decode("utf-8-sig"), 0.0
+    except UnicodeDecodeError:
+        text = data.decode("utf-8-sig", errors="replace")
+        return text, text.count("\ufffd") / max(len(text), 1)
+
+
+class SourceReader:
+    """
+    Reads each source file once for dedupe hashing, classification and
+    generation. The size is checked before anything is read. Decoded text is
+    kept in a bounded cache keyed by path, size and modification time.
+    """
+
+    def __init__(self):
+        self.max_file_bytes = MAX_FILE_BYTES
+        self.oversized = "skip"
+        self._cache: "OrderedDict[str, Tuple[Tuple[int, int, bool], SourceFile]]" = OrderedDict()
+        self._cached_bytes = 0
+        self._lock = threading.Lock()
+
+    def configure(self, max_file_bytes: Optional[int] = None, oversized: Optional[str] = None):
+        if oversized is not None and oversized not in OVERSIZED_POLICIES:
+            raise ValueError(f"Oversized files can be {' or '.join(OVERSIZED_POLICIES)}.")
+        if max_file_bytes is not None and max_file_bytes < 1:
+            raise ValueError("The file size cap must be positive.")
+        self.max_file_bytes = max_file_bytes or MAX_FILE_BYTES
+        self.oversized = oversized or "skip"
+        with self._lock:
+            self._cache.clear()
+            self._cached_bytes = 0
+
+    def read(self, path: Path, detect_minified: bool = True) -> SourceFile:
+        """
+        Returns the file as a SourceFile. Raises OSError if it cannot be read.
+        """
+        path = Path(path)
+        stat = path.stat()
+        key = str(path.resolve())
+        version = (stat.st_size, stat.st_mtime_ns, detect_minified)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached and cached[0] == version:
+                self._cache.move_to_end(key)
+                return cached[1]
+        source = self._load(path, stat.st_size, detect_minified)
+        with self._lock:
+            previous = self._cache.pop(key, None)
+            if previous:
+                self._cached_bytes -= len(previous[1].text)
+            self._cache[key] = (version, source)
+            self._cached_bytes += len(source.text)
+            while self._cached_bytes > CACHE_BYTES and len(self._cache) > 1:
+                _key, (_version, evicted) = self._cache.popitem(last=False)
+                self._cached_bytes -= len(evicted.text)
+        return source
+
+    def _load(self, path: Path, size: int, detect_minified: bool) -> SourceFile:
+        oversized = size > self.max_file_bytes
+        if oversized and self.oversized == "skip":
+            return SourceFile(
+                path=str(path),
+                size=size,
+                sha256=hash_file(path, size),
+                skip_reason=f"larger than {self.max_file_bytes} bytes ({size} bytes)",
+            )
+        with open(path, "rb") as f:
+            head = f.read(SNIFF_BYTES)
+            reason = sniff(path, head, detect_minified)
+            data = head + f.read() if reason is None else b""
+        sha256 = hashlib.sha256(data).hexdigest() if data else hash_file(path, size)
+        if reason:
+            return SourceFile(path=str(path), size=size, sha256=sha256, skip_reason=reason)
+
+        text, replaced = decode(data)
+        if replaced > MAX_REPLACED_RATIO:
+            return SourceFile(
+                path=str(path), size=size, sha256=sha256, skip_reason="not UTF-8 text"
+            )
+        if oversized:
+            return SourceFile(
+                path=str(path),
+                size=size,
+                sha256=sha256,
+                text=outline(str(path), text),
+                summarized=True,
+            )
+        return SourceFile(path=str(path), size=size, sha256=sha256, text=text)
+
+
+# Shared by dedupe, classification and generation; configured by `generate`
+sources = SourceReader()
@@ -0,0 +1,469 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel
+
+
+class Job(BaseModel):
+    id: str
+    payload: dict
+    priority: int = 1
+    attempts: int = 0
+
+
+class JobQueue(ABC):
+    """
+    Work queue shared by `auto submit` and any number of `auto worker` processes.
+
+    A claimed job is leased to one worker until lease_until. Workers extend the
+    lease with heartbeat(); jobs whose lease expires (a crashed or killed worker)
+    are put back by requeue_expired() until max_attempts is reached.
+    """
+
+    def __init__(self, max_attempts: int = 3):
+        self.max_attempts = max_attempts
+
+    @abstractmethod
+    def submit(self, payload: dict, priority: int = 1) -> str:
+        """
+        Queues payload and returns the job id; lower priority numbers run first.
+        """
+
+    @abstractmethod
+    def claim(self, worker_id: str, lease_seconds: float) -> Optional[Job]:
+        """
+        Leases the next job to worker_id, or returns None when nothing is queued.
+        """
+
+    @abstractmethod
+    def heartbeat(self, job_id: str, worker_id: str, lease_seconds: float) -> bool:
+        """
+        Extends a lease; returns False if the job is no longer leased to worker_id.
+        """
+
+    @abstractmethod
+    def complete(self, job_id: str, worker_id: str, result: dict):
+        """
+        Marks a leased job done with its result.
+        """
+
+    @abstractmethod
+    def fail(self, job_id: str, worker_id: str, error: str):
+        """
+        Requeues a leased job, or marks it failed once max_attempts is reached.
+        """
+
+    @abstractmethod
+    def requeue_expired(self) -> int:
+        """
+        Releases jobs whose lease expired and returns how many were released.
+        """
+
+    @abstractmethod
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns the number of jobs per status.
+        """
+
+    @abstractmethod
+    def results(self) -> Dict[str, dict]:
+        """
+        Returns the report entry of every finished job, keyed by payload["file"].
+        """
+
+
+def _result_entry(status: str, result: Optional[dict], error: Optional[str]) -> dict:
+    # Shaped like a RunReport file entry; jobs that ran out of attempts count as errors
+    if status == "done":
+        return result
+    return {"status": "error", "stop_reason": None, "retries": 0, "duration": 0.0, "error": error}
+
+
+class SQLiteJobQueue(JobQueue):
+    """
+    Job queue in a SQLite file; works across processes on one machine or on a
+    shared volume that supports file locking.
+    """
+
+    def __init__(self, path: str, max_attempts: int = 3):
+        super().__init__(max_attempts)
+        self.path = path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY, payload TEXT NOT NULL, priority INTEGER NOT NULL,"
+                " status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0,"
+                " worker TEXT, lease_until REAL, result TEXT, error TEXT, created REAL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS jobs_pick ON jobs (status, priority, created)")
+
+    def _connect(self) -> "_Transaction":
+        # One short-lived connection per call keeps this safe across threads and processes
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        return _Transaction(db)
+
+    def submit(self, payload: dict, priority: int = 1) -> str:
+        job_id = uuid.uuid4().hex
+        with self._connect() as db:
+            db.execute(
+                "INSERT INTO jobs (id, payload, priority, status, created)"
+                " VALUES (?, ?, ?, 'queued', ?)",
+                (job_id, json.dumps(payload), priority, time.time()),
+            )
+        return job_id
+
+    def claim(self, worker_id: str, lease_seconds: float) -> Optional[Job]:
+        with self._connect() as db:
+            row = db.execute(
+                "SELECT id, payload, priority, attempts FROM jobs WHERE status = 'queued'"
+                " ORDER BY priority, created LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            db.execute(
+                "UPDATE jobs SET status = 'leased', worker = ?, lease_until = ?,"
+                " attempts = attempts + 1 WHERE id = ?",
+                (worker_id, time.time() + lease_seconds, row[0]),
+            )
+        return Job(id=row[0], payload=json.loads(row[1]), priority=row[2], attempts=row[3] + 1)
+
+    def heartbeat(self, job_id: str, worker_id: str, lease_seconds: float) -> bool:
+        with self._connect() as db:
+            cursor = db.execute(
+                "UPDATE jobs SET lease_until = ? WHERE id = ? AND worker = ? AND status = 'leased'",
+                (time.time() + lease_seconds, job_id, worker_id),
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, job_id: str, worker_id: str, result: dict):
+        with self._connect() as db:
+            db.execute(
+                "UPDATE jobs SET status = 'done', result = ?, lease_until = NULL"
+                " WHERE id = ? AND worker = ?",
+                (json.dumps(result), job_id, worker_id),
+            )
+
+    def fail(self, job_id: str, worker_id: str, error: str):
+        with self._connect() as db:
+            db.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END,"
+                " error = ?, worker = NULL, lease_until = NULL WHERE id = ? AND worker = ?",
+                (self.max_attempts, error, job_id, worker_id),
+            )
+
+    def requeue_expired(self) -> int:
+        with self._connect() as db:
+            cursor = db.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END,"
+                " error = 'lease expired', worker = NULL, lease_until = NULL"
+                " WHERE status = 'leased' AND lease_until < ?",
+                (self.max_attempts, time.time()),
+            )
+            return cursor.rowcount
+
+    def stats(self) -> Dict[str, int]:
+        with self._connect() as db:
+            rows = db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return dict(rows)
+
+    def results(self) -> Dict[str, dict]:
+        with self._connect() as db:
+            rows = db.execute(
+                "SELECT payload, status, result, error FROM jobs WHERE status IN ('done', 'failed')"
+            ).fetchall()
+        return {
+            json.loads(payload)["file"]: _result_entry(status, result and json.loads(result), error)
+            for payload, status, result, error in rows
+        }
+
+
+class _Transaction:
+    """
+    Runs a block in an immediate (write-locked) transaction and closes the connection.
+    """
+
+    def __init__(self, db: sqlite3.Connection):
+        self.db = db
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.db.execute("BEGIN IMMEDIATE")
+        return self.db
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.db.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self.db.close()
+
+
+# KEYS: queue, leases. ARGV: lease deadline. Moves the next job onto the leases
+# in one step, so a worker that dies after claiming leaves a lease that expires.
+CLAIM_SCRIPT = """
+local popped = redis.call('ZPOPMIN', KEYS[1], 1)
+if #popped == 0 then
+    return false
+end
+redis.call('ZADD', KEYS[2], ARGV[1], popped[1])
+return popped[1]
+"""
+
+# KEYS: leases, jobs, queue. ARGV: job id, record, queue score or "". Saves the
+# record (and requeues the job) only if this call removed the lease.
+SETTLE_SCRIPT = """
+if redis.call('ZREM', KEYS[1], ARGV[1]) == 0 then
+    return 0
+end
+redis.call('HSET', KEYS[2], ARGV[1], ARGV[2])
+if ARGV[3] ~= '' then
+    redis.call('ZADD', KEYS[3], ARGV[3], ARGV[1])
+end
+return 1
+"""
+
+
+# KEYS: leases, jobs. ARGV: job id, worker id, lease deadline. Extends the lease
+# only while it exists and the record says worker id holds it, so a lease that
+# was just settled is not added back.
+HEARTBEAT_SCRIPT = """
+if not redis.call('ZSCORE', KEYS[1], ARGV[1]) then
+    return 0
+end
+local raw = redis.call('HGET', KEYS[2], ARGV[1])
+if not raw then
+    return 0
+end
+local record = cjson.decode(raw)
+if record['worker'] ~= ARGV[2] or record['status'] ~= 'leased' then
+    return 0
+end
+redis.call('ZADD', KEYS[1], 'XX', ARGV[3], ARGV[1])
+return 1
+"""
+
+
+class RedisJobQueue(JobQueue):
+    """
+    Job queue on a Redis-compatible server.
+
+    Only needs zadd, zrem, zrangebyscore, hset, hget, hgetall and
+    register_script (for the Lua scripts that claim, extend and settle leases
+    atomically), so any client with redis-py's signatures and
+    decode_responses=True works, including InMemoryRedis for local runs and
+    tests.
+    """
+
+    def __init__(self, client, namespace: str = "autoqa", max_attempts: int = 3):
+        super().__init__(max_attempts)
+        self.client = client
+        self.queue_key = f"{namespace}:queue"
+        self.leases_key = f"{namespace}:leases"
+        self.jobs_key = f"{namespace}:jobs"
+        self._claim = client.register_script(CLAIM_SCRIPT)
+        self._settle = client.register_script(SETTLE_SCRIPT)
+        self._heartbeat = client.register_script(HEARTBEAT_SCRIPT)
+
+    def _load(self, job_id: str) -> Optional[dict]:
+        raw = self.client.hget(self.jobs_key, job_id)
+        return json.loads(raw) if raw else None
+
+    def _save(self, record: dict):
+        self.client.hset(self.jobs_key, record["id"], json.dumps(record))
+
+    def _score(self, record: dict) -> float:
+        # Lower priority number first, then oldest first
+        return record["priority"] * 1e10 + time.time()
+
+    def submit(self, payload: dict, priority: int = 1) -> str:
+        record = {
+            "id": uuid.uuid4().hex,
+            "payload": payload,
+            "priority": priority,
+            "status": "queued",
+            "attempts": 0,
+        }
+        self._save(record)
+        self.client.zadd(self.queue_key, {record["id"]: self._score(record)})
+        return record["id"]
+
+    def claim(self, worker_id: str, lease_seconds: float) -> Optional[Job]:
+        job_id = self._claim(
+            keys=[self.queue_key, self.leases_key], args=[time.time() + lease_seconds]
+        )
+        if not job_id:
+            return None
+        record = self._load(job_id)
+        record.update(status="leased", worker=worker_id, attempts=record["attempts"] + 1)
+        self._save(record)
+        return Job(**{k: record[k] for k in ("id", "payload", "priority", "attempts")})
+
+    def heartbeat(self, job_id: str, worker_id: str, lease_seconds: float) -> bool:
+        args = [job_id, worker_id, time.time() + lease_seconds]
+        return bool(self._heartbeat(keys=[self.leases_key, self.jobs_key], args=args))
+
+    def _settle_lease(self, record: dict, requeue: bool) -> bool:
+        score = self._score(record) if requeue else ""
+        args = [record["id"], json.dumps(record), score]
+        return bool(self._settle(keys=[self.leases_key, self.jobs_key, self.queue_key], args=args))
+
+    def complete(self, job_id: str, worker_id: str, result: dict):
+        record = self._load(job_id)
+        if record and record.get("worker") == worker_id:
+            record.update(status="done", result=result)
+            self._settle_lease(record, requeue=False)
+
+    def _release(self, record: dict, error: str) -> bool:
+        record.update(status="failed" if record["attempts"] >= self.max_attempts else "queued")
+        record.update(error=error, worker=None)
+        return self._settle_lease(record, requeue=record["status"] == "queued")
+
+    def fail(self, job_id: str, worker_id: str, error: str):
+        record = self._load(job_id)
+        if record and record.get("worker") == worker_id:
+            self._release(record, error)
+
+    def requeue_expired(self) -> int:
+        requeued = 0
+        for job_id in self.client.zrangebyscore(self.leases_key, 0, time.time()):
+            record = self._load(job_id)
+            if record is None:
+                # The job was deleted; its lease has nothing left to release
+                self.client.zrem(self.leases_key, job_id)
+                continue
+            # Only the process that removes the lease requeues the job
+            if self._release(record, "lease expired"):
+                requeued += 1
+        return requeued
+
+    def stats(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for raw in self.client.hgetall(self.jobs_key).values():
+            status = json.loads(raw)["status"]
+            counts[status] = counts.get(status, 0) + 1
+        return counts
+
+    def results(self) -> Dict[str, dict]:
+        results = {}
+        for raw in self.client.hgetall(self.jobs_key).values():
+            record = json.loads(raw)
+            if record["status"] in ("done", "failed"):
+                entry = _result_entry(record["status"], record.get("result"), record.get("error"))
+                results[record["payload"]["file"]] = entry
+        return results
+
+
+class InMemoryRedis:
+    """
+    Thread-safe stand-in for the subset of Redis commands RedisJobQueue uses.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._zsets: Dict[str, Dict[str, float]] = {}
+        self._hashes: Dict[str, Dict[str, str]] = {}
+
+    def zadd(self, key: str, mapping: Dict[str, float]) -> int:
+        with self._lock:
+            zset = self._zsets.setdefault(key, {})
+            added = len(set(mapping) - set(zset))
+            zset.update(mapping)
+            return added
+
+    def zrem(self, key: str, member: str) -> int:
+        with self._lock:
+            return 1 if self._zsets.get(key, {}).pop(member, None) is not None else 0
+
+    def zrangebyscore(self, key: str, low: float, high: float) -> List[str]:
+        with self._lock:
+            items = sorted(self._zsets.get(key, {}).items(), key=lambda item: item[1])
+            return [member for member, score in items if low <= score <= high]
+
+    def hset(self, key: str, field: str, value: str) -> int:
+        with self._lock:
+            fields = self._hashes.setdefault(key, {})
+            added = 0 if field in fields else 1
+            fields[field] = value
+            return added
+
+    def hget(self, key: str, field: str) -> Optional[str]:
+        with self._lock:
+            return self._hashes.get(key, {}).get(field)
+
+    def hgetall(self, key: str) -> Dict[str, str]:
+        with self._lock:
+            return dict(self._hashes.get(key, {}))
+
+    def register_script(self, script: str):
+        """
+        Returns the Python equivalent of one of RedisJobQueue's Lua scripts,
+        run under the lock like Redis runs scripts.
+        """
+        implementation = {
+            CLAIM_SCRIPT: self._claim,
+            SETTLE_SCRIPT: self._settle,
+            HEARTBEAT_SCRIPT: self._heartbeat,
+        }[script]
+
+        def run(keys: List[str], args: list):
+            with self._lock:
+                return implementation(keys, args)
+
+        return run
+
+    def _claim(self, keys: List[str], args: list) -> Optional[str]:
+        queue = self._zsets.get(keys[0], {})
+        if not queue:
+            return None
+        job_id = min(queue.items(), key=lambda item: (item[1], item[0]))[0]
+        del queue[job_id]
+        self._zsets.setdefault(keys[1], {})[job_id] = float(args[0])
+        return job_id
+
+    def _settle(self, keys: List[str], args: list) -> int:
+        job_id, record, score = args
+        if self._zsets.get(keys[0], {}).pop(job_id, None) is None:
+            return 0
+        self._hashes.setdefault(keys[1], {})[job_id] = record
+        if score != "":
+            self._zsets.setdefault(keys[2], {})[job_id] = float(score)
+        return 1
+
+    def _heartbeat(self, keys: List[str], args: list) -> int:
+        job_id, worker_id, deadline = args
+        leases = self._zsets.get(keys[0], {})
+        raw = self._hashes.get(keys[1], {}).get(job_id)
+        if job_id not in leases or raw is None:
+            return 0
+        record = json.loads(raw)
+        if record.get("worker") != worker_id or record["status"] != "leased":
+            return 0
+        leases[job_id] = float(deadline)
+        return 1
+
+
+def open_job_queue(url: str, max_attempts: int = 3) -> JobQueue:
+    """
+    Opens a queue from a URL: sqlite:///path/to/queue.db (or a bare *.db path),
+    redis://host:port/db (needs the optional redis package) or memory:// for a
+    process-local queue.
+    """
+    if url.startswith("sqlite:///"):
+        return SQLiteJobQueue(url[len("sqlite:///") :], max_attempts=max_attempts)
+    if url.endswith(".db"):
+        return SQLiteJobQueue(url, max_attempts=max_attempts)
+    if url.startswith(("redis://", "rediss://")):
+        try:
+            import redis
+        except ImportError:
+            raise ValueError("The redis package is required for redis:// queues.") from None
+        client = redis.Redis.from_url(url, decode_responses=True)
+        return RedisJobQueue(client, max_attempts=max_attempts)
+    if url == "memory://":
+        return RedisJobQueue(InMemoryRedis(), max_attempts=max_attempts)
+    raise ValueError(f"Unsupported queue URL: {url}")
@@ -0,0 +1,165 @@
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from pydantic import BaseModel
+
+from common.blobstore import BLOB_PREFIX, blobs
+
+RUNS_DIR = ".autoqa/runs"
+
+
+class JournalState(BaseModel):
+    """
+    What a run journal says about an interrupted run.
+    """
+
+    run_id: str
+    options: dict = {}
+    discovery: dict = {}
+    classified: Dict[str, dict] = {}  # relative path -> accepted classification, in order
+    checkpoints: Dict[str, Tuple[str, dict]] = {}  # relative path -> (last node, state)
+    finished: Dict[str, str] = {}  # relative path -> final status
+    discovery_complete: bool = False
+
+    def pending(self) -> List[Tuple[str, dict]]:
+        """
+        Classified files that did not finish, in the order they were accepted,
+        and the unqueued copies of files that did.
+        """
+        pending = []
+        for f, info in self.classified.items():
+            if f not in self.finished:
+                pending.append((f, info))
+                continue
+            # Copies found after the file finished that were not queued before the interruption
+            member_info = {k: v for k, v in info.items() if k != "duplicates"}
+            for member in info.get("duplicates") or []:
+                if member not in self.classified:
+                    pending.append((member, member_info))
+        return pending
+
+    @property
+    def complete(self) -> bool:
+        return self.discovery_complete and not self.pending()
+
+    def known_files(self) -> Set[str]:
+        """
+        Files a resumed run must not discover again: every classified file and
+        the duplicates grouped under one, which are queued once it finishes.
+        """
+        known = set(self.classified)
+        for info in self.classified.values():
+            known.update(info.get("duplicates") or [])
+        return known
+
+
+class RunJournal:
+    """
+    Append-only JSONL record of a `generate` run in .autoqa/runs/<run id>.jsonl.
+
+    Every event is flushed and fsynced before the call returns, so a killed run
+    loses at most the line being written; a torn last line is ignored on load.
+    """
+
+    def __init__(self, run_id: str, directory: str = RUNS_DIR):
+        self.run_id = run_id
+        self.path = Path(directory) / f"{run_id}.jsonl"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def create(cls, directory: str = RUNS_DIR) -> "RunJournal":
+        run_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        return cls(run_id, directory)
+
+    def _append(self, event: dict):
+        line = json.dumps(event) + "\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def start(self, options: dict, discovery: dict):
+        self._append({"event": "run", "options": options, "discovery": discovery})
+
+    def resumed(self):
+        self._append({"event": "resumed", "at": time.time()})
+
+    def classified(self, file: str, info: dict):
+        self._append({"event": "classified", "file": file, "info": info})
+
+    def grouped(self, file: str, duplicate: str):
+        self._append({"event": "grouped", "file": file, "duplicate": duplicate})
+
+    def discovered(self):
+        self._append({"event": "discovered"})
+
+    def step(self, file: str, node: str, state):
+        # Large payloads are blob references; they must outlive this process
+        blobs.persist(state.input_code, state.generated_tests, state.test_results)
+        self._append(
+            {"event": "step", "file": file, "node": node, "state": state.model_dump(mode="json")}
+        )
+
+    def done(self, file: str, status: str):
+        self._append({"event": "done", "file": file, "status": status})
+
+    def delete(self):
+        """
+        Removes the journal and the blobs no other journal in its directory
+        refers to. Called once the run completed, so nothing can resume it.
+        """
+        others: Set[str] = set()
+        for path in self.path.parent.glob("*.jsonl"):
+            if path != self.path:
+                others.update(_blob_refs(path))
+        refs = _blob_refs(self.path) - others
+        self.path.unlink()
+        blobs.delete(*refs)
+
+    @staticmethod
+    def load(run_id: str, directory: str = RUNS_DIR) -> JournalState:
+        """
+        Replays the journal of run_id. Raises FileNotFoundError for unknown runs.
+        """
+        state = JournalState(run_id=run_id)
+        with open(Path(directory) / f"{run_id}.jsonl", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    # The run was killed while writing this line
+                    continue
+                kind = event.get("event")
+                if kind == "run":
+                    state.options = event["options"]
+                    state.discovery = event["discovery"]
+                elif kind == "classified":
+                    state.classified[event["file"]] = event["info"]
+                elif kind == "grouped" and event["file"] in state.classified:
+                    info = state.classified[event["file"]]
+                    info.setdefault("duplicates", []).append(event["duplicate"])
+                elif kind == "discovered":
+                    state.discovery_complete = True
+                elif kind == "step":
+                    state.checkpoints[event["file"]] = (event["node"], event["state"])
+                elif kind == "done":
+                    state.finished[event["file"]] = event["status"]
+                    state.checkpoints.pop(event["file"], None)
+        return state
+
+
+def _blob_refs(path: Path) -> Set[str]:
+    return set(re.findall(re.escape(BLOB_PREFIX) + "[0-9a-f]{64}", path.read_text("utf-8")))
+
+
+def latest_run(directory: str = RUNS_DIR) -> Optional[str]:
+    runs = sorted(Path(directory).glob("*.jsonl"), key=lambda p: p.stat().st_mtime)
+    return runs[-1].stem if runs else None
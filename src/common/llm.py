@@ -1,3 +1,5 @@
+import os
+
 import click
 from dotenv import load_dotenv
 
@@ -6,10 +8,57 @@ load_dotenv()
 # provider = os.environ.get("AI_PROVIDER", "openai").lower()
 
 
+def message_text(content) -> str:
+    """
+    Returns the text of a message whether its content is a string or a list of
+    content blocks (as used for provider cache breakpoints).
+    """
+    if isinstance(content, str):
+        return content
+    return "".join(
+        block.get("text", "") if isinstance(block, dict) else str(block) for block in content
+    )
+
+
 def get_llm(prefered_provider: str = None):
+    from common.budget import usage
+    from common.tracing import llm_spans
+
+    llm = _select_llm(prefered_provider)
+    # Every call counts towards the run's token budget, and is traced with --trace
+    llm.callbacks = [usage, llm_spans]
+    return llm
+
+
+def _select_llm(prefered_provider: str = None):
     provider = "vertex"  # Force using Vertex AI with Claude Sonnet 4
     if prefered_provider:
         provider = prefered_provider.lower()
+    # Benchmarks and offline runs force a single provider for every caller
+    provider = os.environ.get("AUTOQA_LLM_PROVIDER", provider).lower()
+
+    cassette = os.environ.get("AUTOQA_LLM_CASSETTE")
+    mode = os.environ.get("AUTOQA_LLM_CASSETTE_MODE", "replay").lower()
+    if cassette and mode == "replay":
+        from common.cassette import CassetteChatModel
+
+        click.echo(f"[AutoQA] [LLM]: Replaying responses from {cassette}")
+        return CassetteChatModel(
+            path=cassette,
+            mode="replay",
+            replay_timing=os.environ.get("AUTOQA_LLM_REPLAY_TIMING", "0") == "1",
+        )
+
+    llm = _build_llm(provider)
+    if cassette:
+        from common.cassette import CassetteChatModel
+
+        click.echo(f"[AutoQA] [LLM]: Recording responses to {cassette}")
+        return CassetteChatModel(path=cassette, mode=mode, inner=llm)
+    return llm
+
+
+def _build_llm(provider: str):
     click.echo(f"[AutoQA] [LLM]: Using provider: {provider}")
     if provider == "anthropic":
         from langchain_anthropic import ChatAnthropic
@@ -25,6 +74,10 @@ def get_llm(prefered_provider: str = None):
         return ChatAnthropicVertex(
             model="claude-sonnet-4", location="europe-west1", max_output_tokens=8000
         )
+    elif provider == "fake":
+        from common.fake_llm import FakeChatModel
+
+        return FakeChatModel.from_env()
     else:
         from langchain_openai import ChatOpenAI
 
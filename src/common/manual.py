@@ -0,0 +1,161 @@
+import re
+from typing import List, Optional, Tuple
+
+from pydantic import BaseModel
+
+# Documents up to this size are sent in one prompt, larger ones per section
+MAX_SECTION_CHARS = 12000
+MAX_PARALLEL_SECTIONS = 4
+
+ATX_HEADING = re.compile(r"^(#{1,6})\s+(.+?)(\s+#+)?\s*$")
+SETEXT_UNDERLINE = re.compile(r"^(=+|-+)\s*$")
+FENCE = re.compile(r"^\s*(```|~~~)")
+LIST_ITEM = re.compile(r"^\s*(?:\d+[.)]|[-*])\s+(.+)$")
+CHECKBOX = re.compile(r"^\[[ xX]?\]\s*")
+
+
+class Section(BaseModel):
+    title: str
+    text: str
+
+
+class _Heading(BaseModel):
+    line: int
+    level: int
+    title: str
+
+
+def _headings(lines: List[str]) -> List[_Heading]:
+    headings = []
+    in_fence = False
+    for i, (line, next_line) in enumerate(zip(lines, [*lines[1:], ""])):
+        if FENCE.match(line):
+            in_fence = not in_fence
+            continue
+        if in_fence:
+            continue
+        match = ATX_HEADING.match(line)
+        if match:
+            headings.append(_Heading(line=i, level=len(match.group(1)), title=match.group(2)))
+        elif line.strip() and not LIST_ITEM.match(line) and SETEXT_UNDERLINE.match(next_line):
+            level = 1 if next_line.startswith("=") else 2
+            headings.append(_Heading(line=i, level=level, title=line.strip()))
+    return headings
+
+
+def _by_paragraphs(title: str, lines: List[str], max_chars: int) -> List[Section]:
+    parts: List[Section] = []
+    chunk: List[str] = []
+    size = 0
+    for line in lines:
+        # Cut at a blank line once the chunk is full, or anywhere if it is far over
+        if size > max_chars and (not line.strip() or size > 2 * max_chars):
+            parts.append(Section(title=title, text="\n".join(chunk).strip()))
+            chunk, size = [], 0
+        chunk.append(line)
+        size += len(line) + 1
+    if "\n".join(chunk).strip():
+        parts.append(Section(title=title, text="\n".join(chunk).strip()))
+    if len(parts) > 1:
+        for i, part in enumerate(parts, 1):
+            part.title = f"{title} (part {i} of {len(parts)})"
+    return parts
+
+
+def _split(
+    lines: List[str],
+    start: int,
+    end: int,
+    headings: List[_Heading],
+    path: List[str],
+    max_chars: int,
+) -> List[Section]:
+    title = " > ".join(path) or "Overview"
+    text = "\n".join(lines[start:end])
+    if len(text) <= max_chars:
+        return [Section(title=title, text=text.strip())] if text.strip() else []
+    if not headings:
+        return _by_paragraphs(title, lines[start:end], max_chars)
+
+    # headings are the ones inside this range, below the range's own heading
+    level = min(h.level for h in headings)
+    top = [h for h in headings if h.level == level]
+    preamble = lines[start : top[0].line]
+    body = [line for line in preamble[1:] if line.strip() and not SETEXT_UNDERLINE.match(line)]
+    # A heading directly followed by subheadings adds nothing the subsection titles lack
+    sections = _split(lines, start, top[0].line, [], path, max_chars) if body or not path else []
+    for heading, following in zip(top, [*top[1:], None]):
+        stop = following.line if following else end
+        inner = [h for h in headings if heading.line < h.line < stop]
+        sections.extend(_split(lines, heading.line, stop, inner, [*path, heading.title], max_chars))
+    return sections
+
+
+def split_sections(text: str, max_chars: int = MAX_SECTION_CHARS) -> List[Section]:
+    """
+    Splits a Markdown or text document into feature sections of at most about
+    max_chars, following the heading hierarchy (then paragraphs). Neighbouring
+    small sections are packed together. Short documents stay one section.
+    """
+    lines = text.splitlines()
+    sections = _split(lines, 0, len(lines), _headings(lines), [], max_chars)
+
+    packed: List[Section] = []
+    for section in sections:
+        last: Optional[Section] = packed[-1] if packed else None
+        if last and len(last.text) + len(section.text) + 2 <= max_chars:
+            last.title = f"{last.title} / {section.title}"
+            last.text = f"{last.text}\n\n{section.text}"
+        else:
+            packed.append(section)
+    return packed or [Section(title="Overview", text=text)]
+
+
+def parse_checklist(text: str) -> Tuple[List[str], List[str]]:
+    """
+    Returns the checklist items and user stories of a generated checklist,
+    without numbering or checkboxes.
+    """
+    items: List[str] = []
+    stories: List[str] = []
+    target = items
+    for line in text.splitlines():
+        match = LIST_ITEM.match(line)
+        if match:
+            target.append(CHECKBOX.sub("", match.group(1).strip()))
+        elif "user stor" in line.lower():
+            target = stories
+        elif "checklist" in line.lower():
+            target = items
+    return items, stories
+
+
+def merge_checklists(parts: List[Tuple[str, str]]) -> str:
+    """
+    Merges (section title, generated checklist) pairs into one Manual Testing
+    Checklist, numbered across sections, with a single deduplicated list of
+    user stories at the end.
+    """
+    lines = ["Manual Testing Checklist", ""]
+    stories: List[str] = []
+    seen = set()
+    number = 0
+    for title, text in parts:
+        items, section_stories = parse_checklist(text)
+        lines.append(f"## {title}")
+        for item in items:
+            number += 1
+            lines.append(f"{number}. [ ] {item}")
+        if not items and not section_stories:
+            # Keep output that does not follow the expected format as it is
+            lines.append(text.strip())
+        lines.append("")
+        for story in section_stories:
+            key = re.sub(r"[^a-z0-9]+", " ", story.lower()).strip()
+            if key not in seen:
+                seen.add(key)
+                stories.append(story)
+    if stories:
+        lines.append("## User stories")
+        lines.extend(f"{i}. {story}" for i, story in enumerate(stories, 1))
+    return "\n".join(lines).rstrip() + "\n"
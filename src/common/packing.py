@@ -0,0 +1,91 @@
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+# Files up to this many source tokens are packed; larger ones get their own request
+PACK_SMALL_FILE_TOKENS = 1000
+# Bounded by the output the model can return in one response
+PACK_MAX_FILES = 8
+# Rough bytes per token of source code, to size files without reading them
+BYTES_PER_TOKEN = 4
+
+SOURCE_BLOCK = re.compile(r"^=== SOURCE: (.+?) ===\n(.*?)\n=== END SOURCE ===$", re.M | re.S)
+TESTS_BLOCK = re.compile(
+    r"^=== TESTS: (.+?) ===[ \t]*\n(.*?)^=== END TESTS ===[ \t]*$", re.M | re.S
+)
+
+
+class FilePack(BaseModel):
+    """
+    Small accepted files whose tests are generated in one request.
+    """
+
+    items: List[Tuple[Path, dict]]
+
+
+class Packer:
+    """
+    Groups small files, in the order they arrive, into packs of at most
+    token_budget source tokens and PACK_MAX_FILES files.
+    """
+
+    def __init__(self, token_budget: int, max_files: int = PACK_MAX_FILES):
+        self.token_budget = token_budget
+        self.max_files = max_files
+        self.small_file_tokens = min(PACK_SMALL_FILE_TOKENS, token_budget // 2)
+        self._items: List[Tuple[Path, dict]] = []
+        self._tokens = 0
+
+    def tokens(self, source_file: Path) -> int:
+        return source_file.stat().st_size // BYTES_PER_TOKEN + 1
+
+    def fits(self, source_file: Path) -> bool:
+        try:
+            return self.tokens(source_file) <= self.small_file_tokens
+        except OSError:
+            return False
+
+    def add(self, item: Tuple[Path, dict]) -> Optional[FilePack]:
+        """
+        Adds a small file and returns the pack it completed, if any.
+        """
+        tokens = self.tokens(item[0])
+        full = None
+        if self._items and self._tokens + tokens > self.token_budget:
+            full = self.flush()
+        self._items.append(item)
+        self._tokens += tokens
+        if len(self._items) >= self.max_files:
+            return self.flush() if full is None else full
+        return full
+
+    def flush(self) -> Optional[FilePack]:
+        if not self._items:
+            return None
+        pack = FilePack(items=self._items)
+        self._items, self._tokens = [], 0
+        return pack
+
+
+def render_sources(files: List[Tuple[str, str]]) -> str:
+    """
+    Renders (relative path, source) pairs for the packed generation prompt.
+    """
+    return "\n\n".join(
+        f"=== SOURCE: {path} ===\n{code.rstrip()}\n=== END SOURCE ===" for path, code in files
+    )
+
+
+def parse_tests(text: str, paths: List[str]) -> Dict[str, str]:
+    """
+    Splits a packed response into {relative path: test code}. Paths the
+    response left out, or answered with next to nothing, are missing.
+    """
+    tests = {}
+    for path, code in TESTS_BLOCK.findall(text):
+        path = path.strip()
+        if path in paths and len(code.strip()) >= 10:
+            tests[path] = code.strip() + "\n"
+    return tests
@@ -0,0 +1,176 @@
+"""
+Warm pytest process used by common.forkserver. Run as a script, not imported.
+
+Imports pytest, its plugins and the --preload modules once, then reads JSON
+requests ({"id", "args", "timeout"}) from stdin. Each request runs
+pytest.main(args) in a forked child whose combined output comes back over a
+pipe; the reply ({"id", "exit_code", "output"}) is written to stdout. A
+{"cancel": id} request kills that run's child.
+"""
+
+import os
+import sys
+
+# Run as a script, so sys.path[0] is this directory; like `python -m pytest`,
+# import the project's modules from the working directory instead
+sys.path[0] = os.getcwd()
+
+import argparse  # noqa: E402
+import json  # noqa: E402
+import selectors  # noqa: E402
+import signal  # noqa: E402
+import time  # noqa: E402
+import traceback  # noqa: E402
+
+
+def preload(modules):
+    import importlib
+
+    import pytest  # noqa: F401
+
+    failed = {}
+    try:
+        from importlib.metadata import entry_points
+
+        groups = entry_points()
+        plugins = (
+            groups.select(group="pytest11")
+            if hasattr(groups, "select")
+            else groups.get("pytest11", [])
+        )
+        for plugin in plugins:
+            try:
+                plugin.load()
+            except Exception as e:
+                failed[plugin.name] = str(e)
+    except ImportError:
+        pass
+
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            failed[name] = str(e)
+    if "django" in modules and os.environ.get("DJANGO_SETTINGS_MODULE"):
+        try:
+            import django
+
+            django.setup()
+        except Exception as e:
+            failed["django.setup"] = str(e)
+    return failed
+
+
+def exit_code(status):
+    if os.WIFEXITED(status):
+        return os.WEXITSTATUS(status)
+    return -os.WTERMSIG(status)
+
+
+def run_child(args, out_fd):
+    # Child: pytest writes to fds 1 and 2, both of which now go to the pipe
+    try:
+        os.dup2(out_fd, 1)
+        os.dup2(out_fd, 2)
+        os.close(out_fd)
+        null = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(null, 0)
+        import pytest
+
+        # Plugins were imported before pytest could register them for rewriting
+        code = int(pytest.main(["-W", "ignore::pytest.PytestAssertRewriteWarning", *args]))
+        sys.stdout.flush()
+        sys.stderr.flush()
+    except BaseException:
+        traceback.print_exc()
+        sys.stderr.flush()
+        code = 70
+    os._exit(code)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--preload", default="")
+    options = parser.parse_args()
+
+    # Keep the reply channel private; anything else printed goes to stderr
+    replies = os.fdopen(os.dup(1), "w")
+    os.dup2(2, 1)
+
+    def reply(message):
+        replies.write(json.dumps(message) + "\n")
+        replies.flush()
+
+    failed = preload([m for m in options.preload.split(",") if m])
+    reply({"id": 0, "ready": True, "failed": failed})
+
+    selector = selectors.DefaultSelector()
+    stdin_fd = sys.stdin.fileno()
+    selector.register(stdin_fd, selectors.EVENT_READ, None)
+    children = {}
+    pending = b""
+
+    def start(request):
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            selector.close()
+            os.close(read_fd)
+            run_child(request["args"], write_fd)
+        os.close(write_fd)
+        deadline = time.monotonic() + request.get("timeout", 300)
+        children[read_fd] = {"id": request["id"], "pid": pid, "deadline": deadline, "chunks": []}
+        selector.register(read_fd, selectors.EVENT_READ, read_fd)
+
+    def cancel(request_id):
+        # The client stopped waiting; the reply to the killed run is ignored
+        for child in children.values():
+            if child["id"] == request_id and not child.get("killed"):
+                child["killed"] = True
+                os.kill(child["pid"], signal.SIGKILL)
+
+    def finish(read_fd):
+        child = children.pop(read_fd)
+        selector.unregister(read_fd)
+        os.close(read_fd)
+        _, status = os.waitpid(child["pid"], 0)
+        output = b"".join(child["chunks"]).decode("utf-8", errors="replace")
+        if child.get("timed_out"):
+            output += "\nTest run timed out."
+        reply({"id": child["id"], "exit_code": exit_code(status), "output": output})
+
+    while True:
+        deadlines = [c["deadline"] for c in children.values() if not c.get("killed")]
+        timeout = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+        for key, _ in selector.select(timeout):
+            if key.data is None:
+                data = os.read(stdin_fd, 65536)
+                if not data:
+                    for child in children.values():
+                        os.kill(child["pid"], signal.SIGKILL)
+                    return
+                pending += data
+                while b"\n" in pending:
+                    line, pending = pending.split(b"\n", 1)
+                    if line.strip():
+                        request = json.loads(line)
+                        if "cancel" in request:
+                            cancel(request["cancel"])
+                        else:
+                            start(request)
+            else:
+                chunk = os.read(key.data, 65536)
+                if chunk:
+                    children[key.data]["chunks"].append(chunk)
+                else:
+                    finish(key.data)
+
+        now = time.monotonic()
+        for child in children.values():
+            if not child.get("killed") and child["deadline"] <= now:
+                child["killed"] = child["timed_out"] = True
+                os.kill(child["pid"], signal.SIGKILL)
+
+
+if __name__ == "__main__":
+    main()
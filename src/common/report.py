@@ -0,0 +1,128 @@
+import json
+import threading
+import time
+from typing import Dict, List, Optional
+
+# Report statuses of files that got no workflow run, so their duration says nothing
+NOT_RUN_STATUSES = ("not_selected", "skipped")
+
+
+class RunReport:
+    """
+    Per-file results of a `generate` run, written as JSON.
+
+    The manifest lists every file the run was responsible for (its shard), so
+    merged reports can show which files never produced a result.
+    """
+
+    def __init__(self, shard: Optional[str] = None):
+        self.shard = shard
+        self.manifest: List[str] = []
+        self.files: Dict[str, dict] = {}
+        self.tokens = 0
+        self.elapsed = 0.0
+        self._lock = threading.Lock()
+
+    def set_manifest(self, files: List[str]):
+        self.manifest = sorted(files)
+
+    def add(
+        self,
+        file_path: str,
+        status: str,
+        duration: float,
+        stop_reason: Optional[str] = None,
+        retries: int = 0,
+        error: Optional[str] = None,
+    ):
+        entry = {
+            "status": status,
+            "stop_reason": stop_reason,
+            "retries": retries,
+            "duration": round(duration, 3),
+        }
+        if error:
+            entry["error"] = error
+        with self._lock:
+            self.files[file_path] = entry
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            files = dict(self.files)
+        return {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "shards": [self.shard] if self.shard else [],
+            "manifest": self.manifest,
+            "files": files,
+            "totals": summarize(files, self.manifest, self.tokens, self.elapsed),
+        }
+
+    def write(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2, sort_keys=True)
+
+
+def summarize(files: Dict[str, dict], manifest: List[str], tokens: int, elapsed: float) -> dict:
+    statuses: Dict[str, int] = {}
+    for entry in files.values():
+        statuses[entry["status"]] = statuses.get(entry["status"], 0) + 1
+    return {
+        "files": len(files),
+        "missing": len(set(manifest) - set(files)),
+        "statuses": statuses,
+        "tokens": tokens,
+        "elapsed": round(elapsed, 3),
+    }
+
+
+def load_durations(path: str) -> Dict[str, float]:
+    """
+    Reads per-file durations from a previous (possibly merged) run report.
+    Files that were not run, or took no measurable time, are left out so that
+    sharding estimates them from their size instead.
+    """
+    with open(path, "r") as f:
+        report = json.load(f)
+    return {
+        name: entry["duration"]
+        for name, entry in report.get("files", {}).items()
+        if entry["status"] not in NOT_RUN_STATUSES and entry["duration"] > 0
+    }
+
+
+def load_hard_files(path: str, min_retries: int = 2) -> List[str]:
+    """
+    Reads the files that needed at least min_retries repair rounds in a
+    previous (possibly merged) run report.
+    """
+    with open(path, "r") as f:
+        report = json.load(f)
+    return sorted(
+        name
+        for name, entry in report.get("files", {}).items()
+        if entry.get("retries", 0) >= min_retries
+    )
+
+
+def merge_reports(reports: List[dict]) -> dict:
+    """
+    Combines per-shard reports into one. Elapsed time is the slowest shard,
+    since shards run in parallel.
+    """
+    shards, manifest, files = [], set(), {}
+    tokens, elapsed = 0, 0.0
+    for report in reports:
+        shards.extend(report.get("shards", []))
+        manifest.update(report.get("manifest", []))
+        files.update(report.get("files", {}))
+        tokens += report.get("totals", {}).get("tokens", 0)
+        elapsed = max(elapsed, report.get("totals", {}).get("elapsed", 0.0))
+
+    merged_manifest = sorted(manifest)
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "shards": sorted(shards, key=lambda s: [int(p) for p in s.split("/")]),
+        "manifest": merged_manifest,
+        "files": dict(sorted(files.items())),
+        "totals": summarize(files, merged_manifest, tokens, elapsed),
+    }
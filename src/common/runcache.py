@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+CACHE_DIR = ".autoqa/cache/test-runs"
+# Bump when the meaning of a cached result changes
+CACHE_VERSION = 1
+
+# Files in the project root that decide which dependencies and test settings a run uses
+ENVIRONMENT_FILES = (
+    "requirements.txt",
+    "requirements-dev.txt",
+    "poetry.lock",
+    "Pipfile.lock",
+    "uv.lock",
+    "pdm.lock",
+    "pyproject.toml",
+    "setup.cfg",
+    "pytest.ini",
+    "tox.ini",
+    "conftest.py",
+    "package.json",
+    "package-lock.json",
+    "yarn.lock",
+    "pnpm-lock.yaml",
+    "jest.config.js",
+    "babel.config.js",
+    "cypress.config.js",
+)
+
+
+# Exit codes of a finished run whose tests passed or failed; any other code means
+# the runner itself failed (pytest: interrupted, internal or usage error, no tests)
+VERDICT_EXIT_CODES = (0, 1)
+# Appended by the fork server when it kills a run at its timeout
+TIMEOUT_MARKER = "Test run timed out."
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class RunCache:
+    """
+    Results of earlier test runs, keyed by the test code, the source under
+    test, the framework and the project's environment files. Each result is a
+    small JSON file, written atomically so concurrent runs never see half of one.
+    """
+
+    def __init__(self, directory: str = CACHE_DIR):
+        self.enabled = False
+        self.directory = Path(directory)
+        self._fingerprints: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, enabled: bool, directory: Optional[str] = None):
+        self.enabled = enabled
+        if directory:
+            self.directory = Path(directory)
+
+    def fingerprint(self, project_root: str) -> str:
+        """
+        Hashes the Python version and the environment files of project_root.
+        Computed once per project root and process.
+        """
+        root = str(Path(project_root).resolve())
+        with self._lock:
+            if root in self._fingerprints:
+                return self._fingerprints[root]
+        parts = [sys.version]
+        for name in ENVIRONMENT_FILES:
+            path = Path(root) / name
+            if path.is_file():
+                parts.append(f"{name}\0{hashlib.sha256(path.read_bytes()).hexdigest()}")
+        fingerprint = _digest("\n".join(parts))
+        with self._lock:
+            self._fingerprints[root] = fingerprint
+        return fingerprint
+
+    def key(
+        self,
+        project_root: str,
+        test_type: str,
+        framework: str,
+        test_path: str,
+        test_code: str,
+        source_code: str,
+    ) -> str:
+        location = os.path.relpath(Path(test_path).resolve(), Path(project_root).resolve())
+        return _digest(
+            json.dumps(
+                [
+                    CACHE_VERSION,
+                    test_type,
+                    framework,
+                    location,
+                    _digest(test_code),
+                    _digest(source_code),
+                    self.fingerprint(project_root),
+                ]
+            )
+        )
+
+    def cacheable(self, test_type: str, exit_code: int, output: str) -> bool:
+        """
+        Whether a result says something about the tests alone. e2e results also
+        depend on the running app, and runner failures and timeouts are transient.
+        """
+        if test_type != "unit" or exit_code not in VERDICT_EXIT_CODES:
+            return False
+        return not output.rstrip().endswith(TIMEOUT_MARKER)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Tuple[int, str]]:
+        """
+        Returns the cached (exit code, output) for key, or None.
+        """
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                entry = json.load(f)
+            return entry["exit_code"], entry["output"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def put(self, key: str, exit_code: int, output: str):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        entry = {"exit_code": exit_code, "output": output, "created": time.time()}
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp, path)
+        except OSError:
+            # A result that cannot be cached is only run again next time
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+
+
+# Used by runner_node when enabled (the default for CLI runs, off with --no-run-cache)
+run_cache = RunCache()
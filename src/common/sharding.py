@@ -0,0 +1,66 @@
+import hashlib
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """
+    Parses "i/N" (1-based) into (i, N).
+    """
+    try:
+        index, total = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise ValueError(f"Invalid shard '{value}', expected i/N (e.g. 2/5).") from None
+    if total < 1 or not 1 <= index <= total:
+        raise ValueError(f"Invalid shard '{value}', i must be between 1 and N.")
+    return index, total
+
+
+def stable_hash(key: str) -> int:
+    return int(hashlib.sha1(key.encode("utf-8")).hexdigest()[:12], 16)
+
+
+def assign_shards(weights: Dict[str, float], total: int) -> Dict[str, int]:
+    """
+    Assigns every key to a 1-based shard so that shard weights are balanced.
+
+    Keys are placed heaviest first on the least loaded shard (ties broken by a
+    stable hash of the key and then by shard number), so every machine that
+    sees the same keys and weights computes the same assignment.
+    """
+    loads = [0.0] * total
+    assignment = {}
+    for key in sorted(weights, key=lambda k: (-weights[k], stable_hash(k), k)):
+        shard = min(range(total), key=lambda s: (loads[s], s))
+        loads[shard] += weights[key]
+        assignment[key] = shard + 1
+    return assignment
+
+
+def select_shard(
+    files: List[Path],
+    project_root: str,
+    index: int,
+    total: int,
+    durations: Optional[Dict[str, float]] = None,
+) -> List[Path]:
+    """
+    Returns the files that belong to shard index of total.
+
+    Files are weighted by their historical duration when known, otherwise by
+    their size in bytes scaled to the average known duration per byte.
+    """
+    durations = durations or {}
+    by_key = {str(f.relative_to(project_root)): f for f in files}
+    sizes = {key: max(f.stat().st_size, 1) for key, f in by_key.items()}
+
+    known = [key for key in by_key if key in durations]
+    seconds_per_byte = (
+        sum(durations[k] for k in known) / sum(sizes[k] for k in known) if known else 1.0
+    )
+    weights = {
+        key: durations[key] if key in durations else sizes[key] * seconds_per_byte for key in by_key
+    }
+
+    assignment = assign_shards(weights, total)
+    return sorted(f for key, f in by_key.items() if assignment[key] == index)
@@ -0,0 +1,186 @@
+import ast
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional
+
+# Files up to this size are cheaper to send as they are than as an outline
+RAW_LIMIT = 2000
+MAX_OUTLINE_CHARS = 4000
+MAX_LINE_CHARS = 160
+CACHE_SIZE = 1024
+
+JS_EXTENSIONS = (".js", ".jsx", ".ts", ".tsx", ".mjs", ".cjs")
+
+JS_OUTLINE = re.compile(
+    r"""^\s*(
+        (import|export)\b
+      | (const|let|var)\s+\w+\s*=\s*require\(
+      | (async\s+)?function\b
+      | (abstract\s+)?class\b
+      | (const|let|var)\s+\w+\s*=\s*(async\s+)?(\([^)]*\)|\w+)\s*=>
+      | (public|private|protected|static|async|get|set|\s)*\w+\s*\([^)]*\)\s*(:\s*[^{]+)?\{\s*$
+      | (app|router|server)\.(get|post|put|patch|delete|use|route)\(
+      | (interface|type|enum)\s+\w+
+    )""",
+    re.VERBOSE,
+)
+
+JS_KEYWORD_CALLS = re.compile(r"^\s*(if|for|while|switch|catch|return)\b")
+
+PY_OUTLINE = re.compile(r"^\s*(@|(async\s+)?def\s|class\s|import\s|from\s+\S+\s+import\s)")
+
+_cache: "OrderedDict[str, str]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _clip(line: str) -> str:
+    line = line.rstrip()
+    return line if len(line) <= MAX_LINE_CHARS else line[: MAX_LINE_CHARS - 3] + "..."
+
+
+def _first_line(node: ast.AST) -> Optional[str]:
+    docstring = ast.get_docstring(node)
+    return docstring.strip().splitlines()[0] if docstring and docstring.strip() else None
+
+
+def _signature(node, source: str) -> str:
+    def segment(expr) -> str:
+        return " ".join((ast.get_source_segment(source, expr) or "...").split())
+
+    args = node.args
+    parts: List[str] = []
+    positional = [*getattr(args, "posonlyargs", []), *args.args]
+    defaults = [None] * (len(positional) - len(args.defaults)) + list(args.defaults)
+
+    def parameter(arg, default) -> str:
+        if not arg.annotation:
+            return arg.arg + (f"={segment(default)}" if default else "")
+        text = f"{arg.arg}: {segment(arg.annotation)}"
+        return text + (f" = {segment(default)}" if default else "")
+
+    for index, (arg, default) in enumerate(zip(positional, defaults)):
+        parts.append(parameter(arg, default))
+        if getattr(args, "posonlyargs", None) and index == len(args.posonlyargs) - 1:
+            parts.append("/")
+    if args.vararg:
+        parts.append(f"*{args.vararg.arg}")
+    elif args.kwonlyargs:
+        parts.append("*")
+    for arg, default in zip(args.kwonlyargs, args.kw_defaults):
+        parts.append(parameter(arg, default))
+    if args.kwarg:
+        parts.append(f"**{args.kwarg.arg}")
+    returns = f" -> {segment(node.returns)}" if node.returns else ""
+    prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+    return f"{prefix} {node.name}({', '.join(parts)}){returns}"
+
+
+def _python_outline(source: str) -> Optional[List[str]]:
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return None
+
+    lines: List[str] = []
+    docstring = _first_line(tree)
+    if docstring:
+        lines.append(f'"""{docstring}"""')
+
+    def visit(body, indent: str):
+        names = []
+        for node in body:
+            if isinstance(node, (ast.Import, ast.ImportFrom)) and not indent:
+                lines.append(" ".join((ast.get_source_segment(source, node) or "").split()))
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                for decorator in node.decorator_list:
+                    lines.append(f"{indent}@{ast.get_source_segment(source, decorator)}")
+                if isinstance(node, ast.ClassDef):
+                    bases = ", ".join(
+                        ast.get_source_segment(source, b) or "..." for b in node.bases
+                    )
+                    header = f"class {node.name}({bases}):" if bases else f"class {node.name}:"
+                    lines.append(indent + header)
+                else:
+                    lines.append(f"{indent}{_signature(node, source)}:")
+                docstring = _first_line(node)
+                if docstring:
+                    lines.append(f'{indent}    """{docstring}"""')
+                if isinstance(node, ast.ClassDef):
+                    visit(node.body, indent + "    ")
+            elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+                targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+                names.extend(t.id for t in targets if isinstance(t, ast.Name))
+            elif isinstance(node, ast.If) and not indent and "__main__" in ast.dump(node.test):
+                lines.append('if __name__ == "__main__": ...')
+        if names:
+            lines.append(f"{indent}# assigns: {', '.join(names)}")
+
+    visit(tree.body, "")
+    return lines
+
+
+def _pattern_outline(source: str, pattern, exclude=None) -> List[str]:
+    return [
+        line.rstrip().rstrip("{").rstrip()
+        for line in source.splitlines()
+        if pattern.match(line) and not (exclude and exclude.match(line))
+    ]
+
+
+def _stats(path: Path, source: str) -> str:
+    line_count = source.count("\n") + (0 if source.endswith("\n") else 1)
+    return f"# {path.name}: {line_count} lines, {len(source.encode('utf-8'))} bytes"
+
+
+def outline(file_path: str, source: str) -> str:
+    """
+    Returns a compact skeleton of source: size stats, imports, class and
+    function signatures with decorators and docstring first lines. Bodies are
+    left out. Unknown file types keep their first lines.
+    """
+    path = Path(file_path)
+    lines = None
+    if path.suffix == ".py":
+        lines = _python_outline(source)
+        if lines is None:
+            lines = _pattern_outline(source, PY_OUTLINE)
+    elif path.suffix in JS_EXTENSIONS:
+        lines = _pattern_outline(source, JS_OUTLINE, JS_KEYWORD_CALLS)
+        if re.search(r"<[A-Z][\w.]*[\s/>]", source):
+            lines.append("// renders JSX")
+    if not lines:
+        lines = source.splitlines()[:40]
+
+    lines = [_stats(path, source), *(_clip(line) for line in lines)]
+    kept, size = 0, 0
+    for line in lines:
+        size += len(line) + 1
+        if size > MAX_OUTLINE_CHARS:
+            break
+        kept += 1
+    if kept < len(lines):
+        lines = [*lines[:kept], f"# ... {len(lines) - kept} more outline lines"]
+    return "\n".join(lines)
+
+
+def summarize(file_path: str, source: str) -> str:
+    """
+    Returns what classification prompts show of a file: small files as they
+    are, larger ones as their outline. Outlines are cached by content hash.
+    """
+    if len(source) <= RAW_LIMIT:
+        return source
+    key = hashlib.sha256(f"{Path(file_path).suffix}\0{source}".encode("utf-8")).hexdigest()
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    text = outline(file_path, source)
+    with _cache_lock:
+        _cache[key] = text
+        if len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return text
@@ -1,8 +1,19 @@
+import asyncio
+import atexit
 import os
+import threading
+from collections import Counter
+from concurrent.futures import Future
+from typing import Dict, List, Optional
 
 import click
 import httpx
 
+from common.tracing import Span, tracer
+
+# Slack rejects very long messages, so digests are split into chunks of this size
+DIGEST_CHUNK_CHARS = 3500
+
 
 def post_slack_notification(text: str, webhook_url: str = None):
     webhook = webhook_url or os.getenv("SLACK_WEBHOOK_URL")
@@ -20,3 +31,158 @@ def post_slack_notification(text: str, webhook_url: str = None):
             click.echo("[Slack]: Notification sent.")
     except Exception as e:
         click.echo(f"[Slack Error]: {e}")
+
+
+class SlackNotifier:
+    """
+    Sends Slack messages in the background over one pooled async HTTP client.
+
+    Calls return immediately; messages are delivered by an event loop running on
+    a daemon thread. In digest mode per-file results are collected and posted as
+    one summary per webhook on flush(), close() or every digest_interval seconds.
+    """
+
+    def __init__(self, digest: bool = False, digest_interval: Optional[float] = None):
+        self.digest = digest
+        self.digest_interval = digest_interval
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._pending: List[Future] = []
+        self._results: Dict[str, List[dict]] = {}
+        self._timer: Optional[threading.Timer] = None
+
+    def configure(self, digest: bool = False, digest_interval: Optional[float] = None):
+        self.digest = digest or bool(digest_interval)
+        self.digest_interval = digest_interval
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._loop is not None:
+                return
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(
+                target=self._loop.run_forever, name="autoqa-slack", daemon=True
+            )
+            self._thread.start()
+
+    async def _send(self, webhook: str, text: str, span: Optional[Span] = None):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=10,
+                limits=httpx.Limits(max_connections=10, max_keepalive_connections=5),
+            )
+        try:
+            response = await self._client.post(webhook, json={"text": text})
+            if response.status_code != 200:
+                click.echo(f"[Slack Error]: {response.status_code} - {response.text}")
+            else:
+                click.echo("[Slack]: Notification sent.")
+        except Exception as e:
+            click.echo(f"[Slack Error]: {e}")
+        finally:
+            tracer.end(span)
+
+    def post(self, text: str, webhook_url: str = None):
+        """
+        Queues a message for immediate background delivery.
+        """
+        webhook = webhook_url or os.getenv("SLACK_WEBHOOK_URL")
+        if not webhook:
+            click.echo("\n[Slack Notification Skipped]: No webhook URL configured.\n")
+            return
+
+        self._ensure_started()
+        # Posts overlap on the event loop thread, so their spans are detached
+        span = tracer.start("slack post", "slack", detached=True)
+        future = asyncio.run_coroutine_threadsafe(self._send(webhook, text, span), self._loop)
+        with self._lock:
+            self._pending = [f for f in self._pending if not f.done()]
+            self._pending.append(future)
+
+    def report(self, text: str, file_path: str, status: str, webhook_url: str = None):
+        """
+        Posts a per-file result, or adds it to the digest in digest mode.
+        """
+        if not self.digest:
+            self.post(text, webhook_url)
+            return
+
+        webhook = webhook_url or os.getenv("SLACK_WEBHOOK_URL")
+        if not webhook:
+            return
+        with self._lock:
+            self._results.setdefault(webhook, []).append({"file": file_path, "status": status})
+            if self.digest_interval and self._timer is None:
+                self._timer = threading.Timer(self.digest_interval, self._interval_flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _interval_flush(self):
+        with self._lock:
+            self._timer = None
+        self.flush()
+
+    def flush(self):
+        """
+        Posts one digest message per webhook for the results collected so far.
+        """
+        with self._lock:
+            results, self._results = self._results, {}
+        for webhook, entries in results.items():
+            for chunk in format_digest(entries):
+                self.post(chunk, webhook)
+
+    def close(self, timeout: float = 30):
+        """
+        Flushes the digest, waits for queued messages and stops the client.
+        """
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        self.flush()
+
+        with self._lock:
+            pending, self._pending = self._pending, []
+            loop, self._loop = self._loop, None
+        for future in pending:
+            try:
+                future.result(timeout=timeout)
+            except Exception as e:
+                click.echo(f"[Slack Error]: {e}")
+
+        if loop is None:
+            return
+        if self._client is not None:
+            asyncio.run_coroutine_threadsafe(self._client.aclose(), loop).result(timeout=timeout)
+            self._client = None
+        loop.call_soon_threadsafe(loop.stop)
+        self._thread.join(timeout=timeout)
+        loop.close()
+
+
+def format_digest(entries: List[dict]) -> List[str]:
+    """
+    Formats collected results as one or more Slack messages.
+    """
+    counts = Counter(entry["status"] for entry in entries)
+    summary = ", ".join(f"{count} {status}" for status, count in sorted(counts.items()))
+    header = f"*AutoQA Run Summary*\n*Files:* {len(entries)} ({summary})\n\n"
+
+    chunks = []
+    current = header
+    for entry in entries:
+        line = f"• `{entry['file']}`: {entry['status']}\n"
+        if len(current) + len(line) > DIGEST_CHUNK_CHARS:
+            chunks.append(current)
+            current = "*AutoQA Run Summary (continued)*\n\n"
+        current += line
+    chunks.append(current)
+    return chunks
+
+
+# Shared by every workflow in the process
+notifier = SlackNotifier()
+atexit.register(notifier.close)
@@ -0,0 +1,201 @@
+import ast
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Dict, List, Optional
+
+SOURCE_EXTENSIONS = {
+    "pytest": [".py"],
+    "jest": [".js", ".jsx", ".ts", ".tsx"],
+}
+
+SKIP_DIRS = {"node_modules", "__pycache__", "venv", "dist", "build"}
+
+JS_IMPORT = re.compile(r"""(?:from\s+|require\(\s*|import\(\s*)['"](\.{1,2}/[^'"]+)['"]""")
+
+
+def run_suite(
+    project_root: str, framework: str, test_paths: Optional[List[str]] = None
+) -> Dict[str, str]:
+    """
+    Runs the test suite once and returns the failure output of every failing
+    test file, keyed by its path relative to project_root.
+    """
+    env = os.environ.copy()
+    env["CI"] = "1"
+    with tempfile.TemporaryDirectory() as tmp:
+        if framework == "pytest":
+            results_path = Path(tmp) / "results.xml"
+            command = [
+                str(Path(sys.executable).parent / "pytest"),
+                "-q",
+                "-o",
+                "junit_family=xunit1",
+                f"--junitxml={results_path}",
+                "--continue-on-collection-errors",
+                *(test_paths or []),
+            ]
+        elif framework == "jest":
+            results_path = Path(tmp) / "results.json"
+            command = [
+                "npx",
+                "--yes",
+                "jest",
+                "--json",
+                f"--outputFile={results_path}",
+                *(test_paths or []),
+            ]
+        else:
+            raise ValueError(f"Bulk repair supports pytest and jest, not {framework}")
+
+        result = subprocess.run(
+            command, capture_output=True, text=True, cwd=project_root, timeout=3600, env=env
+        )
+        if not results_path.exists():
+            raise RuntimeError(
+                f"Test run produced no results (exit code {result.returncode}):\n"
+                f"{result.stdout}\n{result.stderr}"
+            )
+        if framework == "pytest":
+            return parse_junit_failures(results_path.read_text())
+        return parse_jest_failures(results_path.read_text(), project_root)
+
+
+def parse_junit_failures(xml_text: str) -> Dict[str, str]:
+    """
+    Groups failures and errors of a pytest junit-xml (xunit1) report by test file.
+    """
+    failures: Dict[str, List[str]] = {}
+    for case in ET.fromstring(xml_text).iter("testcase"):
+        problems = [child for child in case if child.tag in ("failure", "error")]
+        if not problems:
+            continue
+        test_file = case.get("file") or case.get("classname", "").replace(".", "/") + ".py"
+        name = f"{case.get('classname')}::{case.get('name')}".lstrip(":")
+        for problem in problems:
+            failures.setdefault(test_file, []).append(
+                f"{name}: {problem.get('message', '')}\n{problem.text or ''}"
+            )
+    return {test_file: "\n\n".join(messages) for test_file, messages in failures.items()}
+
+
+def parse_jest_failures(json_text: str, project_root: str) -> Dict[str, str]:
+    """
+    Returns the failure messages of a `jest --json` report by test file.
+    """
+    failures = {}
+    root = Path(project_root).resolve()
+    for suite in json.loads(json_text).get("testResults", []):
+        if suite.get("status") != "failed":
+            continue
+        test_file = Path(suite["name"])
+        if test_file.is_absolute() and root in test_file.parents:
+            test_file = test_file.relative_to(root)
+        failures[str(test_file)] = suite.get("message", "")
+    return failures
+
+
+def source_stem(test_file: Path) -> Optional[str]:
+    """
+    Returns the source file stem a test file is named after, e.g.
+    test_cart.py, cart_test.py, cart.test.js and cart.spec.ts all give "cart".
+    """
+    name = test_file.name
+    if test_file.suffix == ".py":
+        if name.startswith("test_"):
+            return test_file.stem[len("test_") :]
+        if test_file.stem.endswith("_test"):
+            return test_file.stem[: -len("_test")]
+        return None
+    match = re.match(r"^(.+)\.(test|spec)\.[jt]sx?$", name)
+    return match.group(1) if match else None
+
+
+def index_sources(project_root: str, framework: str) -> Dict[str, List[Path]]:
+    """
+    Maps every non-test source file stem in the project to its paths.
+    """
+    exts = SOURCE_EXTENSIONS[framework]
+    index: Dict[str, List[Path]] = {}
+    for dirpath, dirnames, filenames in os.walk(Path(project_root).resolve()):
+        dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS and not d.startswith(".")]
+        for filename in filenames:
+            path = Path(dirpath) / filename
+            if path.suffix in exts and source_stem(path) is None:
+                index.setdefault(path.stem, []).append(path)
+    return index
+
+
+def _shared_tail(a: Path, b: Path) -> int:
+    shared = 0
+    for x, y in zip(reversed(a.parts), reversed(b.parts)):
+        if x != y:
+            break
+        shared += 1
+    return shared
+
+
+def _imported_sources(test_file: Path, project_root: Path, framework: str) -> List[Path]:
+    try:
+        code = test_file.read_text(encoding="utf-8")
+    except (OSError, UnicodeDecodeError):
+        return []
+
+    candidates = []
+    if framework == "pytest":
+        try:
+            tree = ast.parse(code)
+        except SyntaxError:
+            return []
+        modules = []
+        for node in ast.walk(tree):
+            if isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                modules.append(node.module)
+            elif isinstance(node, ast.Import):
+                modules.extend(alias.name for alias in node.names)
+        for module in modules:
+            relative = Path(*module.split("."))
+            for base in (project_root, project_root / "src"):
+                candidates += [base / relative.with_suffix(".py"), base / relative / "__init__.py"]
+    else:
+        for spec in JS_IMPORT.findall(code):
+            base = (test_file.parent / spec).resolve()
+            candidates.append(base)
+            for ext in SOURCE_EXTENSIONS["jest"]:
+                candidates += [base.with_name(base.name + ext), base / f"index{ext}"]
+
+    return [c for c in candidates if c.is_file() and source_stem(c) is None]
+
+
+def find_source_file(
+    test_file: Path,
+    project_root: str,
+    framework: str,
+    index: Optional[Dict[str, List[Path]]] = None,
+) -> Optional[Path]:
+    """
+    Finds the source file a test file (absolute or relative to project_root)
+    covers: first by naming convention, preferring the file whose directories
+    best match the test's, then by the project files the test imports.
+    """
+    root = Path(project_root).resolve()
+    test_path = test_file if test_file.is_absolute() else root / test_file
+    if index is None:
+        index = index_sources(project_root, framework)
+
+    stem = source_stem(test_path)
+    matches = index.get(stem, []) if stem else []
+    if matches:
+        test_dir = test_path.parent.relative_to(root) if root in test_path.parents else Path()
+        return max(
+            matches,
+            key=lambda m: (_shared_tail(m.parent.relative_to(root), test_dir), -len(m.parts)),
+        )
+
+    imported = _imported_sources(test_path, root, framework)
+    return imported[0] if imported else None
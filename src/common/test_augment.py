@@ -0,0 +1,192 @@
+from pathlib import Path
+
+import pytest
+
+from common.augment import (
+    CoverageResult,
+    append_tests,
+    fixture_context,
+    measure_coverage,
+    parse_coverage_py,
+    parse_istanbul,
+    render_regions,
+    uncovered_regions,
+)
+
+SOURCE = """import math
+
+
+class Cart:
+    def __init__(self):
+        self.items = []
+
+    def total(self, discount=0):
+        if discount:
+            return sum(self.items) * (1 - discount)
+        return sum(self.items)
+
+
+def unused():
+    return math.pi
+
+
+if __name__ == "__main__":
+    print(Cart().total())
+"""
+
+PYTEST_FILE = '''"""Cart tests."""
+import pytest
+
+from cart import Cart
+
+BASE = 10
+
+
+@pytest.fixture
+def cart():
+    return Cart()
+
+
+def make_items(n):
+    return list(range(n))
+
+
+def test_total(cart):
+    assert cart.total() == 0
+
+
+class TestCart:
+    def test_empty(self, cart):
+        assert cart.items == []
+'''
+
+JEST_FILE = """const { Cart } = require("./cart");
+jest.mock("./db", () => ({
+  save: jest.fn(),
+}));
+
+describe("Cart", () => {
+  let cart;
+  beforeEach(() => {
+    cart = new Cart();
+  });
+
+  it("starts empty", () => {
+    expect(cart.total()).toBe(0);
+  });
+});
+"""
+
+
+def test_parse_coverage_py_counts_partial_branches(tmp_path):
+    report = {
+        "files": {
+            "cart.py": {
+                "missing_lines": [10, 15],
+                "missing_branches": [[9, 10]],
+                "summary": {"percent_covered": 62.5},
+            }
+        }
+    }
+
+    coverage = parse_coverage_py(report, (tmp_path / "cart.py").resolve(), str(tmp_path), True, "")
+
+    assert coverage.uncovered_lines == [9, 10, 15]
+    assert coverage.percent == 62.5
+
+
+def test_parse_coverage_py_requires_executed_source(tmp_path):
+    with pytest.raises(ValueError, match="never executed"):
+        parse_coverage_py({"files": {}}, tmp_path / "cart.py", str(tmp_path), True, "")
+
+
+def test_parse_istanbul(tmp_path):
+    source = tmp_path / "cart.js"
+    report = {
+        str(source): {
+            "statementMap": {
+                "0": {"start": {"line": 2}, "end": {"line": 2}},
+                "1": {"start": {"line": 5}, "end": {"line": 6}},
+            },
+            "s": {"0": 3, "1": 0},
+            "branchMap": {
+                "0": {
+                    "loc": {"start": {"line": 3}},
+                    "locations": [{"start": {"line": 3}}, {"start": {"line": 4}}],
+                }
+            },
+            "b": {"0": [2, 0]},
+            "fnMap": {"0": {"name": "total", "loc": {"start": {"line": 1}, "end": {"line": 7}}}},
+            "f": {"0": 3},
+        }
+    }
+
+    coverage = parse_istanbul(report, source, True, "")
+
+    assert coverage.uncovered_lines == [4, 5, 6]
+    assert coverage.functions == [(1, 7, "total")]
+    assert coverage.percent == 50.0
+
+
+def test_uncovered_regions_group_by_innermost_function():
+    coverage = CoverageResult(passed=True, output="", uncovered_lines=[9, 10, 15, 19])
+
+    regions = uncovered_regions(SOURCE, coverage, "pytest")
+
+    assert [(r.name, r.start, r.end, r.uncovered_lines) for r in regions] == [
+        ("Cart.total", 8, 11, [9, 10]),
+        ("unused", 14, 15, [15]),
+        ("module", 19, 19, [19]),
+    ]
+    rendered = render_regions(SOURCE, regions)
+    assert "Cart.total (lines 8-11, not covered: 9-10)" in rendered
+    assert "   10:             return sum(self.items) * (1 - discount)" in rendered
+    # Covered code stays out of the prompt
+    assert "self.items = []" not in rendered
+
+
+def test_fixture_context_pytest_drops_tests():
+    context = fixture_context(PYTEST_FILE, "pytest")
+
+    assert "from cart import Cart" in context
+    assert "@pytest.fixture\ndef cart():" in context
+    assert "def make_items(n):" in context
+    assert "BASE = 10" in context
+    assert "test_total" not in context
+    assert "TestCart" not in context
+    assert "Cart tests." not in context
+
+
+def test_fixture_context_jest_keeps_setup():
+    context = fixture_context(JEST_FILE, "jest")
+
+    assert context.splitlines() == [
+        'const { Cart } = require("./cart");',
+        'jest.mock("./db", () => ({',
+        "  save: jest.fn(),",
+        "}));",
+        "  beforeEach(() => {",
+        "    cart = new Cart();",
+        "  });",
+    ]
+
+
+def test_append_tests():
+    assert append_tests("def test_a():\n    pass\n", "def test_b():\n    pass") == (
+        "def test_a():\n    pass\n\n\ndef test_b():\n    pass\n"
+    )
+
+
+def test_measure_coverage_pytest(tmp_path):
+    pytest.importorskip("coverage")
+    (tmp_path / "calc.py").write_text(
+        "def add(a, b):\n    if a > 10:\n        return 0\n    return a + b\n\n\n"
+        "def unused():\n    return 1\n"
+    )
+    test_file = tmp_path / "test_calc.py"
+    test_file.write_text("from calc import add\n\n\ndef test_add():\n    assert add(1, 2) == 3\n")
+
+    coverage = measure_coverage(Path(tmp_path / "calc.py"), test_file, str(tmp_path), "pytest")
+
+    assert coverage.passed
+    assert coverage.uncovered_lines == [2, 3, 8]
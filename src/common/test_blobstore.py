@@ -0,0 +1,45 @@
+import pytest
+
+from common.blobstore import BLOB_PREFIX, BlobStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Provides a small blob store spilling into a temporary directory."""
+    return BlobStore(spill_dir=str(tmp_path / "blobs"), max_memory_bytes=100, inline_threshold=10)
+
+
+def test_small_values_stay_inline(store):
+    assert store.externalize("short") == "short"
+    assert store.externalize(None) is None
+    assert store.resolve("short") == "short"
+
+
+def test_large_values_become_refs(store):
+    ref = store.externalize("x" * 50)
+    assert ref.startswith(BLOB_PREFIX)
+    assert store.resolve(ref) == "x" * 50
+    # Content addressed: same text, same reference
+    assert store.put("x" * 50) == ref
+    # Already externalized values are passed through
+    assert store.externalize(ref) == ref
+
+
+def test_spills_to_disk_when_memory_is_full(store, tmp_path):
+    first = store.put("a" * 60)
+    second = store.put("b" * 60)
+    assert len(list((tmp_path / "blobs").rglob("*"))) == 2  # one shard dir, one blob
+    assert store.get(first) == "a" * 60
+    assert store.get(second) == "b" * 60
+
+
+def test_persist_survives_new_store(store, tmp_path):
+    ref = store.put("c" * 20)
+    store.persist(ref, "inline value", None)
+    reloaded = BlobStore(spill_dir=str(tmp_path / "blobs"))
+    assert reloaded.get(ref) == "c" * 20
+
+
+def test_missing_blob(store):
+    with pytest.raises(KeyError, match="Blob not found"):
+        store.get(BLOB_PREFIX + "0" * 64)
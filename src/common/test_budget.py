@@ -0,0 +1,42 @@
+from unittest.mock import patch
+
+from common.budget import RunBudget, UsageTracker, usage
+from common.fake_llm import FakeChatModel
+
+
+def test_usage_tracker_counts_reported_tokens():
+    tracker = UsageTracker()
+    llm = FakeChatModel(callbacks=[tracker])
+    response = llm.invoke("Generate Jest tests")
+    assert tracker.calls == 1
+    assert tracker.total_tokens == response.usage_metadata["total_tokens"]
+
+
+def test_run_budget_tokens_are_relative_to_start():
+    with patch.object(usage, "total_tokens", 500):
+        budget = RunBudget(token_budget=1000)
+    with patch.object(usage, "total_tokens", 1400):
+        assert budget.tokens_used == 900
+        assert budget.fraction_spent() == 0.9
+        assert not budget.exhausted()
+
+
+def test_run_budget_priority_cutoffs():
+    budget = RunBudget(time_budget=100)
+    with patch.object(RunBudget, "fraction_spent", return_value=0.85):
+        assert budget.allows("high")
+        assert budget.allows("medium")
+        assert not budget.allows("low")
+    with patch.object(RunBudget, "fraction_spent", return_value=0.95):
+        assert budget.allows("high")
+        assert not budget.allows("medium")
+        # Unknown priorities are treated as medium
+        assert not budget.allows(None)
+    with patch.object(RunBudget, "fraction_spent", return_value=1.0):
+        assert not budget.allows("high")
+
+
+def test_run_budget_without_limits_allows_everything():
+    budget = RunBudget()
+    assert budget.fraction_spent() == 0.0
+    assert budget.allows("low")
@@ -0,0 +1,71 @@
+import json
+
+import pytest
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from common.cassette import CassetteChatModel, load_cassette, prompt_key
+from common.fake_llm import FakeChatModel
+from common.llm import get_llm
+
+
+def test_record_then_replay(tmp_path):
+    path = tmp_path / "run.jsonl.gz"
+    recorder = CassetteChatModel(path=str(path), mode="record", inner=FakeChatModel())
+    recorded = recorder.invoke("Generate Jest tests for a.js")
+
+    entries = load_cassette(str(path))
+    assert len(entries) == 1
+    entry = next(iter(entries.values()))[0]
+    assert entry["latency"] >= 0
+    assert entry["usage"]["total_tokens"] > 0
+
+    replayer = CassetteChatModel(path=str(path), mode="replay")
+    replayed = replayer.invoke("Generate Jest tests for a.js")
+    assert replayed.content == recorded.content
+
+
+def test_replay_serves_repeated_prompts_in_order(tmp_path):
+    path = tmp_path / "run.jsonl"
+    key = prompt_key([HumanMessage(content="fix it")])
+    with open(path, "w") as f:
+        for content in ("first", "second"):
+            f.write(json.dumps({"key": key, "content": content, "latency": 0}) + "\n")
+
+    replayer = CassetteChatModel(path=str(path), mode="replay")
+    assert [replayer.invoke("fix it").content for _ in range(3)] == ["first", "second", "second"]
+
+
+def test_replay_missing_prompt(tmp_path):
+    path = tmp_path / "empty.jsonl"
+    path.write_text("")
+    replayer = CassetteChatModel(path=str(path), mode="replay")
+    with pytest.raises(ValueError, match="No recorded response"):
+        replayer.invoke("unknown")
+
+
+def test_get_llm_cassette_modes(tmp_path, monkeypatch):
+    path = tmp_path / "run.jsonl"
+    monkeypatch.setenv("AUTOQA_LLM_PROVIDER", "fake")
+    monkeypatch.setenv("AUTOQA_LLM_CASSETTE", str(path))
+    monkeypatch.setenv("AUTOQA_LLM_CASSETTE_MODE", "record")
+    recorder = get_llm()
+    assert isinstance(recorder.inner, FakeChatModel)
+    recorder.invoke("Generate Python unit tests using pytest")
+
+    monkeypatch.setenv("AUTOQA_LLM_CASSETTE_MODE", "replay")
+    replayer = get_llm()
+    assert replayer.inner is None
+    assert (
+        "def test_generated" in replayer.invoke("Generate Python unit tests using pytest").content
+    )
+
+
+def test_prompt_key_ignores_cache_breakpoints():
+    plain = [SystemMessage(content="context"), HumanMessage(content="task")]
+    cached = [
+        SystemMessage(
+            content=[{"type": "text", "text": "context", "cache_control": {"type": "ephemeral"}}]
+        ),
+        HumanMessage(content="task"),
+    ]
+    assert prompt_key(plain) == prompt_key(cached)
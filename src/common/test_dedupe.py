@@ -0,0 +1,106 @@
+from common.dedupe import group_duplicates, normalized_hash, rewrite_test_imports
+
+
+def test_normalized_hash_ignores_formatting_and_comments(tmp_path):
+    a = tmp_path / "a.py"
+    b = tmp_path / "b.py"
+    c = tmp_path / "c.py"
+    a.write_text("def add(a, b):\n    return a + b\n")
+    b.write_text("# Vendored copy\n\ndef add(a,b):\n\n    return (a + b)  # sum\n")
+    c.write_text("def add(a, b):\n    return a - b\n")
+
+    assert normalized_hash(a) == normalized_hash(b)
+    assert normalized_hash(a) != normalized_hash(c)
+
+
+def test_normalized_hash_js_comments_and_extensions(tmp_path):
+    a = tmp_path / "a.js"
+    b = tmp_path / "b.js"
+    c = tmp_path / "c.ts"
+    a.write_text("const url = 'http://x';\nexport const f = () => url;\n")
+    b.write_text("/* copied */\nconst url = 'http://x'; // keep\n  export const f = () => url;\n")
+    c.write_text(a.read_text())
+
+    assert normalized_hash(a) == normalized_hash(b)
+    assert normalized_hash(a) != normalized_hash(c)
+
+
+def test_group_duplicates_keeps_first_file_as_representative(tmp_path):
+    paths = []
+    for name, body in [("a.py", "x = 1\n"), ("b.py", "y = 2\n"), ("c.py", "x = 1  # same\n")]:
+        (tmp_path / name).write_text(body)
+        paths.append(tmp_path / name)
+
+    groups = group_duplicates(paths)
+
+    assert groups == {paths[0]: [paths[2]], paths[1]: []}
+
+
+def test_rewrite_python_imports(tmp_path):
+    test_code = (
+        "from unittest.mock import patch\n"
+        "from src.orders.vendor.money import to_cents\n\n\n"
+        "@patch('src.orders.vendor.money.round')\n"
+        "def test_to_cents(_round):\n"
+        "    assert to_cents(1) == 100\n"
+    )
+
+    rewritten = rewrite_test_imports(
+        test_code,
+        str(tmp_path),
+        str(tmp_path / "src/orders/vendor/money.py"),
+        str(tmp_path / "src/orders/vendor/test_money.py"),
+        str(tmp_path / "src/billing/vendor/money.py"),
+        str(tmp_path / "src/billing/vendor/test_money.py"),
+    )
+
+    assert "from src.billing.vendor.money import to_cents" in rewritten
+    assert "@patch('src.billing.vendor.money.round')" in rewritten
+    assert "orders" not in rewritten
+
+
+def test_rewrite_python_bare_module_only_in_imports(tmp_path):
+    test_code = "from money import to_cents\n\n\ndef test_money():\n    money = to_cents(1)\n"
+
+    rewritten = rewrite_test_imports(
+        test_code,
+        str(tmp_path),
+        str(tmp_path / "a/money.py"),
+        str(tmp_path / "a/test_money.py"),
+        str(tmp_path / "b/currency.py"),
+        str(tmp_path / "b/test_currency.py"),
+    )
+
+    assert rewritten.splitlines()[0] == "from currency import to_cents"
+    assert "    money = to_cents(1)" in rewritten
+
+
+def test_rewrite_js_relative_imports(tmp_path):
+    test_code = (
+        'const { format } = require("../../src/a/format");\n'
+        'import { pad } from "../../src/a/pad.js";\n'
+        'import { api } from "../../src/api";\n'
+        'jest.mock("../../src/a/format");\n'
+    )
+
+    rewritten = rewrite_test_imports(
+        test_code,
+        str(tmp_path),
+        str(tmp_path / "src/a/format.js"),
+        str(tmp_path / "tests/a/format.test.js"),
+        str(tmp_path / "src/lib/b/format.js"),
+        str(tmp_path / "tests/lib/b/format.test.js"),
+    )
+
+    assert rewritten.splitlines() == [
+        'const { format } = require("../../../src/lib/b/format");',
+        'import { pad } from "../../../src/lib/b/pad.js";',
+        'import { api } from "../../../src/api";',
+        'jest.mock("../../../src/lib/b/format");',
+    ]
+
+
+def test_rewrite_leaves_other_files_alone(tmp_path):
+    assert rewrite_test_imports("checklist", ".", "a.md", "m_a.txt", "b.md", "m_b.txt") == (
+        "checklist"
+    )
@@ -0,0 +1,150 @@
+import socket
+import sys
+import threading
+import time
+
+import pytest
+
+from common.e2e import (
+    AppServer,
+    E2ESessionError,
+    E2ESessions,
+    SpecBatcher,
+    parse_spec_results,
+    run_specs,
+)
+
+CYPRESS_REPORT = """<?xml version="1.0" encoding="UTF-8"?>
+<testsuites name="Mocha Tests" tests="2" failures="1">
+  <testsuite name="Root Suite" file="cypress/e2e/login.spec.js" tests="0"/>
+  <testsuite name="login" tests="2" failures="1">
+    <testcase name="login shows the form" classname="shows the form"/>
+    <testcase name="login signs in" classname="signs in">
+      <failure message="Timed out retrying" type="AssertionError">stack</failure>
+    </testcase>
+  </testsuite>
+</testsuites>
+"""
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_parse_spec_results_cypress_report(tmp_path):
+    results = parse_spec_results([CYPRESS_REPORT, "<not xml"], str(tmp_path))
+
+    spec = str(tmp_path / "cypress/e2e/login.spec.js")
+    count, failures = results[spec]
+    assert count == 2
+    assert len(failures) == 1
+    assert "Timed out retrying" in failures[0]
+
+
+def test_run_specs_maps_results_to_each_spec(tmp_path):
+    ok = tmp_path / "test_ok.py"
+    bad = tmp_path / "test_bad.py"
+    broken = tmp_path / "test_broken.py"
+    ok.write_text("def test_a():\n    pass\n\n\ndef test_b():\n    pass\n")
+    bad.write_text("def test_c():\n    assert 1 == 2\n")
+    broken.write_text("import not_a_module\n")
+
+    results = run_specs(str(tmp_path), "playwright", [str(ok), str(bad), str(broken)])
+
+    assert results[str(ok)][0] == 0
+    assert "2 tests passed" in results[str(ok)][1]
+    assert results[str(bad)][0] == 1
+    assert "assert 1 == 2" in results[str(bad)][1]
+    assert results[str(broken)][0] == 1
+    assert "not_a_module" in results[str(broken)][1]
+
+
+def test_spec_batcher_groups_concurrent_specs():
+    batches = []
+
+    def run_batch(specs):
+        batches.append(specs)
+        return {spec: (0, f"ran {spec}") for spec in specs}
+
+    batcher = SpecBatcher(run_batch, batch_size=2, batch_window=0.5)
+    futures = [batcher.submit(spec) for spec in ["a", "b", "c"]]
+
+    assert [f.result(5) for f in futures] == [(0, "ran a"), (0, "ran b"), (0, "ran c")]
+    assert batches == [["a", "b"], ["c"]]
+    batcher.close()
+
+
+def test_spec_batcher_fails_the_batch_on_errors():
+    def run_batch(specs):
+        raise RuntimeError("cypress not installed")
+
+    batcher = SpecBatcher(run_batch, batch_size=4, batch_window=0)
+    with pytest.raises(RuntimeError, match="cypress not installed"):
+        batcher.submit("a").result(5)
+    batcher.close()
+
+
+def test_cancellable_spec_runs_alone_and_is_killed(tmp_path):
+    spec = tmp_path / "test_slow.py"
+    spec.write_text("import time\n\n\ndef test_slow():\n    time.sleep(30)\n")
+    sessions = E2ESessions()
+    sessions.configure(batch_size=4, batch_window=30)
+    cancelled = threading.Event()
+    threading.Timer(1, cancelled.set).start()
+
+    start = time.monotonic()
+    with pytest.raises(RuntimeError, match="cancelled"):
+        sessions.run(str(tmp_path), "playwright", str(spec), cancelled=cancelled)
+    assert time.monotonic() - start < 10
+    # It did not wait for, or hold up, a batch
+    assert not sessions._batchers
+    sessions.close()
+
+
+def test_app_server_starts_once_and_stops(tmp_path, monkeypatch):
+    port = free_port()
+    sessions = E2ESessions()
+    sessions.configure(
+        app_command=f"{sys.executable} -m http.server {port} --bind 127.0.0.1",
+        base_url=f"http://127.0.0.1:{port}/",
+        batch_window=0,
+        startup_timeout=30,
+    )
+    batches = []
+
+    def fake_run_specs(project_root, framework, specs, base_url, timeout):
+        batches.append(specs)
+        return {spec: (0, "ok") for spec in specs}
+
+    monkeypatch.setattr("common.e2e.run_specs", fake_run_specs)
+    threads = [
+        threading.Thread(
+            target=sessions.run, args=(str(tmp_path), "cypress", str(tmp_path / f"{i}.spec.js"))
+        )
+        for i in range(3)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(sessions._servers) == 1
+    server = next(iter(sessions._servers.values()))
+    assert server.alive
+    assert sum(len(batch) for batch in batches) == 3
+    sessions.close()
+    assert not server.alive
+
+
+def test_app_server_that_exits_is_reported(tmp_path):
+    start = time.monotonic()
+    with pytest.raises(E2ESessionError, match="exited with code 3"):
+        AppServer("echo booting; exit 3", "http://127.0.0.1:9/", str(tmp_path), 30)
+    assert time.monotonic() - start < 10
+
+
+def test_app_command_needs_a_url():
+    with pytest.raises(ValueError):
+        E2ESessions().configure(app_command="npm run dev")
@@ -0,0 +1,37 @@
+import json
+
+from common.fake_llm import FakeChatModel
+from common.llm import get_llm
+
+
+def test_get_llm_env_override(monkeypatch):
+    monkeypatch.setenv("AUTOQA_LLM_PROVIDER", "fake")
+    assert isinstance(get_llm(prefered_provider="openai"), FakeChatModel)
+
+
+def test_fake_llm_classification_is_json():
+    llm = FakeChatModel()
+    response = llm.invoke("Respond ONLY in this JSON format:\n\nFile: a.py")
+    result = json.loads(response.content)
+    assert result["should_test"] is True
+    assert result["priority"] in ("high", "medium", "low")
+
+
+def test_fake_llm_is_deterministic():
+    llm = FakeChatModel()
+    prompt = "Generate Python unit tests using pytest for this file: a.py"
+    assert llm.invoke(prompt).content == llm.invoke(prompt).content
+
+
+def test_fake_llm_fail_rate_only_affects_generation():
+    llm = FakeChatModel(fail_rate=1.0)
+    generated = llm.invoke("Generate Python unit tests using pytest for this file: a.py")
+    repaired = llm.invoke("The following tests failed. Please correct the tests so they pass.")
+    assert "== -1" in generated.content
+    assert "== -1" not in repaired.content
+
+
+def test_fake_llm_reports_usage():
+    response = FakeChatModel().invoke("Generate Jest tests")
+    assert response.usage_metadata["total_tokens"] > 0
+    assert "expect(" in response.content
@@ -0,0 +1,116 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from common.forkserver import ForkServerError, ForkServers, PytestForkServer
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+
+
+@pytest.fixture
+def project(tmp_path):
+    (tmp_path / "heavy.py").write_text("import os\n\nLOADED_IN = os.getpid()\n")
+    (tmp_path / "test_ok.py").write_text(
+        "import os\n\nimport heavy\n\n\n"
+        "def test_forked():\n"
+        "    assert heavy.LOADED_IN != os.getpid()\n"
+    )
+    (tmp_path / "test_fail.py").write_text("def test_fail():\n    assert 1 == 2\n")
+    (tmp_path / "test_slow.py").write_text(
+        "import time\n\n\ndef test_slow():\n    time.sleep(30)\n"
+    )
+    return tmp_path
+
+
+@pytest.fixture
+def server(project):
+    server = PytestForkServer(str(project), preload=["heavy", "not_a_module"])
+    yield server
+    server.close()
+
+
+def test_runs_each_file_in_a_fork_of_the_preloaded_process(server, project):
+    assert "not_a_module" in server.failed_preloads
+
+    code, output = server.run([str(project / "test_ok.py")])
+    assert code == 0
+    assert "1 passed" in output
+
+    code, output = server.run([str(project / "test_fail.py")])
+    assert code == 1
+    assert "assert 1 == 2" in output
+
+
+def test_concurrent_runs_get_their_own_output(server, project):
+    files = [project / "test_ok.py", project / "test_fail.py"] * 3
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        results = list(pool.map(lambda f: server.run([str(f)]), files))
+
+    for path, (code, output) in zip(files, results):
+        assert code == (0 if path.name == "test_ok.py" else 1)
+        assert ("1 passed" in output) == (code == 0)
+
+
+def test_timeout_kills_the_run(server, project):
+    code, output = server.run([str(project / "test_slow.py")], timeout=1)
+    assert code < 0
+    assert "timed out" in output
+    # The server keeps serving after a killed run
+    assert server.run([str(project / "test_ok.py")])[0] == 0
+
+
+def test_cancelled_run_is_killed(server, project):
+    cancelled = threading.Event()
+    threading.Timer(0.5, cancelled.set).start()
+    with pytest.raises(RuntimeError, match="cancelled"):
+        server.run([str(project / "test_slow.py")], timeout=60, cancelled=cancelled)
+    # The server keeps serving, and the killed run's late reply is dropped
+    assert server.run([str(project / "test_ok.py")])[0] == 0
+    assert server.run([str(project / "test_fail.py")])[0] == 1
+
+
+def test_failed_startup_is_remembered(tmp_path, monkeypatch):
+    servers = ForkServers()
+    servers.configure(True)
+    calls = []
+
+    def fail(*args):
+        calls.append(args)
+        raise ForkServerError("Fork server did not start")
+
+    monkeypatch.setattr("common.forkserver.PytestForkServer", fail)
+    for _ in range(2):
+        with pytest.raises(ForkServerError):
+            servers.run(str(tmp_path), ["test_x.py"])
+    assert len(calls) == 1
+
+
+def test_slow_startup_does_not_block_other_projects(tmp_path, monkeypatch):
+    servers = ForkServers()
+    servers.configure(True)
+    starting, release = threading.Event(), threading.Event()
+
+    class FakeServer:
+        alive = True
+        failed_preloads = {}
+
+        def __init__(self, project_root, preload):
+            if project_root.endswith("slow"):
+                starting.set()
+                release.wait(10)
+
+        def run(self, args, timeout, cancelled):
+            return 0, "ok"
+
+    monkeypatch.setattr("common.forkserver.PytestForkServer", FakeServer)
+    (tmp_path / "slow").mkdir()
+    (tmp_path / "fast").mkdir()
+    with ThreadPoolExecutor(1) as pool:
+        slow = pool.submit(servers.run, str(tmp_path / "slow"), ["test_x.py"])
+        assert starting.wait(10)
+        assert servers.run(str(tmp_path / "fast"), ["test_x.py"]) == (0, "ok")
+        assert not slow.done()
+        release.set()
+        assert slow.result(10) == (0, "ok")
@@ -0,0 +1,102 @@
+import hashlib
+import os
+
+import pytest
+
+from common import ingest
+from common.ingest import SourceReader, hash_file, sniff
+
+SOURCE = "import os\n\n\ndef add(a, b):\n    return a + b\n\n\nclass Cart:\n    def total(self):\n        return 0\n"
+
+
+def test_oversized_files_are_skipped_without_reading(tmp_path, monkeypatch):
+    path = tmp_path / "big.py"
+    path.write_text(SOURCE)
+    reader = SourceReader()
+    reader.configure(max_file_bytes=10)
+    monkeypatch.setattr(ingest, "sniff", lambda *_: pytest.fail("read an oversized file"))
+
+    source = reader.read(path)
+
+    assert source.skip_reason.startswith("larger than 10 bytes")
+    assert source.text == ""
+    assert source.sha256 == hashlib.sha256(SOURCE.encode()).hexdigest()
+
+
+def test_oversized_files_can_be_summarized(tmp_path):
+    path = tmp_path / "big.py"
+    path.write_text(SOURCE)
+    reader = SourceReader()
+    reader.configure(max_file_bytes=10, oversized="summarize")
+
+    source = reader.read(path)
+
+    assert source.summarized and source.skip_reason is None
+    assert "def add(a, b):" in source.text
+    assert "return a + b" not in source.text
+
+
+def test_configure_rejects_bad_values():
+    with pytest.raises(ValueError):
+        SourceReader().configure(oversized="truncate")
+    with pytest.raises(ValueError):
+        SourceReader().configure(max_file_bytes=-1)
+
+
+def test_sniff_detects_binary_and_minified(tmp_path):
+    assert sniff(tmp_path / "a.py", b"\x7fELF\0\0\1") == "binary"
+    assert sniff(tmp_path / "app.min.js", b"var a=1;") == "minified"
+    assert sniff(tmp_path / "app.js", b"var a=1;" * 200) == "minified"
+    assert sniff(tmp_path / "app.js", SOURCE.encode()) is None
+
+
+def test_long_lines_only_count_as_minified_in_web_sources(tmp_path):
+    paragraph = b"The checkout flow lets customers " * 45  # one 1,485-character line
+    assert sniff(tmp_path / "prd.md", paragraph) is None
+    assert sniff(tmp_path / "models.py", paragraph) is None
+    assert sniff(tmp_path / "styles.css", paragraph) == "minified"
+    assert sniff(tmp_path / "app.min.js", b"var a=1;", detect_minified=False) is None
+    assert sniff(tmp_path / "blob.md", b"\0\1", detect_minified=False) == "binary"
+
+
+def test_decoding_tolerates_a_few_bad_bytes(tmp_path):
+    reader = SourceReader()
+    latin = tmp_path / "latin.py"
+    latin.write_bytes(("# caf\xe9\n" + SOURCE * 5).encode("latin-1"))
+    garbage = tmp_path / "garbage.py"
+    garbage.write_bytes(bytes(range(128, 256)) * 4)
+    bom = tmp_path / "bom.py"
+    bom.write_bytes(b"\xef\xbb\xbf" + SOURCE.encode())
+
+    assert "caf�" in reader.read(latin).text
+    assert reader.read(garbage).skip_reason == "not UTF-8 text"
+    assert reader.read(bom).text == SOURCE
+
+
+def test_reads_are_cached_until_the_file_changes(tmp_path, monkeypatch):
+    path = tmp_path / "a.py"
+    path.write_text(SOURCE)
+    reader = SourceReader()
+    loads = []
+    load = reader._load
+    monkeypatch.setattr(reader, "_load", lambda *args: loads.append(args) or load(*args))
+
+    assert reader.read(path) is reader.read(tmp_path / "." / "a.py")
+    assert len(loads) == 1
+
+    path.write_text(SOURCE + "\n# changed\n")
+    os.utime(path, ns=(0, 10**9))
+    assert reader.read(path).text.endswith("# changed\n")
+    assert len(loads) == 2
+
+
+def test_hash_file_maps_large_files(tmp_path, monkeypatch):
+    path = tmp_path / "data.bin"
+    data = os.urandom(4096)
+    path.write_bytes(data)
+    monkeypatch.setattr(ingest, "MMAP_HASH_BYTES", 1024)
+
+    assert hash_file(path) == hashlib.sha256(data).hexdigest()
+    empty = tmp_path / "empty.py"
+    empty.touch()
+    assert hash_file(empty) == hashlib.sha256(b"").hexdigest()
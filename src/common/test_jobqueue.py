@@ -0,0 +1,143 @@
+import time
+
+import pytest
+
+from common.jobqueue import InMemoryRedis, RedisJobQueue, SQLiteJobQueue, open_job_queue
+
+
+@pytest.fixture(params=["sqlite", "redis"])
+def queue(request, tmp_path):
+    """Provides each queue backend with two attempts per job."""
+    if request.param == "sqlite":
+        return SQLiteJobQueue(str(tmp_path / "queue.db"), max_attempts=2)
+    return RedisJobQueue(InMemoryRedis(), max_attempts=2)
+
+
+def test_claim_in_priority_order(queue):
+    queue.submit({"file": "low.py"}, priority=2)
+    queue.submit({"file": "high.py"}, priority=0)
+    queue.submit({"file": "medium.py"}, priority=1)
+
+    claimed = [queue.claim("w1", 60).payload["file"] for _ in range(3)]
+
+    assert claimed == ["high.py", "medium.py", "low.py"]
+    assert queue.claim("w1", 60) is None
+    assert queue.stats() == {"leased": 3}
+
+
+def test_complete_records_result(queue):
+    queue.submit({"file": "a.py"})
+    job = queue.claim("w1", 60)
+    queue.complete(job.id, "w1", {"status": "completed", "stop_reason": "passed"})
+
+    assert queue.stats() == {"done": 1}
+    assert queue.results() == {"a.py": {"status": "completed", "stop_reason": "passed"}}
+
+
+def test_heartbeat_only_for_lease_holder(queue):
+    queue.submit({"file": "a.py"})
+    job = queue.claim("w1", 60)
+
+    assert queue.heartbeat(job.id, "w1", 60)
+    assert not queue.heartbeat(job.id, "w2", 60)
+
+
+def test_expired_lease_is_requeued_until_max_attempts(queue):
+    queue.submit({"file": "a.py"})
+    first = queue.claim("w1", 0.01)
+    time.sleep(0.05)
+
+    assert queue.requeue_expired() == 1
+    # The dead worker can no longer finish or extend the job
+    assert not queue.heartbeat(first.id, "w1", 60)
+
+    second = queue.claim("w2", 0.01)
+    assert second.id == first.id
+    assert second.attempts == 2
+    time.sleep(0.05)
+
+    assert queue.requeue_expired() == 1
+    assert queue.claim("w3", 60) is None
+    assert queue.stats() == {"failed": 1}
+    assert queue.results()["a.py"]["error"] == "lease expired"
+
+
+def test_fail_retries_then_gives_up(queue):
+    queue.submit({"file": "a.py"})
+    queue.fail(queue.claim("w1", 60).id, "w1", "boom")
+    assert queue.stats() == {"queued": 1}
+
+    queue.fail(queue.claim("w1", 60).id, "w1", "boom")
+    assert queue.stats() == {"failed": 1}
+    assert queue.results()["a.py"]["status"] == "error"
+
+
+def test_redis_claim_survives_worker_dying_before_lease_is_recorded():
+    queue = RedisJobQueue(InMemoryRedis(), max_attempts=2)
+    job_id = queue.submit({"file": "a.py"})
+
+    # The job moves onto the leases together with the pop, before the record is updated
+    queue._claim(keys=[queue.queue_key, queue.leases_key], args=[time.time() - 1])
+
+    assert queue.requeue_expired() == 1
+    assert queue.claim("w2", 60).id == job_id
+
+
+def test_redis_complete_loses_to_expired_lease_requeue(monkeypatch):
+    queue = RedisJobQueue(InMemoryRedis(), max_attempts=2)
+    queue.submit({"file": "a.py"})
+    job = queue.claim("w1", 0.01)
+    stale = queue._load(job.id)
+    time.sleep(0.05)
+    assert queue.requeue_expired() == 1
+
+    # The worker read its record before the lease was requeued
+    monkeypatch.setattr(queue, "_load", lambda job_id: dict(stale))
+    queue.complete(job.id, "w1", {"status": "passed"})
+
+    monkeypatch.undo()
+    assert queue.stats() == {"queued": 1}
+    assert queue.claim("w2", 60).id == job.id
+
+
+def test_redis_heartbeat_does_not_revive_a_settled_lease():
+    queue = RedisJobQueue(InMemoryRedis(), max_attempts=2)
+    queue.submit({"file": "a.py"})
+    job = queue.claim("w1", 0.01)
+    time.sleep(0.05)
+    assert queue.requeue_expired() == 1
+    # The requeued record no longer names w1, but a stale one still would
+    stale = queue._load(job.id)
+    stale.update(status="leased", worker="w1")
+    queue._save(stale)
+
+    assert not queue.heartbeat(job.id, "w1", 60)
+    assert queue.client.zrangebyscore(queue.leases_key, 0, float("inf")) == []
+
+
+def test_redis_requeue_drops_leases_of_deleted_jobs():
+    queue = RedisJobQueue(InMemoryRedis(), max_attempts=2)
+    queue.submit({"file": "a.py"})
+    job = queue.claim("w1", 0.01)
+    del queue.client._hashes[queue.jobs_key][job.id]
+    time.sleep(0.05)
+
+    assert queue.requeue_expired() == 0
+    assert queue.client.zrangebyscore(queue.leases_key, 0, float("inf")) == []
+
+
+def test_sqlite_queue_shared_between_instances(tmp_path):
+    path = str(tmp_path / "queue.db")
+    SQLiteJobQueue(path).submit({"file": "a.py"})
+
+    job = SQLiteJobQueue(path).claim("w1", 60)
+
+    assert job.payload == {"file": "a.py"}
+
+
+def test_open_job_queue(tmp_path):
+    assert isinstance(open_job_queue(f"sqlite:///{tmp_path}/q.db"), SQLiteJobQueue)
+    assert isinstance(open_job_queue(str(tmp_path / "q.db")), SQLiteJobQueue)
+    assert isinstance(open_job_queue("memory://"), RedisJobQueue)
+    with pytest.raises(ValueError, match="Unsupported queue URL"):
+        open_job_queue("ftp://example.com/queue")
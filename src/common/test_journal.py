@@ -0,0 +1,107 @@
+import pytest
+
+from common.blobstore import blobs
+from common.journal import RunJournal, latest_run
+from graph.workflow import GraphState
+
+
+def make_state(**update):
+    return GraphState(
+        input_code="def f():\n    return 1\n",
+        file_path="a.py",
+        test_type="unit",
+        framework="pytest",
+        project_root="proj",
+        output_project_root="proj",
+        output_path="proj/test_a.py",
+        **update,
+    )
+
+
+def test_replays_a_run(tmp_path):
+    journal = RunJournal("run-1", str(tmp_path))
+    journal.start({"project": "proj"}, {"dedupe": True})
+    journal.classified("a.py", {"priority": "high"})
+    journal.classified("b.py", {"priority": "low"})
+    journal.classified("c.py", {"priority": "low"})
+    journal.step("a.py", "generate", make_state(status="generating"))
+    journal.step("a.py", "notify", make_state(status="completed"))
+    journal.done("a.py", "completed")
+    journal.step("b.py", "save", make_state(status="saved"))
+
+    state = RunJournal.load("run-1", str(tmp_path))
+
+    assert state.options == {"project": "proj"}
+    assert state.discovery == {"dedupe": True}
+    assert not state.discovery_complete
+    assert state.finished == {"a.py": "completed"}
+    assert list(state.checkpoints) == ["b.py"]
+    node, saved = state.checkpoints["b.py"]
+    assert node == "save"
+    assert saved["status"] == "saved"
+    assert state.pending() == [("b.py", {"priority": "low"}), ("c.py", {"priority": "low"})]
+
+
+def test_ignores_a_torn_last_line(tmp_path):
+    journal = RunJournal("run-2", str(tmp_path))
+    journal.classified("a.py", {})
+    journal.discovered()
+    with open(journal.path, "a") as f:
+        f.write('{"event": "done", "fi')
+
+    state = RunJournal.load("run-2", str(tmp_path))
+
+    assert state.discovery_complete
+    assert state.pending() == [("a.py", {})]
+
+
+def test_copies_grouped_under_a_file(tmp_path):
+    journal = RunJournal("run-3", str(tmp_path))
+    journal.classified("a.py", {"priority": "high", "duplicates": []})
+    journal.grouped("a.py", "copy_a.py")
+    journal.classified("b.py", {"priority": "low", "duplicates": []})
+    journal.grouped("b.py", "copy_b.py")
+    journal.grouped("b.py", "late_b.py")
+    journal.done("b.py", "completed")
+    journal.classified("copy_b.py", {"priority": "low"})
+
+    state = RunJournal.load("run-3", str(tmp_path))
+
+    assert state.known_files() == {"a.py", "copy_a.py", "b.py", "copy_b.py", "late_b.py"}
+    # b.py finished before late_b.py was queued, so that copy is generated on its own
+    assert state.pending() == [
+        ("a.py", {"priority": "high", "duplicates": ["copy_a.py"]}),
+        ("late_b.py", {"priority": "low"}),
+        ("copy_b.py", {"priority": "low"}),
+    ]
+
+
+def test_delete_keeps_blobs_other_runs_need(tmp_path, monkeypatch):
+    monkeypatch.setattr(blobs, "spill_dir", tmp_path / "blobs")
+    shared = blobs.put("shared source\n" * 200)
+    own = blobs.put("generated tests\n" * 200)
+    finished = RunJournal("run-4", str(tmp_path / "runs"))
+    finished.classified("a.py", {})
+    finished.step("a.py", "save", make_state(test_results=shared, generated_tests=own))
+    finished.discovered()
+    finished.done("a.py", "completed")
+    interrupted = RunJournal("run-5", str(tmp_path / "runs"))
+    interrupted.step("b.py", "generate", make_state(test_results=shared))
+
+    assert RunJournal.load("run-4", str(tmp_path / "runs")).complete
+    assert not RunJournal.load("run-5", str(tmp_path / "runs")).complete
+    finished.delete()
+
+    assert latest_run(str(tmp_path / "runs")) == "run-5"
+    assert blobs.get(shared).startswith("shared source")
+    with pytest.raises(KeyError):
+        blobs.get(own)
+
+
+def test_unknown_runs(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        RunJournal.load("missing", str(tmp_path))
+    assert latest_run(str(tmp_path)) is None
+
+    RunJournal.create(str(tmp_path)).discovered()
+    assert latest_run(str(tmp_path)) is not None
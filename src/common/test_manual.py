@@ -0,0 +1,81 @@
+from common.manual import merge_checklists, parse_checklist, split_sections
+
+
+def feature(name, paragraphs=3):
+    body = "\n\n".join(f"{name} requirement {i}. " + "Details. " * 20 for i in range(paragraphs))
+    return f"{body}\n"
+
+
+def test_short_documents_stay_whole():
+    text = "# PRD\n\nLogin and logout.\n"
+
+    assert [s.text for s in split_sections(text)] == [text.strip()]
+
+
+def test_split_follows_heading_hierarchy_and_packs_small_sections():
+    text = (
+        "Intro paragraph.\n\n"
+        "# Checkout\n\n"
+        "## Cart\n\n" + feature("Cart") + "\n"
+        "## Payment\n\n" + feature("Payment") + "\n"
+        "```\n# not a heading\n```\n"
+        "Accounts\n========\n\n"
+        "## Login\n\n" + feature("Login", 1) + "\n"
+        "## Logout\n\n" + feature("Logout", 1)
+    )
+
+    sections = split_sections(text, max_chars=1000)
+
+    assert [s.title for s in sections] == [
+        "Overview / Checkout > Cart",
+        "Checkout > Payment",
+        "Accounts",
+    ]
+    assert "# not a heading" in sections[1].text
+    assert sections[2].text.startswith("Accounts\n========\n\n## Login")
+    assert all(len(s.text) <= 1000 for s in sections)
+
+
+def test_split_long_text_without_headings_by_paragraphs():
+    sections = split_sections(feature("Plain", 10), max_chars=1000)
+
+    assert len(sections) > 1
+    assert sections[0].title == f"Overview (part 1 of {len(sections)})"
+    assert "Plain requirement 9" in sections[-1].text
+
+
+def test_parse_checklist():
+    items, stories = parse_checklist(
+        "Manual Testing Checklist\n\nFeature checklist:\n"
+        "1. [ ] Verify the cart opens.\n2) [x] Remove an item.\n\n"
+        "Feature user stories:\n- As a user, I want a cart.\n"
+    )
+
+    assert items == ["Verify the cart opens.", "Remove an item."]
+    assert stories == ["As a user, I want a cart."]
+
+
+def test_merge_numbers_across_sections_and_dedupes_stories():
+    merged = merge_checklists(
+        [
+            (
+                "Cart",
+                "Checklist:\n1. [ ] Add an item.\n2. [ ] Remove an item.\n"
+                "User stories:\n1. As a user, I want a cart.\n",
+            ),
+            (
+                "Payment",
+                "Checklist:\n1. [ ] Pay by card.\n"
+                "User stories:\n1. As a user, I want a cart!\n2. As a user, I want to pay.\n",
+            ),
+            ("Appendix", "No testable requirements."),
+        ]
+    )
+
+    assert merged == (
+        "Manual Testing Checklist\n\n"
+        "## Cart\n1. [ ] Add an item.\n2. [ ] Remove an item.\n\n"
+        "## Payment\n3. [ ] Pay by card.\n\n"
+        "## Appendix\nNo testable requirements.\n\n"
+        "## User stories\n1. As a user, I want a cart.\n2. As a user, I want to pay.\n"
+    )
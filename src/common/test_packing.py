@@ -0,0 +1,55 @@
+from common.packing import Packer, parse_tests, render_sources
+
+
+def _files(tmp_path, sizes):
+    files = []
+    for i, size in enumerate(sizes):
+        path = tmp_path / f"m{i}.py"
+        path.write_text("x" * size)
+        files.append((path, {"priority": "medium"}))
+    return files
+
+
+def test_packer_closes_packs_at_token_budget(tmp_path):
+    packer = Packer(token_budget=100)
+    a, b, c = _files(tmp_path, [160, 160, 160])  # about 41 tokens each
+
+    assert packer.add(a) is None
+    assert packer.add(b) is None
+    pack = packer.add(c)
+
+    assert [f for f, _info in pack.items] == [a[0], b[0]]
+    assert [f for f, _info in packer.flush().items] == [c[0]]
+    assert packer.flush() is None
+
+
+def test_packer_closes_packs_at_max_files(tmp_path):
+    packer = Packer(token_budget=10000, max_files=2)
+    a, b = _files(tmp_path, [10, 10])
+
+    assert packer.add(a) is None
+    assert len(packer.add(b).items) == 2
+
+
+def test_packer_only_fits_small_files(tmp_path):
+    packer = Packer(token_budget=100)
+    small, large = _files(tmp_path, [100, 400])
+
+    assert packer.fits(small[0])
+    assert not packer.fits(large[0])
+    assert not packer.fits(tmp_path / "missing.py")
+
+
+def test_parse_tests_splits_response_per_file():
+    sources = render_sources([("a.py", "def a(): ..."), ("pkg/b.py", "def b(): ...")])
+    assert "=== SOURCE: pkg/b.py ===\ndef b(): ...\n=== END SOURCE ===" in sources
+
+    response = (
+        "=== TESTS: a.py ===\n```python\ndef test_a():\n    assert a()\n```\n=== END TESTS ===\n\n"
+        "=== TESTS: pkg/b.py ===\n\n=== END TESTS ===\n"
+        "=== TESTS: other.py ===\ndef test_other():\n    pass\n=== END TESTS ===\n"
+    )
+    tests = parse_tests(response, ["a.py", "pkg/b.py"])
+
+    assert list(tests) == ["a.py"]
+    assert tests["a.py"].startswith("```python\ndef test_a():")
@@ -0,0 +1,77 @@
+import json
+
+from common.report import RunReport, load_durations, load_hard_files, merge_reports
+
+
+def test_run_report_write(tmp_path):
+    report = RunReport(shard="1/2")
+    report.set_manifest(["b.py", "a.py", "c.py"])
+    report.add("a.py", "completed", 12.3456, stop_reason="passed", retries=1)
+    report.add("b.py", "error", 1.0, error="boom")
+    report.tokens = 100
+    path = tmp_path / "report.json"
+    report.write(str(path))
+
+    data = json.loads(path.read_text())
+    assert data["shards"] == ["1/2"]
+    assert data["manifest"] == ["a.py", "b.py", "c.py"]
+    assert data["files"]["a.py"]["duration"] == 12.346
+    assert data["files"]["b.py"]["error"] == "boom"
+    assert data["totals"]["missing"] == 1
+    assert data["totals"]["statuses"] == {"completed": 1, "error": 1}
+    assert load_durations(str(path)) == {"a.py": 12.346, "b.py": 1.0}
+
+
+def test_load_durations_skips_files_that_did_not_run(tmp_path):
+    report = RunReport()
+    report.add("a.py", "completed", 4.0)
+    report.add("b.py", "not_selected", 0.0, stop_reason="not selected by the classifier")
+    report.add("c.py", "skipped", 0.0, stop_reason="run_budget")
+    report.add("d.py", "completed", 0.0)
+    path = tmp_path / "report.json"
+    report.write(str(path))
+
+    assert load_durations(str(path)) == {"a.py": 4.0}
+
+
+def test_load_hard_files(tmp_path):
+    report = RunReport()
+    report.add("easy.py", "completed", 1.0, stop_reason="passed")
+    report.add("hard.py", "completed", 9.0, stop_reason="passed", retries=3)
+    report.add("stuck.py", "completed", 9.0, stop_reason="max_retries", retries=2)
+    path = tmp_path / "report.json"
+    report.write(str(path))
+
+    assert load_hard_files(str(path)) == ["hard.py", "stuck.py"]
+    assert load_hard_files(str(path), min_retries=3) == ["hard.py"]
+
+
+def test_merge_reports():
+    first = RunReport(shard="2/2")
+    first.set_manifest(["a.py"])
+    first.add("a.py", "completed", 5.0)
+    first.tokens, first.elapsed = 10, 50.0
+    second = RunReport(shard="1/2")
+    second.set_manifest(["b.py", "c.py"])
+    second.add("b.py", "completed", 7.0)
+    second.tokens, second.elapsed = 20, 80.0
+
+    merged = merge_reports([first.to_dict(), second.to_dict()])
+    assert merged["shards"] == ["1/2", "2/2"]
+    assert merged["manifest"] == ["a.py", "b.py", "c.py"]
+    assert merged["totals"]["files"] == 2
+    assert merged["totals"]["missing"] == 1
+    assert merged["totals"]["tokens"] == 30
+    assert merged["totals"]["elapsed"] == 80.0
+
+
+def test_files_not_selected_are_not_missing():
+    report = RunReport(shard="1/2")
+    report.set_manifest(["a.py", "constants.py", "lost.py"])
+    report.add("a.py", "completed", 5.0)
+    report.add("constants.py", "not_selected", 0.0, stop_reason="not selected by the classifier")
+
+    merged = merge_reports([report.to_dict()])
+
+    assert merged["totals"]["missing"] == 1
+    assert merged["totals"]["statuses"] == {"completed": 1, "not_selected": 1}
@@ -0,0 +1,51 @@
+from common.runcache import RunCache
+
+
+def test_run_cache_round_trip(tmp_path):
+    cache = RunCache(str(tmp_path / "cache"))
+    key = cache.key(str(tmp_path), "unit", "pytest", str(tmp_path / "test_a.py"), "t", "s")
+
+    assert cache.get(key) is None
+    cache.put(key, 1, "1 failed")
+    assert cache.get(key) == (1, "1 failed")
+    assert list((tmp_path / "cache").rglob("*.tmp")) == []
+
+
+def test_run_cache_key_changes_with_inputs(tmp_path):
+    cache = RunCache(str(tmp_path / "cache"))
+    test_path = str(tmp_path / "test_a.py")
+    key = cache.key(str(tmp_path), "unit", "pytest", test_path, "t", "s")
+
+    assert cache.key(str(tmp_path), "unit", "pytest", test_path, "t", "s") == key
+    assert cache.key(str(tmp_path), "unit", "pytest", test_path, "t2", "s") != key
+    assert cache.key(str(tmp_path), "unit", "pytest", test_path, "t", "s2") != key
+    assert cache.key(str(tmp_path), "unit", "jest", test_path, "t", "s") != key
+    other_path = str(tmp_path / "sub" / "test_a.py")
+    assert cache.key(str(tmp_path), "unit", "pytest", other_path, "t", "s") != key
+
+
+def test_run_cache_fingerprint_covers_lockfiles(tmp_path):
+    (tmp_path / "poetry.lock").write_text("pytest 8.0\n")
+    before = RunCache().fingerprint(str(tmp_path))
+    (tmp_path / "poetry.lock").write_text("pytest 8.1\n")
+
+    assert RunCache().fingerprint(str(tmp_path)) != before
+
+
+def test_run_cache_ignores_unreadable_entries(tmp_path):
+    cache = RunCache(str(tmp_path))
+    key = "ab" + "0" * 62
+    (tmp_path / "ab").mkdir()
+    (tmp_path / "ab" / f"{key}.json").write_text("{not json")
+
+    assert cache.get(key) is None
+
+
+def test_only_unit_verdicts_are_cacheable(tmp_path):
+    cache = RunCache(str(tmp_path))
+    assert cache.cacheable("unit", 1, "1 failed")
+    assert cache.cacheable("unit", 0, "1 passed")
+    assert not cache.cacheable("e2e", 0, "1 passed")
+    assert not cache.cacheable("unit", 4, "ERROR: file or directory not found")
+    assert not cache.cacheable("unit", -9, "collected 1 item\nTest run timed out.")
+    assert not cache.cacheable("unit", 1, "collected 1 item\nTest run timed out.\n")
@@ -0,0 +1,48 @@
+import pytest
+
+from common.sharding import assign_shards, parse_shard, select_shard
+
+
+def test_parse_shard():
+    assert parse_shard("2/5") == (2, 5)
+    for value in ("0/3", "4/3", "a/b", "3"):
+        with pytest.raises(ValueError, match="Invalid shard"):
+            parse_shard(value)
+
+
+def test_assign_shards_is_deterministic_and_balanced():
+    weights = {f"file_{i}.py": float(i % 7 + 1) for i in range(100)}
+    first = assign_shards(weights, 4)
+    # Insertion order must not matter
+    second = assign_shards(dict(reversed(list(weights.items()))), 4)
+    assert first == second
+
+    loads = [sum(w for k, w in weights.items() if first[k] == s) for s in range(1, 5)]
+    assert max(loads) - min(loads) <= max(weights.values())
+
+
+def test_select_shard_partitions_files(tmp_path):
+    files = []
+    for i in range(20):
+        f = tmp_path / "src" / f"module_{i}.py"
+        f.parent.mkdir(exist_ok=True)
+        f.write_text("x = 1\n" * (i + 1))
+        files.append(f)
+
+    shards = [select_shard(files, str(tmp_path), i, 3) for i in (1, 2, 3)]
+    assert sorted(f for shard in shards for f in shard) == sorted(files)
+    assert all(shards)
+
+
+def test_select_shard_uses_historical_durations(tmp_path):
+    files = []
+    for name in ("slow.py", "a.py", "b.py", "c.py"):
+        f = tmp_path / name
+        f.write_text("x = 1\n")
+        files.append(f)
+
+    durations = {"slow.py": 300.0, "a.py": 10.0, "b.py": 10.0, "c.py": 10.0}
+    shards = [select_shard(files, str(tmp_path), i, 2, durations) for i in (1, 2)]
+    # The slow file gets a shard to itself
+    assert [f.name for f in shards[0]] == ["slow.py"]
+    assert len(shards[1]) == 3
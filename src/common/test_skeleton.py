@@ -0,0 +1,128 @@
+from common import skeleton
+from common.skeleton import RAW_LIMIT, outline, summarize
+
+PYTHON_SOURCE = '''"""Order pricing.
+
+Long description.
+"""
+# Copyright header
+import os
+from typing import List
+
+TAX = 0.2
+
+
+class Cart(Base):
+    """A shopping cart."""
+
+    currency = "EUR"
+
+    @property
+    def total(self) -> float:
+        return sum(self.items)
+
+    async def checkout(self, *, retries: int = 3, **kwargs) -> bool:
+        """Pays for the cart.
+
+        More text.
+        """
+        for _ in range(retries):
+            pass
+        return True
+
+
+@app.route("/cart", methods=["POST"])
+def create_cart(items: List[str], user=None):
+    def helper():
+        pass
+    return Cart(items)
+
+
+if __name__ == "__main__":
+    create_cart([])
+'''
+
+
+def test_python_outline_keeps_signatures_and_drops_bodies():
+    text = outline("shop/cart.py", PYTHON_SOURCE)
+
+    assert text.splitlines() == [
+        "# cart.py: 39 lines, 641 bytes",
+        '"""Order pricing."""',
+        "import os",
+        "from typing import List",
+        "class Cart(Base):",
+        '    """A shopping cart."""',
+        "    @property",
+        "    def total(self) -> float:",
+        "    async def checkout(self, *, retries: int = 3, **kwargs) -> bool:",
+        '        """Pays for the cart."""',
+        "    # assigns: currency",
+        '@app.route("/cart", methods=["POST"])',
+        "def create_cart(items: List[str], user=None):",
+        'if __name__ == "__main__": ...',
+        "# assigns: TAX",
+    ]
+
+
+def test_python_with_syntax_errors_falls_back_to_patterns():
+    text = outline("broken.py", "import os\n\ndef f(:\n    pass\n\nclass A:\n    x = 1\n")
+
+    assert text.splitlines()[1:] == ["import os", "def f(:", "class A:"]
+
+
+def test_js_outline():
+    source = (
+        "import React from 'react';\n"
+        "const api = require('./api');\n\n"
+        "export default function Cart({ items }) {\n"
+        "  if (!items) {\n"
+        "    return null;\n"
+        "  }\n"
+        "  return <List items={items} />;\n"
+        "}\n\n"
+        "const total = (items) => items.length;\n"
+        "router.post('/cart', handler);\n"
+        "class Store {\n"
+        "  async load(id) {\n"
+        "    return api.get(id);\n"
+        "  }\n"
+        "}\n"
+    )
+
+    assert outline("Cart.jsx", source).splitlines()[1:] == [
+        "import React from 'react';",
+        "const api = require('./api');",
+        "export default function Cart({ items })",
+        "const total = (items) => items.length;",
+        "router.post('/cart', handler);",
+        "class Store",
+        "  async load(id)",
+        "// renders JSX",
+    ]
+
+
+def test_outline_is_capped():
+    source = "\n".join(f"def f{i}(a, b, c):\n    pass\n" for i in range(1000))
+
+    text = outline("many.py", source)
+
+    assert len(text) < 4100
+    assert text.splitlines()[-1].endswith("more outline lines")
+
+
+def test_summarize_sends_small_files_raw_and_caches_outlines(monkeypatch):
+    assert summarize("small.py", "x = 1\n") == "x = 1\n"
+
+    calls = []
+
+    def counting_outline(file_path, source):
+        calls.append(file_path)
+        return "outline"
+
+    monkeypatch.setattr(skeleton, "outline", counting_outline)
+    big = "x = 1\n" * RAW_LIMIT
+    assert summarize("a.py", big) == "outline"
+    assert summarize("b.py", big) == "outline"
+    assert summarize("c.js", big) == "outline"
+    assert calls == ["a.py", "c.js"]
@@ -3,6 +3,8 @@ from unittest.mock import MagicMock, patch
 
 import httpx
 
+from common.slack import DIGEST_CHUNK_CHARS, SlackNotifier, format_digest
+
 
 def post_slack_notification(text: str, webhook_url: str = None):
     webhook = webhook_url or os.getenv("SLACK_WEBHOOK_URL")
@@ -86,3 +88,57 @@ def test_post_slack_notification_exception():
                 "http://example.com/webhook", json={"text": "Test message"}, timeout=10
             )
             mock_print.assert_called_once_with("[Slack Error]: Network error")
+
+
+# Tests for the pooled background notifier
+def _mock_client(received):
+    def handler(request):
+        received.append(request)
+        return httpx.Response(200)
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def test_notifier_posts_in_background():
+    received = []
+    notifier = SlackNotifier()
+    notifier._client = _mock_client(received)
+    notifier.post("Test message", "http://example.com/webhook")
+    notifier.close()
+
+    assert len(received) == 1
+    assert b"Test message" in received[0].content
+
+
+def test_notifier_digest_batches_results():
+    received = []
+    notifier = SlackNotifier(digest=True)
+    notifier._client = _mock_client(received)
+    for i in range(5):
+        notifier.report("ignored", f"src/file_{i}.py", "passed", "http://example.com/webhook")
+    notifier.report("ignored", "src/broken.py", "failed", "http://example.com/webhook")
+    notifier.close()
+
+    assert len(received) == 1
+    body = received[0].content.decode()
+    assert "6 (1 failed, 5 passed)" in body
+    assert "src/broken.py" in body
+
+
+def test_notifier_skips_without_webhook(monkeypatch):
+    monkeypatch.delenv("SLACK_WEBHOOK_URL", raising=False)
+    notifier = SlackNotifier()
+    with patch("click.echo") as mock_echo:
+        notifier.post("Test message")
+        mock_echo.assert_called_once_with(
+            "\n[Slack Notification Skipped]: No webhook URL configured.\n"
+        )
+    # No background thread is started when nothing is sent
+    assert notifier._loop is None
+
+
+def test_format_digest_chunks_long_runs():
+    entries = [{"file": f"src/{'x' * 80}_{i}.py", "status": "passed"} for i in range(200)]
+    chunks = format_digest(entries)
+    assert len(chunks) > 1
+    assert all(len(chunk) <= DIGEST_CHUNK_CHARS for chunk in chunks)
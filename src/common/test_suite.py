@@ -0,0 +1,88 @@
+import json
+from pathlib import Path
+
+from common.suite import (
+    find_source_file,
+    index_sources,
+    parse_jest_failures,
+    parse_junit_failures,
+    run_suite,
+    source_stem,
+)
+
+JUNIT = """<?xml version="1.0" encoding="utf-8"?><testsuites><testsuite name="pytest">
+<testcase classname="" name="tests.test_two" file="tests/test_two.py">
+<error message="collection failure">ModuleNotFoundError: No module named 'nope'</error></testcase>
+<testcase classname="tests.test_one" name="test_a" file="tests/test_one.py">
+<failure message="assert 1 == 2">E   assert 1 == 2</failure></testcase>
+<testcase classname="tests.test_one" name="test_b" file="tests/test_one.py" />
+<testcase classname="tests.test_three" name="test_ok" file="tests/test_three.py" />
+</testsuite></testsuites>"""
+
+
+def test_parse_junit_failures():
+    failures = parse_junit_failures(JUNIT)
+
+    assert sorted(failures) == ["tests/test_one.py", "tests/test_two.py"]
+    assert "tests.test_one::test_a: assert 1 == 2" in failures["tests/test_one.py"]
+    assert "No module named 'nope'" in failures["tests/test_two.py"]
+
+
+def test_parse_jest_failures(tmp_path):
+    report = {
+        "testResults": [
+            {"name": str(tmp_path / "src/cart.test.js"), "status": "failed", "message": "boom"},
+            {"name": str(tmp_path / "src/user.test.js"), "status": "passed", "message": ""},
+        ]
+    }
+
+    assert parse_jest_failures(json.dumps(report), str(tmp_path)) == {"src/cart.test.js": "boom"}
+
+
+def test_source_stem():
+    assert source_stem(Path("tests/test_cart.py")) == "cart"
+    assert source_stem(Path("tests/cart_test.py")) == "cart"
+    assert source_stem(Path("src/cart.test.js")) == "cart"
+    assert source_stem(Path("src/cart.spec.tsx")) == "cart"
+    assert source_stem(Path("src/cart.py")) is None
+    assert source_stem(Path("src/cart.js")) is None
+
+
+def test_find_source_file_prefers_matching_directories(tmp_path):
+    for path in ("app/orders/models.py", "app/users/models.py", "tests/users/test_models.py"):
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).write_text("")
+    index = index_sources(str(tmp_path), "pytest")
+
+    source = find_source_file(Path("tests/users/test_models.py"), str(tmp_path), "pytest", index)
+
+    assert source == tmp_path / "app/users/models.py"
+
+
+def test_find_source_file_falls_back_to_imports(tmp_path):
+    (tmp_path / "billing").mkdir()
+    (tmp_path / "billing/invoices.py").write_text("")
+    (tmp_path / "tests").mkdir()
+    (tmp_path / "tests/test_checkout.py").write_text(
+        "import pytest\nfrom billing.invoices import x\n"
+    )
+    (tmp_path / "web").mkdir()
+    (tmp_path / "web/pay.js").write_text("")
+    (tmp_path / "web/checkout.spec.js").write_text("const pay = require('./pay');\n")
+
+    python_source = find_source_file(Path("tests/test_checkout.py"), str(tmp_path), "pytest")
+    js_source = find_source_file(Path("web/checkout.spec.js"), str(tmp_path), "jest")
+
+    assert python_source == tmp_path / "billing/invoices.py"
+    assert js_source == (tmp_path / "web/pay.js").resolve()
+    assert find_source_file(Path("web/checkout.spec.js"), str(tmp_path), "pytest") is None
+
+
+def test_run_suite_collects_failing_files(tmp_path):
+    (tmp_path / "test_one.py").write_text("def test_a():\n    assert 1 == 2\n")
+    (tmp_path / "test_two.py").write_text("import not_a_module\n")
+    (tmp_path / "test_three.py").write_text("def test_ok():\n    pass\n")
+
+    failures = run_suite(str(tmp_path), "pytest")
+
+    assert sorted(failures) == ["test_one.py", "test_two.py"]
@@ -0,0 +1,81 @@
+from common.testindex import ExampleIndex, ExampleIndexes, find_test_files, tokenize
+
+CONFTEST = """import pytest
+
+from shop.factories import make_customer
+
+
+@pytest.fixture
+def customer():
+    return make_customer(name="Ada")
+"""
+
+TEST_CART = """from shop.cart import Cart
+
+
+def test_cart_total(customer):
+    cart = Cart(customer)
+    cart.add_item("apple", price=3)
+    assert cart.total() == 3
+
+
+def test_empty_cart_total(customer):
+    assert Cart(customer).total() == 0
+"""
+
+TEST_INVOICE = """from shop.invoice import render_invoice
+
+
+def test_render_invoice_header():
+    assert render_invoice(number=7).startswith("Invoice 7")
+"""
+
+
+def _project(tmp_path):
+    (tmp_path / "tests").mkdir()
+    (tmp_path / "node_modules").mkdir()
+    (tmp_path / "conftest.py").write_text(CONFTEST)
+    (tmp_path / "tests" / "test_cart.py").write_text(TEST_CART)
+    (tmp_path / "tests" / "test_invoice.py").write_text(TEST_INVOICE)
+    (tmp_path / "tests" / "helpers.py").write_text("def helper():\n    pass\n")
+    (tmp_path / "node_modules" / "test_vendor.py").write_text("def test_vendor():\n    pass\n")
+    return tmp_path
+
+
+def test_tokenize_splits_identifiers():
+    tokens = tokenize("def test_add_item(self): cart.addItem(HTTPClient)")
+    assert {"test_add_item", "add", "item", "additem", "cart", "http", "client"} <= set(tokens)
+    assert "def" not in tokens and "self" not in tokens
+
+
+def test_find_test_files_skips_vendored_and_non_test_files(tmp_path):
+    files = find_test_files(str(_project(tmp_path)), "pytest")
+    assert [f.name for f in files] == ["conftest.py", "test_cart.py", "test_invoice.py"]
+
+
+def test_search_ranks_tests_of_related_code_first(tmp_path):
+    index = ExampleIndex.build([str(_project(tmp_path))], "pytest")
+    assert {u.name for u in index.units} == {
+        "customer",
+        "test_cart_total",
+        "test_empty_cart_total",
+        "test_render_invoice_header",
+    }
+
+    hits = index.search("class Cart:\n    def add_item(self, item, quantity): ...", top_k=2)
+
+    assert [unit.name for _score, unit in hits] == ["test_cart_total", "test_empty_cart_total"]
+    assert hits[0][1].imports == "from shop.cart import Cart"
+
+
+def test_examples_render_fixtures_with_their_imports(tmp_path):
+    indexes = ExampleIndexes()
+    root = str(_project(tmp_path))
+    assert indexes.examples([root], "pytest", "shop/customers.py", "make_customer") == ""
+
+    indexes.configure(1)
+    examples = indexes.examples([root], "pytest", "shop/customers.py", "def make_customer(): ...")
+
+    assert examples.startswith("# conftest.py\nimport pytest")
+    assert "@pytest.fixture\ndef customer():" in examples
+    assert "test_cart_total" not in examples
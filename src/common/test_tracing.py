@@ -0,0 +1,114 @@
+import contextvars
+import json
+import threading
+
+import pytest
+
+from common.fake_llm import FakeChatModel
+from common.tracing import LLMSpans, Tracer
+
+
+def _tracer(tmp_path, trace_format=None):
+    tracer = Tracer()
+    tracer.configure(str(tmp_path / "trace.json"), trace_format)
+    return tracer
+
+
+def test_disabled_tracer_records_nothing():
+    tracer = Tracer()
+    with tracer.span("workflow", "workflow", file="a.py") as span:
+        assert span is None
+    assert tracer.spans() == []
+    assert tracer.export() is None
+
+
+def test_spans_nest_and_inherit_file_and_node(tmp_path):
+    tracer = _tracer(tmp_path)
+    with tracer.span("workflow", "workflow", file="a.py") as workflow:
+        with tracer.span("run", "node", node="run") as node:
+            with tracer.span("test run", "subprocess", runner="subprocess"):
+                pass
+
+    test_run, run, outer = tracer.spans()
+    assert run.parent_id == workflow.span_id and test_run.parent_id == node.span_id
+    assert outer.parent_id is None
+    assert test_run.attributes == {"file": "a.py", "node": "run", "runner": "subprocess"}
+    assert outer.start_ns <= run.start_ns <= test_run.start_ns
+    assert test_run.end_ns <= run.end_ns <= outer.end_ns
+
+
+def test_failed_spans_record_the_error(tmp_path):
+    tracer = _tracer(tmp_path)
+    with pytest.raises(RuntimeError):
+        with tracer.span("generate", "node"):
+            raise RuntimeError("model unavailable")
+    assert tracer.spans()[0].error == "RuntimeError: model unavailable"
+
+
+def test_copied_contexts_nest_spans_from_other_threads(tmp_path):
+    tracer = _tracer(tmp_path)
+    with tracer.span("speculate", "node", file="a.py") as parent:
+        context = contextvars.copy_context()
+        candidate = threading.Thread(
+            target=context.run, args=(lambda: tracer.end(tracer.start("llm call", "llm")),)
+        )
+        candidate.start()
+        candidate.join()
+
+    child = tracer.spans()[0]
+    assert child.parent_id == parent.span_id
+    assert child.attributes == {"file": "a.py"}
+    assert child.thread_id != parent.thread_id
+
+
+def test_chrome_trace_export(tmp_path):
+    tracer = _tracer(tmp_path)
+    with tracer.span("workflow", "workflow", file="a.py"):
+        tracer.end(tracer.start("slack post", "slack", detached=True))
+
+    data = json.loads(tracer.export().read_text())
+
+    events = {(e["name"], e["ph"]): e for e in data["traceEvents"]}
+    workflow = events[("workflow", "X")]
+    assert workflow["cat"] == "workflow" and workflow["args"] == {"file": "a.py"}
+    assert workflow["ts"] == 0 and workflow["dur"] >= 0
+    begin, end = events[("slack post", "b")], events[("slack post", "e")]
+    assert begin["id"] == end["id"] and end["ts"] >= begin["ts"]
+    assert events[("thread_name", "M")]["args"]["name"] == threading.current_thread().name
+
+
+def test_otlp_export(tmp_path):
+    tracer = _tracer(tmp_path, "otlp")
+    with tracer.span("workflow", "workflow", file="a.py"):
+        with pytest.raises(ValueError):
+            with tracer.span("run", "node", retries=2):
+                raise ValueError("boom")
+
+    data = json.loads(tracer.export().read_text())
+
+    (resource,) = data["resourceSpans"]
+    workflow, run = resource["scopeSpans"][0]["spans"]
+    assert run["parentSpanId"] == workflow["spanId"] and "parentSpanId" not in workflow
+    assert run["traceId"] == workflow["traceId"] == tracer.trace_id
+    assert int(run["startTimeUnixNano"]) <= int(run["endTimeUnixNano"])
+    assert run["status"] == {"code": 2, "message": "ValueError: boom"}
+    attributes = {a["key"]: a["value"] for a in run["attributes"]}
+    assert attributes["file"] == {"stringValue": "a.py"}
+    assert attributes["retries"] == {"intValue": "2"}
+
+
+def test_configure_rejects_unknown_formats():
+    with pytest.raises(ValueError):
+        Tracer().configure("trace.json", "jaeger")
+
+
+def test_llm_calls_are_traced_under_the_calling_span(tmp_path):
+    tracer = _tracer(tmp_path)
+    llm = FakeChatModel(callbacks=[LLMSpans(tracer)])
+    with tracer.span("generate", "node", file="a.py", node="generate") as node:
+        response = llm.invoke("Generate Jest tests")
+
+    call = tracer.spans()[0]
+    assert call.name == "llm call" and call.parent_id == node.span_id
+    assert call.attributes["file"] == "a.py"
+    assert call.attributes["output_tokens"] == response.usage_metadata["output_tokens"]
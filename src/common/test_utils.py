@@ -1,7 +1,9 @@
 import tempfile
 from pathlib import Path
 
-from utils import discover_source_files
+from utils import classify_candidates, classify_groups, discover_source_files
+
+from common.tracing import tracer
 
 
 def test_discover_source_files_unit(monkeypatch):
@@ -48,3 +50,106 @@ def test_discover_source_files_exclude(monkeypatch):
 
         files, _ = discover_source_files(temp_dir, "unit", exclude_dirs=["exclude"])
         assert len(files) == 1
+
+
+def test_classify_groups_classifies_each_group_once(monkeypatch, tmp_path):
+    classified = []
+
+    def mock_classify_file(file_path, _content):
+        classified.append(Path(file_path).relative_to(tmp_path).as_posix())
+        return {"should_test": True, "test_type": "unit", "framework": "pytest", "priority": "low"}
+
+    monkeypatch.setattr("utils.classify_file", mock_classify_file)
+    (tmp_path / "vendor").mkdir()
+    (tmp_path / "a.py").write_text("def f():\n    return 1\n")
+    (tmp_path / "vendor/a.py").write_text("# copy\ndef f():\n    return 1\n")
+    (tmp_path / "b.py").write_text("def g():\n    return 2\n")
+    candidates = [tmp_path / "a.py", tmp_path / "b.py", tmp_path / "vendor/a.py"]
+
+    results = classify_groups(candidates, "unit", str(tmp_path))
+
+    # Yielded before the rest of the tree is hashed; later copies join its list
+    first, info = next(results)
+    assert first == tmp_path / "a.py" and info["duplicates"] == []
+    rest = dict(results)
+
+    assert classified == ["a.py", "b.py"]
+    assert info["duplicates"] == ["vendor/a.py"]
+    assert rest[tmp_path / "b.py"]["duplicates"] == []
+
+
+def test_discover_source_files_skips_binary_and_minified(monkeypatch, tmp_path):
+    classified = []
+
+    def mock_classify_file(file_path, _content):
+        classified.append(Path(file_path).name)
+        return {"should_test": True, "test_type": "unit", "priority": "high"}
+
+    monkeypatch.setattr("utils.classify_file", mock_classify_file)
+    (tmp_path / "app.py").write_text("def main():\n    pass\n")
+    (tmp_path / "blob.py").write_bytes(b"\0\1\2" * 10)
+    (tmp_path / "vendor.min.js").write_text("var a=1;")
+
+    files, _ = discover_source_files(str(tmp_path), "unit")
+
+    assert classified == ["app.py"]
+    assert [f.name for f in files] == ["app.py"]
+
+
+def test_manual_mode_keeps_documents_with_long_lines(tmp_path):
+    prd = tmp_path / "checkout.md"
+    prd.write_text("# Checkout\n\n" + "Customers can pay with a saved card. " * 40 + "\n")
+    bundle = tmp_path / "vendor.min.js"
+    bundle.write_text("var a=1;")
+
+    files = [f for f, _info in classify_candidates([prd, bundle], "manual")]
+
+    assert files == [prd, bundle]
+
+
+def test_classify_groups_reports_files_it_does_not_select(monkeypatch, tmp_path):
+    monkeypatch.setattr(
+        "utils.classify_file",
+        lambda file_path, _content: {
+            "should_test": not file_path.endswith("constants.py"),
+            "test_type": "unit",
+            "priority": "low",
+        },
+    )
+    (tmp_path / "app.py").write_text("def main():\n    return 1\n")
+    (tmp_path / "constants.py").write_text("LIMIT = 3\n")
+    (tmp_path / "copy.py").write_text("LIMIT = 3  # same\n")
+    (tmp_path / "blob.py").write_bytes(b"\0\1\2")
+    candidates = [tmp_path / n for n in ("app.py", "constants.py", "copy.py", "blob.py")]
+    rejected = []
+
+    accepted = list(
+        classify_groups(
+            candidates, "unit", str(tmp_path), lambda f, r: rejected.append((f.name, r))
+        )
+    )
+
+    assert [f.name for f, _info in accepted] == ["app.py"]
+    assert rejected == [
+        ("constants.py", "not selected by the classifier"),
+        ("copy.py", "copy of a file that was not selected"),
+        ("blob.py", "binary"),
+    ]
+
+
+def test_classify_candidates_traces_each_classification(monkeypatch, tmp_path):
+    monkeypatch.setattr(
+        "utils.classify_file",
+        lambda _file_path, _content: {"should_test": False, "test_type": "unit", "priority": "low"},
+    )
+    (tmp_path / "app.py").write_text("def main():\n    return 1\n")
+    tracer.configure(str(tmp_path / "trace.json"))
+    try:
+        list(classify_candidates([tmp_path / "app.py"], "unit"))
+        spans = tracer.spans()
+    finally:
+        tracer.configure(None)
+
+    assert [(s.name, s.attributes["file"]) for s in spans] == [
+        ("classify", str(tmp_path / "app.py"))
+    ]
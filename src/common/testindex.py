@@ -0,0 +1,244 @@
+import ast
+import math
+import os
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from pydantic import BaseModel
+
+from common.suite import SKIP_DIRS, source_stem
+
+PY_FRAMEWORKS = ("pytest", "playwright")
+JS_EXTENSIONS = (".js", ".jsx", ".ts", ".tsx")
+
+MAX_INDEXED_FILES = 5000
+MAX_UNIT_CHARS = 2500
+MAX_EXAMPLES_CHARS = 6000
+
+# BM25 parameters
+K1 = 1.5
+B = 0.75
+
+IDENTIFIER = re.compile(r"[A-Za-z_$][A-Za-z0-9_$]*")
+SUBWORD = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+")
+# Top-level JS test blocks and setup calls start a new unit
+JS_UNIT_START = re.compile(
+    r"^(describe|test|it|beforeAll|beforeEach|afterAll|afterEach)\b|^(export\s+)?(async\s+)?function\b"
+    r"|^(export\s+)?(const|let)\s+\w+\s*=\s*(async\s+)?(\(|function)"
+)
+
+# Words every test file has, which say nothing about what it tests
+STOPWORDS = set(
+    """
+    and as assert async await break class const continue def del describe elif else except
+    expect export false finally for from function if import in is it let lambda new none not
+    null or pass raise require return self test tests this to true try undefined var while
+    with yield
+    """.split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Splits code into lowercase identifier tokens: each identifier, plus its
+    snake_case and camelCase parts (create_user gives create_user, create, user).
+    """
+    tokens = []
+    for identifier in IDENTIFIER.findall(text):
+        lowered = identifier.lower()
+        parts = [p.lower() for p in SUBWORD.findall(identifier)]
+        for token in {lowered, *parts}:
+            if len(token) > 1 and token not in STOPWORDS:
+                tokens.append(token)
+    return tokens
+
+
+class ExampleUnit(BaseModel):
+    """
+    One retrievable piece of an existing test file: a test, a fixture, a
+    helper or a test class, with the imports of its file.
+    """
+
+    path: str  # relative to the root it was found in
+    name: str
+    code: str
+    imports: str = ""
+
+
+def _clip(code: str) -> str:
+    if len(code) <= MAX_UNIT_CHARS:
+        return code
+    return code[:MAX_UNIT_CHARS].rstrip() + "\n    ...\n"
+
+
+def _python_units(path: str, source: str) -> List[ExampleUnit]:
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return []
+    imports = "\n".join(
+        ast.get_source_segment(source, node) or ""
+        for node in tree.body
+        if isinstance(node, (ast.Import, ast.ImportFrom))
+    )
+    units = []
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            start = min([node.lineno, *(d.lineno for d in node.decorator_list)])
+            code = "\n".join(source.splitlines()[start - 1 : node.end_lineno])
+            units.append(ExampleUnit(path=path, name=node.name, code=_clip(code), imports=imports))
+    return units
+
+
+def _js_units(path: str, source: str) -> List[ExampleUnit]:
+    lines = source.splitlines()
+    imports = "\n".join(
+        line for line in lines if line.startswith("import ") or "require(" in line[:80]
+    )
+    starts = [i for i, line in enumerate(lines) if JS_UNIT_START.match(line)]
+    units = []
+    for start, end in zip(starts, [*starts[1:], len(lines)]):
+        code = "\n".join(lines[start:end]).rstrip()
+        name = IDENTIFIER.search(lines[start]).group(0)
+        units.append(ExampleUnit(path=path, name=name, code=_clip(code), imports=imports))
+    return units
+
+
+def is_test_file(path: Path) -> bool:
+    if path.name == "conftest.py" or re.search(r"\.cy\.[jt]sx?$", path.name):
+        return True
+    return source_stem(path) is not None
+
+
+def find_test_files(root: str, framework: str) -> List[Path]:
+    extensions = (".py",) if framework in PY_FRAMEWORKS else JS_EXTENSIONS
+    found: List[Path] = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS and not d.startswith("."))
+        for filename in sorted(filenames):
+            path = Path(dirpath) / filename
+            if path.suffix in extensions and is_test_file(path):
+                found.append(path)
+                if len(found) >= MAX_INDEXED_FILES:
+                    return found
+    return found
+
+
+class ExampleIndex:
+    """
+    BM25 index over the tests, fixtures and helpers of existing test files.
+    """
+
+    def __init__(self, units: List[ExampleUnit]):
+        self.units = units
+        self._terms = [Counter(tokenize(f"{u.name} {u.code}")) for u in units]
+        self._lengths = [sum(terms.values()) for terms in self._terms]
+        self._average = sum(self._lengths) / len(units) if units else 0.0
+        frequency: Counter = Counter()
+        for terms in self._terms:
+            frequency.update(terms.keys())
+        self._idf = {
+            term: math.log(1 + (len(units) - n + 0.5) / (n + 0.5)) for term, n in frequency.items()
+        }
+
+    @classmethod
+    def build(cls, roots: List[str], framework: str) -> "ExampleIndex":
+        units: List[ExampleUnit] = []
+        seen = set()
+        for root in roots:
+            for path in find_test_files(root, framework):
+                if path.resolve() in seen:
+                    continue
+                seen.add(path.resolve())
+                try:
+                    source = path.read_text(encoding="utf-8")
+                except (OSError, UnicodeDecodeError):
+                    continue
+                relative = str(path.relative_to(root))
+                if path.suffix == ".py":
+                    units.extend(_python_units(relative, source))
+                else:
+                    units.extend(_js_units(relative, source))
+        return cls(units)
+
+    def search(self, query: str, top_k: int) -> List[Tuple[float, ExampleUnit]]:
+        terms = set(tokenize(query))
+        scores = []
+        for unit, counts, length in zip(self.units, self._terms, self._lengths):
+            score = 0.0
+            for term in terms & counts.keys():
+                tf = counts[term]
+                norm = tf + K1 * (1 - B + B * length / (self._average or 1))
+                score += self._idf[term] * tf * (K1 + 1) / norm
+            if score > 0:
+                scores.append((score, unit))
+        scores.sort(key=lambda pair: -pair[0])
+        return scores[:top_k]
+
+
+def render_examples(
+    hits: List[Tuple[float, ExampleUnit]], max_chars: int = MAX_EXAMPLES_CHARS
+) -> str:
+    """
+    Renders retrieved units grouped by file, each file's imports once.
+    """
+    by_file: Dict[str, List[ExampleUnit]] = {}
+    for _score, unit in hits:
+        by_file.setdefault(unit.path, []).append(unit)
+    blocks = []
+    size = 0
+    for path, units in by_file.items():
+        header = f"# {path}" if path.endswith(".py") else f"// {path}"
+        parts = [units[0].imports] if units[0].imports else []
+        parts.extend(unit.code for unit in units)
+        block = header + "\n" + "\n\n".join(parts)
+        if blocks and size + len(block) > max_chars:
+            break
+        blocks.append(block)
+        size += len(block)
+    return "\n\n".join(blocks)
+
+
+class ExampleIndexes:
+    """
+    One index per set of roots and framework, built on first use, that
+    retrieves examples for generation and repair prompts.
+    """
+
+    def __init__(self):
+        self.top_k = 0
+        self._indexes: Dict[Tuple[Tuple[str, ...], str], ExampleIndex] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, top_k: int):
+        self.top_k = top_k
+
+    @property
+    def enabled(self) -> bool:
+        return self.top_k > 0
+
+    def index(self, roots: List[str], framework: str) -> ExampleIndex:
+        resolved = tuple(dict.fromkeys(str(Path(r).resolve()) for r in roots if Path(r).is_dir()))
+        key = (resolved, framework)
+        with self._lock:
+            # Built once per run; tests written during the run are not added
+            if key not in self._indexes:
+                self._indexes[key] = ExampleIndex.build(list(resolved), framework)
+            return self._indexes[key]
+
+    def examples(self, roots: List[str], framework: str, file_path: str, code: str) -> str:
+        """
+        Returns the top_k existing tests and fixtures most relevant to the
+        source file, rendered for the prompt, or "" when none match.
+        """
+        if not self.enabled:
+            return ""
+        query = f"{Path(file_path).with_suffix('').as_posix().replace('/', ' ')} {code}"
+        return render_examples(self.index(roots, framework).search(query, self.top_k))
+
+
+# Used by generation_node and repair_node when enabled with --examples
+example_indexes = ExampleIndexes()
@@ -0,0 +1,290 @@
+import contextvars
+import json
+import os
+import secrets
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from pydantic import BaseModel
+
+TRACE_FORMATS = ("chrome", "otlp")
+# Attributes a span takes over from its parent unless it sets them itself
+INHERITED_ATTRIBUTES = ("file", "node")
+
+
+class Span(BaseModel):
+    """
+    One timed operation. Times are nanoseconds since the epoch. Detached spans
+    may overlap others on the same thread (e.g. requests on an event loop).
+    """
+
+    name: str
+    category: str
+    span_id: str
+    parent_id: Optional[str] = None
+    start_ns: int
+    end_ns: Optional[int] = None
+    thread_id: int
+    thread_name: str
+    detached: bool = False
+    error: Optional[str] = None
+    attributes: Dict[str, Any] = {}
+
+
+# The span that new spans in this context are started under
+_current: "contextvars.ContextVar[Optional[Span]]" = contextvars.ContextVar(
+    "autoqa_span", default=None
+)
+
+
+class Tracer:
+    """
+    Records spans of workflows, graph nodes, LLM calls, test runs and Slack
+    posts, and writes them as a Chrome trace (for Perfetto or chrome://tracing)
+    or as OTLP JSON. Recording does nothing until configured with a path.
+    """
+
+    def __init__(self):
+        self.path: Optional[Path] = None
+        self.trace_format = "chrome"
+        self.trace_id = secrets.token_hex(16)
+        self._spans: List[Span] = []
+        self._lock = threading.Lock()
+        # Wall clock start plus a monotonic offset, so durations survive clock changes
+        self._epoch_ns = time.time_ns() - time.perf_counter_ns()
+
+    def configure(self, path: Optional[str], trace_format: Optional[str] = None):
+        if trace_format is not None and trace_format not in TRACE_FORMATS:
+            raise ValueError(f"Traces can be written as {' or '.join(TRACE_FORMATS)}.")
+        self.path = Path(path) if path else None
+        self.trace_format = trace_format or "chrome"
+        with self._lock:
+            self._spans = []
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def _now(self) -> int:
+        return self._epoch_ns + time.perf_counter_ns()
+
+    def start(
+        self, name: str, category: str, detached: bool = False, **attributes: Any
+    ) -> Optional[Span]:
+        """
+        Starts a span under the current one without making it current. Returns
+        None when tracing is off; end() accepts that too.
+        """
+        if not self.enabled:
+            return None
+        parent = _current.get()
+        inherited = {}
+        if parent is not None:
+            inherited = {
+                k: parent.attributes[k] for k in INHERITED_ATTRIBUTES if k in parent.attributes
+            }
+        thread = threading.current_thread()
+        return Span(
+            name=name,
+            category=category,
+            span_id=secrets.token_hex(8),
+            parent_id=parent.span_id if parent else None,
+            start_ns=self._now(),
+            thread_id=thread.ident or 0,
+            thread_name=thread.name,
+            detached=detached,
+            attributes={**inherited, **{k: v for k, v in attributes.items() if v is not None}},
+        )
+
+    def end(self, span: Optional[Span], error: Optional[BaseException] = None):
+        if span is None:
+            return
+        span.end_ns = self._now()
+        if error is not None:
+            span.error = f"{type(error).__name__}: {error}"
+        with self._lock:
+            self._spans.append(span)
+
+    @contextmanager
+    def span(self, name: str, category: str, **attributes: Any) -> Iterator[Optional[Span]]:
+        """
+        Times the block as a child of the current span, and as the parent of
+        spans started inside it on this thread or in contexts copied from it.
+        """
+        span = self.start(name, category, **attributes)
+        if span is None:
+            yield None
+            return
+        token = _current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            self.end(span, e)
+            raise
+        else:
+            self.end(span)
+        finally:
+            _current.reset(token)
+
+    def spans(self) -> List[Span]:
+        with self._lock:
+            return list(self._spans)
+
+    def export(self) -> Optional[Path]:
+        """
+        Writes the finished spans to the configured path and returns it.
+        """
+        if not self.enabled:
+            return None
+        spans = sorted(self.spans(), key=lambda s: s.start_ns)
+        if self.trace_format == "otlp":
+            data = otlp_trace(spans, self.trace_id)
+        else:
+            data = chrome_trace(spans)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp, self.path)
+        return self.path
+
+
+def _args(span: Span) -> Dict[str, Any]:
+    args = dict(span.attributes)
+    if span.error:
+        args["error"] = span.error
+    return args
+
+
+def chrome_trace(spans: List[Span]) -> dict:
+    """
+    Chrome trace event format: one complete event per span on its thread's
+    track, and async begin/end pairs for detached spans.
+    """
+    pid = os.getpid()
+    origin = min((s.start_ns for s in spans), default=0)
+    events: List[dict] = [
+        {"name": "process_name", "ph": "M", "pid": pid, "args": {"name": "autoqa"}}
+    ]
+    threads = {}
+    for span in spans:
+        threads.setdefault(span.thread_id, span.thread_name)
+        ts = (span.start_ns - origin) / 1000
+        event = {"name": span.name, "cat": span.category, "pid": pid, "tid": span.thread_id}
+        if span.detached:
+            async_event = {**event, "id": span.span_id}
+            events.append({**async_event, "ph": "b", "ts": ts, "args": _args(span)})
+            events.append({**async_event, "ph": "e", "ts": (span.end_ns - origin) / 1000})
+        else:
+            dur = (span.end_ns - span.start_ns) / 1000
+            events.append({**event, "ph": "X", "ts": ts, "dur": dur, "args": _args(span)})
+    for tid, name in threads.items():
+        events.append(
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+        )
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def otlp_trace(spans: List[Span], trace_id: str) -> dict:
+    """
+    OTLP/JSON (ExportTraceServiceRequest) as written by the OpenTelemetry
+    collector's file exporter, so it can be replayed into any OTLP backend.
+    """
+    otlp_spans = []
+    for span in spans:
+        attributes = {
+            **span.attributes,
+            "autoqa.category": span.category,
+            "thread.id": span.thread_id,
+            "thread.name": span.thread_name,
+        }
+        otlp_span = {
+            "traceId": trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": 3 if span.category in ("llm", "slack") else 1,  # CLIENT or INTERNAL
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in attributes.items()],
+            "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+        }
+        if span.parent_id:
+            otlp_span["parentSpanId"] = span.parent_id
+        otlp_spans.append(otlp_span)
+    resource = [{"key": "service.name", "value": {"stringValue": "autoqa"}}]
+    return {
+        "resourceSpans": [
+            {
+                "resource": {"attributes": resource},
+                "scopeSpans": [{"scope": {"name": "autoqa"}, "spans": otlp_spans}],
+            }
+        ]
+    }
+
+
+class LLMSpans(BaseCallbackHandler):
+    """
+    LangChain callback that records a span for every LLM call, under the span
+    that made the call.
+    """
+
+    def __init__(self, tracer: Tracer):
+        self.tracer = tracer
+        self._open: Dict[UUID, Span] = {}
+        self._lock = threading.Lock()
+
+    def _start(self, serialized: Optional[dict], run_id: UUID, kwargs: dict):
+        params = kwargs.get("invocation_params") or {}
+        model = params.get("model") or params.get("model_name")
+        if not model and serialized:
+            model = (serialized.get("id") or [None])[-1]
+        span = self.tracer.start("llm call", "llm", model=model)
+        if span is not None:
+            with self._lock:
+                self._open[run_id] = span
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs: Any) -> None:
+        self._start(serialized, run_id, kwargs)
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, **kwargs: Any) -> None:
+        self._start(serialized, run_id, kwargs)
+
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            span = self._open.pop(run_id, None)
+        if span is None:
+            return
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                reported = getattr(message, "usage_metadata", None) or {}
+                for key in ("input_tokens", "output_tokens"):
+                    if key in reported:
+                        span.attributes[key] = span.attributes.get(key, 0) + reported[key]
+        self.tracer.end(span)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            span = self._open.pop(run_id, None)
+        self.tracer.end(span, error)
+
+
+# Configured with `--trace`; written when the command finishes
+tracer = Tracer()
+llm_spans = LLMSpans(tracer)
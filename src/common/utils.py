@@ -1,9 +1,12 @@
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import click
 
 from common.agent import classify_file
+from common.dedupe import duplicate_key
+from common.ingest import sources
+from common.tracing import tracer
 
 
 def write_output_file(output_dir: str, filename: str, content: str):
@@ -26,15 +29,15 @@ def clean_code_fences(text: str) -> str:
     return "\n".join(cleaned)
 
 
-def discover_source_files(
+def collect_candidate_files(
     project_root: str,
     test_type: str,
     include_dirs: List[str] = None,
     exclude_dirs: List[str] = None,
     file_glob: str = None,
-) -> Tuple[List[Path], Dict[str, dict]]:
+) -> Iterator[Path]:
     """
-    Recursively discovers files relevant for the test_type.
+    Lazily walks the project and yields files matching the test_type or file_glob.
     """
     exts = []
     if test_type == "unit":
@@ -46,39 +49,72 @@ def discover_source_files(
     else:
         raise ValueError(f"Unsupported test type: {test_type}")
 
-    files = []
     project_root = Path(project_root)
     exclude_paths = [project_root / d for d in exclude_dirs or []]
 
     def is_excluded(path: Path):
         return any(excluded in path.parents for excluded in exclude_paths)
 
-    files = []
-
     if include_dirs:
         dirs_to_scan = [project_root / d for d in include_dirs]
     else:
         dirs_to_scan = [project_root]
 
+    seen = set()
     for base_dir in dirs_to_scan:
-        if file_glob:
-            # Only apply file_glob ONCE per base_dir
-            for f in base_dir.rglob(file_glob):
-                if not is_excluded(f):
-                    files.append(f)
-        else:
-            # If no file_glob, loop over extensions
-            for ext in exts:
-                for f in base_dir.rglob(f"*{ext}"):
-                    if not is_excluded(f):
-                        files.append(f)
+        # Only apply file_glob ONCE per base_dir, otherwise loop over extensions
+        patterns = [file_glob] if file_glob else [f"*{ext}" for ext in exts]
+        for pattern in patterns:
+            for f in base_dir.rglob(pattern):
+                if f not in seen and not is_excluded(f):
+                    seen.add(f)
+                    yield f
+
 
+def iter_source_files(
+    project_root: str,
+    test_type: str,
+    include_dirs: List[str] = None,
+    exclude_dirs: List[str] = None,
+    file_glob: str = None,
+) -> Iterator[Tuple[Path, dict]]:
+    """
+    Yields (file, classification) for each accepted file as soon as it is classified.
+    """
+    candidates = collect_candidate_files(
+        project_root, test_type, include_dirs, exclude_dirs, file_glob
+    )
+    yield from classify_candidates(candidates, test_type)
+
+
+# Called with each candidate file that is not accepted, and why
+OnRejected = Optional[Callable[[Path, str], None]]
+# Called with an accepted file and the path of a copy grouped under it
+OnGrouped = Optional[Callable[[Path, str], None]]
+
+
+def classify_candidates(
+    candidates: Iterable[Path], test_type: str, on_rejected: OnRejected = None
+) -> Iterator[Tuple[Path, dict]]:
+    """
+    Classifies candidate files and yields the accepted ones with their metadata.
+    """
+    rejected = on_rejected or (lambda _f, _reason: None)
     # 🟢 Agent-based filtering
-    file_metadata = {}
-    filtered = []
-    for f in files:
-        skip_classification = test_type == "manual"
-        if skip_classification:
+    manual = test_type == "manual"
+    for f in candidates:
+        try:
+            # Manual test plans are written from documents, whose long lines are prose
+            source = sources.read(f, detect_minified=not manual)
+        except OSError as e:
+            click.echo(f"[AutoQA] [Ingest]: Skipping {f}: {e}")
+            rejected(f, "unreadable")
+            continue
+        if source.skip_reason:
+            click.echo(f"[AutoQA] [Ingest]: Skipping {f}: {source.skip_reason}")
+            rejected(f, source.skip_reason)
+            continue
+        if manual:
             click.echo(f"[AutoQA] [Agent]: Skipping classification for manual test type: {f}")
             info = {
                 "should_test": True,
@@ -86,23 +122,77 @@ def discover_source_files(
                 "framework": None,
                 "priority": "low",
             }
-            filtered.append(f)
-            file_metadata[str(f)] = info
             click.echo(f"[AutoQA] [Manual Mode]: Including {f}")
+            yield f, info
             continue
-        with open(f, "r") as fp:
-            content = fp.read()
-        info = classify_file(str(f), content)
+        with tracer.span("classify", "discovery", file=str(f)):
+            info = classify_file(str(f), source.text)
         if info["should_test"]:
             click.echo(
                 f"[AutoQA] [Agent]: ✅ YES - {f} (Type: {info['test_type']}, Priority: {info['priority']})"
             )
-            filtered.append(f)
-            file_metadata[str(f)] = info
+            yield f, info
         else:
             click.echo(f"[AutoQA] [Agent]: ❌ NO - {f}")
+            rejected(f, "not selected by the classifier")
+
+
+def classify_groups(
+    candidates: Iterable[Path],
+    test_type: str,
+    project_root: str,
+    on_rejected: OnRejected = None,
+    on_grouped: OnGrouped = None,
+) -> Iterator[Tuple[Path, dict]]:
+    """
+    Like classify_candidates, but classifies one file per group of identical
+    files. Files are hashed as they arrive and each accepted file is yielded
+    as soon as it is classified, with an info["duplicates"] list that copies
+    found later are appended to (relative to project_root). Read the list once
+    the file is done, and again once the generator is exhausted. on_grouped
+    is told about each copy as it is appended.
+    """
+    # Accepted file and duplicate list by content; None for rejected ones
+    groups: Dict[str, Optional[Tuple[Path, List[str]]]] = {}
+    grouped = 0
+    for f in candidates:
+        key = duplicate_key(f)
+        if key in groups:
+            group = groups[key]
+            if group is not None:
+                member = str(f.relative_to(project_root))
+                group[1].append(member)
+                grouped += 1
+                if on_grouped:
+                    on_grouped(group[0], member)
+            elif on_rejected:
+                on_rejected(f, "copy of a file that was not selected")
+            continue
+        groups[key] = None
+        for accepted, info in classify_candidates([f], test_type, on_rejected):
+            groups[key] = (accepted, [])
+            yield accepted, {**info, "duplicates": groups[key][1]}
+    if grouped:
+        click.echo(f"[AutoQA] [Dedupe]: {grouped} duplicate files will reuse generated tests.")
+
+
+def discover_source_files(
+    project_root: str,
+    test_type: str,
+    include_dirs: List[str] = None,
+    exclude_dirs: List[str] = None,
+    file_glob: str = None,
+) -> Tuple[List[Path], Dict[str, dict]]:
+    """
+    Recursively discovers files relevant for the test_type.
+    """
+    file_metadata = {}
+    for f, info in iter_source_files(
+        project_root, test_type, include_dirs, exclude_dirs, file_glob
+    ):
+        file_metadata[str(f)] = info
 
-    return list(sorted(set(filtered))), file_metadata
+    return sorted(Path(f) for f in file_metadata), file_metadata
 
 
 def resolve_output_path(
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from dotenv import load_dotenv
 from langchain.prompts import ChatPromptTemplate
 
@@ -7,32 +9,73 @@ load_dotenv()
 
 llm = get_llm()
 
-# Create prompt templates
-UNIT_TEST_TEMPLATE = ChatPromptTemplate.from_template(
-    """
+# Shared leading context. Generation and every repair iteration for a file send
+# this exact message first, so providers can serve it from their prompt cache.
+# {examples} is examples_section() of the file's retrieved examples, or "".
+CODE_CONTEXT = """
 You are an expert QA engineer.
-Generate Python unit tests using pytest for this file:
+You write and maintain tests for this file:
 
 {file_path}
 
 The contents of the file is:
 
 {code}
+{examples}"""
 
-Return only valid Python code and ensure imports are correct. Include code comments where necessary to explain the test logic but do not include any additional text or explanations outside the code block.
+DOCUMENT_CONTEXT = """
+You are a senior QA analyst.
+This is the PRD and user stories you are writing a manual QA checklist for:
+
+{code}
 """
-)
 
-UNIT_JEST_TEMPLATE = ChatPromptTemplate.from_template(
+
+def examples_section(examples: Optional[str]) -> str:
     """
-You are an expert QA engineer.
-Generate JavaScript unit tests using Jest for this file:
+    Returns the prompt text that introduces existing project tests, or "".
+    """
+    if not examples:
+        return ""
+    return (
+        "\nExisting tests, fixtures and helpers from this project. Follow their style and "
+        "reuse their fixtures and helpers where they fit:\n\n" + examples + "\n"
+    )
 
-{file_path}
 
-The contents of the file is:
+def supports_prompt_caching(model) -> bool:
+    """
+    Anthropic models only cache prompts that carry an explicit cache breakpoint.
+    OpenAI and Gemini cache stable prefixes automatically.
+    """
+    model = getattr(model, "inner", None) or model
+    return type(model).__name__ in ("ChatAnthropic", "ChatAnthropicVertex")
+
+
+def _prompt(context: str, task: str) -> ChatPromptTemplate:
+    if supports_prompt_caching(llm):
+        block = {"type": "text", "text": context, "cache_control": {"type": "ephemeral"}}
+        prompt = ChatPromptTemplate.from_messages([("system", [block]), ("human", task)])
+    else:
+        prompt = ChatPromptTemplate.from_messages([("system", context), ("human", task)])
+    # Retrieved examples are optional
+    return prompt.partial(examples="") if "{examples}" in context else prompt
 
-{code}
+
+# Create prompt templates
+UNIT_TEST_TEMPLATE = _prompt(
+    CODE_CONTEXT,
+    """
+Generate Python unit tests using pytest for the file above.
+
+Return only valid Python code and ensure imports are correct. Include code comments where necessary to explain the test logic but do not include any additional text or explanations outside the code block.
+""",
+)
+
+UNIT_JEST_TEMPLATE = _prompt(
+    CODE_CONTEXT,
+    """
+Generate JavaScript unit tests using Jest for the file above.
 
 Return only valid JavaScript code and ensure imports are correct. Include code comments where necessary to explain the test logic but do not include any additional text or explanations outside the code block.
 
@@ -40,38 +83,32 @@ Important:
 - Output ONLY valid JavaScript, no TypeScript syntax.
 - Do not use "as" type assertions or type imports.
 - Do not include explanations or markdown.
-"""
+""",
 )
 
 
-E2E_PLAYWRIGHT_TEMPLATE = ChatPromptTemplate.from_template(
+E2E_PLAYWRIGHT_TEMPLATE = _prompt(
+    CODE_CONTEXT,
     """
-You are an expert QA engineer.
-Generate end-to-end tests using Playwright in Python for this web application code:
-
-{code}
+Generate end-to-end tests using Playwright in Python for the web application code above.
 
 Return only valid Python code. Include code comments where necessary to explain the test logic but do not include any additional text or explanations outside the code block.
-"""
+""",
 )
 
-E2E_CYPRESS_TEMPLATE = ChatPromptTemplate.from_template(
+E2E_CYPRESS_TEMPLATE = _prompt(
+    CODE_CONTEXT,
     """
-You are an expert QA engineer.
-Generate end-to-end tests using Cypress (JavaScript) for this web application code:
-
-{code}
+Generate end-to-end tests using Cypress (JavaScript) for the web application code above.
 
 Return only valid JavaScript code. Include code comments where necessary to explain the test logic but do not include any additional text or explanations outside the code block.
-"""
+""",
 )
 
-MANUAL_QA_TEMPLATE = ChatPromptTemplate.from_template(
+MANUAL_QA_TEMPLATE = _prompt(
+    DOCUMENT_CONTEXT,
     """
-You are a senior QA analyst.
-Given this PRD and user stories, generate a detailed manual QA checklist:
-
-{code}
+Given the PRD and user stories above, generate a detailed manual QA checklist.
 
 Return a numbered list of steps as a checklist. Also return related user stories.
 
@@ -88,7 +125,7 @@ Feature user stories:
 ==================
 
 The title should be "Manual Testing Checklist".
-"""
+""",
 )
 
 # Map test type/framework to prompt template
@@ -101,55 +138,87 @@ PROMPT_MAP = {
 }
 
 
-def create_generation_chain(test_type: str, framework: str):
+def with_temperature(model, temperature: Optional[float]):
+    """
+    Returns a copy of model that samples at temperature, or model itself when
+    temperature is None or the model has no temperature setting.
+    """
+    if temperature is None or "temperature" not in type(model).model_fields:
+        return model
+    return model.model_copy(update={"temperature": temperature})
+
+
+def create_generation_chain(test_type: str, framework: str, temperature: Optional[float] = None):
     # Determine which prompt to use
     key = (test_type, framework) if test_type != "manual" else ("manual", None)
     prompt = PROMPT_MAP.get(key)
     if not prompt:
         raise ValueError(f"Unsupported combination: {test_type}/{framework}")
 
-    return prompt | llm
+    return prompt | with_temperature(llm, temperature)
 
 
-REPAIR_PYTEST_TEMPLATE = ChatPromptTemplate.from_template(
-    """
-You are an expert Python QA engineer.
+# Packed generation writes tests for several small files in one request
+PACK_CONTEXT = """
+You are an expert QA engineer.
+You write tests for each of these files (paths are relative to the project root):
 
-The following tests failed when executed:
+{sources}
+"""
 
-{error_output}
+PACK_TARGETS = {
+    ("unit", "pytest"): "Python unit tests using pytest",
+    ("unit", "jest"): "JavaScript unit tests using Jest (no TypeScript syntax)",
+    ("e2e", "playwright"): "end-to-end tests using Playwright in Python",
+    ("e2e", "cypress"): "end-to-end tests using Cypress (JavaScript)",
+}
 
-Here is the code you were testing:
+PACK_TEMPLATE = _prompt(
+    PACK_CONTEXT,
+    """
+Generate {target} for each file above, as one separate test file per source file.
 
-{code}
+Return every test file in this format, with the source path exactly as given above:
 
-Here is the failing test code:
+=== TESTS: <source path> ===
+<the complete test file>
+=== END TESTS ===
 
-{failing_tests}
+Each test file must be valid code on its own with correct imports. Include code comments where necessary to explain the test logic but do not include any other text or markdown outside these blocks.
+""",
+)
 
-Please correct the tests so they pass.
 
-Return ONLY valid Python code. Do not include explanations or markdown.
-"""
-)
+def create_pack_chain(test_type: str, framework: str):
+    target = PACK_TARGETS.get((test_type, framework))
+    if not target:
+        raise ValueError(f"Unsupported combination for packed generation: {test_type}/{framework}")
+    return PACK_TEMPLATE.partial(target=target) | llm
 
-REPAIR_JEST_TEMPLATE = ChatPromptTemplate.from_template(
-    """
-You are an expert JavaScript QA engineer.
 
-The following Jest tests failed:
+# Repair instructions come before the failing tests and error output so that
+# everything up to the per-iteration details stays identical between retries.
+REPAIR_PYTEST_TEMPLATE = _prompt(
+    CODE_CONTEXT,
+    """
+The Python tests below failed when executed. Please correct the tests so they pass.
 
-{error_output}
+Return ONLY valid Python code. Do not include explanations or markdown.
 
-Here is the code under test:
+The following tests failed when executed:
 
-{code}
+{error_output}
 
 Here is the failing test code:
 
 {failing_tests}
+""",
+)
 
-Please correct the tests so they pass.
+REPAIR_JEST_TEMPLATE = _prompt(
+    CODE_CONTEXT,
+    """
+The Jest tests below failed. Please correct the tests so they pass.
 
 Important:
 - Output ONLY valid JavaScript, no TypeScript syntax.
@@ -158,30 +227,33 @@ Important:
 - Do not repeat the same failing patterns.
 - If the error relates to syntax, adjust accordingly.
 - Return ONLY the full corrected test file as valid JavaScript.
-"""
+
+The following Jest tests failed:
+
+{error_output}
+
+Here is the failing test code:
+
+{failing_tests}
+""",
 )
 
 
-REPAIR_CYPRESS_TEMPLATE = ChatPromptTemplate.from_template(
+REPAIR_CYPRESS_TEMPLATE = _prompt(
+    CODE_CONTEXT,
     """
-You are an expert QA engineer.
+The Cypress tests below failed. Please correct the tests so they pass.
+
+Return ONLY valid JavaScript code. Do not include explanations or markdown.
 
 The following Cypress tests failed:
 
 {error_output}
 
-Here is the application code:
-
-{code}
-
 Here is the failing test code:
 
 {failing_tests}
-
-Please correct the tests so they pass.
-
-Return ONLY valid JavaScript code. Do not include explanations or markdown.
-"""
+""",
 )
 
 
@@ -196,3 +268,56 @@ def create_repair_chain(framework: str):
         raise ValueError(f"Unsupported framework for repair: {framework}")
 
     return prompt | llm
+
+
+# Augmentation sends only the uncovered parts of the file, not the whole file
+REGION_CONTEXT = """
+You are an expert QA engineer.
+You extend the existing tests for this file:
+
+{file_path}
+
+These parts of the file are not covered by the existing tests (line numbers on the left):
+
+{regions}
+"""
+
+AUGMENT_PYTEST_TEMPLATE = _prompt(
+    REGION_CONTEXT,
+    """
+Write additional Python pytest tests that exercise the uncovered lines and branches above.
+
+The existing test file already contains these imports, fixtures and helpers, which you can use:
+
+{fixtures}
+
+Return ONLY the new test functions plus any imports they need that are missing above, as valid Python code. Do not repeat the existing code. Do not include explanations or markdown.
+""",
+)
+
+AUGMENT_JEST_TEMPLATE = _prompt(
+    REGION_CONTEXT,
+    """
+Write additional Jest tests that exercise the uncovered lines and branches above.
+
+The existing test file already contains these imports, mocks and setup blocks, which you can use:
+
+{fixtures}
+
+Important:
+- Output ONLY valid JavaScript, no TypeScript syntax.
+- Return ONLY the new describe/it blocks plus any imports they need that are missing above.
+- Do not repeat the existing code. Do not include explanations or markdown.
+""",
+)
+
+
+def create_augment_chain(framework: str):
+    if framework == "pytest":
+        prompt = AUGMENT_PYTEST_TEMPLATE
+    elif framework == "jest":
+        prompt = AUGMENT_JEST_TEMPLATE
+    else:
+        raise ValueError(f"Unsupported framework for augmentation: {framework}")
+
+    return prompt | llm
@@ -0,0 +1,102 @@
+import hashlib
+import re
+import time
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+# Run-specific noise that changes between identical failures
+_VOLATILE_PATTERNS = [
+    re.compile(r"\b\d+(\.\d+)?\s*(s|ms|sec|seconds)\b"),  # durations
+    re.compile(r"0x[0-9a-fA-F]+"),  # object addresses
+    re.compile(r"/tmp/[^\s:]+"),  # temporary paths
+    re.compile(r"\b\d{4}-\d{2}-\d{2}[T ][\d:.]+\b"),  # timestamps
+]
+
+
+class RetryPolicy(BaseModel):
+    """
+    Decides when the repair loop should stop.
+
+    Besides the retry cap, the loop stops when the model returns the same test
+    code max_repeated_outputs times in a row, when the same (normalized) failure
+    is seen max_repeated_errors times in a row, or when the per-file time budget
+    is spent.
+    """
+
+    max_retries: int = 10
+    max_repeated_outputs: int = 2
+    max_repeated_errors: int = 3
+    time_budget: Optional[float] = None
+
+    @classmethod
+    def from_config(cls, config: dict, framework: str = None, **overrides) -> "RetryPolicy":
+        """
+        Builds a policy from the [retry] table of .autoqa.toml, applying the
+        [retry.<framework>] table and then any non-None overrides on top.
+        """
+        section = dict(config.get("retry", {}))
+        values = {k: v for k, v in section.items() if not isinstance(v, dict)}
+        if framework and isinstance(section.get(framework), dict):
+            values.update(section[framework])
+        values.update({k: v for k, v in overrides.items() if v is not None})
+        return cls(**values)
+
+    def to_state(self, now: float = None) -> dict:
+        """
+        Returns the GraphState fields that carry this policy through the graph.
+        """
+        start = now if now is not None else time.time()
+        return {
+            "max_retries": self.max_retries,
+            "max_repeated_outputs": self.max_repeated_outputs,
+            "max_repeated_errors": self.max_repeated_errors,
+            "deadline": start + self.time_budget if self.time_budget else None,
+        }
+
+
+def content_hash(text: Optional[str]) -> str:
+    return hashlib.sha256((text or "").strip().encode("utf-8")).hexdigest()[:16]
+
+
+def error_hash(output: Optional[str]) -> str:
+    """
+    Hashes test output with durations, addresses and temp paths removed.
+    """
+    normalized = output or ""
+    for pattern in _VOLATILE_PATTERNS:
+        normalized = pattern.sub("", normalized)
+    return content_hash(normalized)
+
+
+def _repeats(hashes: List[str]) -> int:
+    # Number of identical hashes at the end of the list
+    count = 0
+    for h in reversed(hashes):
+        if h != hashes[-1]:
+            break
+        count += 1
+    return count
+
+
+def stop_reason(state, after_repair: bool = False) -> Optional[str]:
+    """
+    Returns why the repair loop should stop after a test run, or None to retry.
+    After a repair, the retry it used up still gets its test run.
+    """
+    if state.status == "passed":
+        return "passed"
+    if state.retry_count >= state.max_retries + (1 if after_repair else 0):
+        return "max_retries"
+    if state.output_hashes and _repeats(state.output_hashes) >= state.max_repeated_outputs:
+        return "repeated_output"
+    if state.error_hashes and _repeats(state.error_hashes) >= state.max_repeated_errors:
+        return "repeated_error"
+    if state.deadline and time.time() >= state.deadline:
+        return "time_budget"
+    return None
+
+
+def route_after_run(state) -> str:
+    # The run records its stop_reason, so notify reports the reason routed on
+    return "notify" if state.stop_reason else "repair"
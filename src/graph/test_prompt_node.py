@@ -4,8 +4,12 @@ from langchain_openai import ChatOpenAI
 
 # Import the actual module where create_generation_chain and create_repair_chain are defined
 from prompt_node import (  # Replace 'your_module_name' with the actual module name
+    REPAIR_JEST_TEMPLATE,
+    UNIT_JEST_TEMPLATE,
+    _prompt,
     create_generation_chain,
     create_repair_chain,
+    supports_prompt_caching,
 )
 
 
@@ -85,3 +89,37 @@ def test_create_repair_chain_invalid_framework():
     # Test with invalid framework
     with pytest.raises(ValueError, match="Unsupported framework for repair: invalid"):
         create_repair_chain("invalid")
+
+
+# Prompt layout for provider-side caching
+def test_generation_and_repair_share_prefix():
+    values = {"code": "export const a = 1;", "file_path": "src/a.js"}
+    generation = UNIT_JEST_TEMPLATE.invoke(values).to_messages()
+    repair = REPAIR_JEST_TEMPLATE.invoke(
+        {**values, "failing_tests": "it('a')", "error_output": "boom"}
+    ).to_messages()
+    # The source code only appears in the shared leading message
+    assert generation[0] == repair[0]
+    assert "export const a = 1;" in str(generation[0].content)
+    assert "export const a = 1;" not in repair[1].content
+
+
+def test_supports_prompt_caching():
+    class ChatAnthropic:
+        pass
+
+    class Wrapper:
+        inner = ChatAnthropic()
+
+    assert supports_prompt_caching(ChatAnthropic())
+    assert supports_prompt_caching(Wrapper())
+    assert not supports_prompt_caching(ChatOpenAI())
+
+
+def test_prompt_adds_cache_breakpoint_for_anthropic(monkeypatch):
+    monkeypatch.setattr("prompt_node.supports_prompt_caching", lambda _model: True)
+    prompt = _prompt("Context {code}", "Task")
+    system = prompt.invoke({"code": "x = 1"}).to_messages()[0]
+    assert system.content == [
+        {"type": "text", "text": "Context x = 1", "cache_control": {"type": "ephemeral"}}
+    ]
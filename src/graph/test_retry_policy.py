@@ -0,0 +1,95 @@
+import time
+
+import pytest
+
+from graph.retry_policy import RetryPolicy, error_hash, route_after_run, stop_reason
+from graph.workflow import GraphState, route_after_repair
+
+
+@pytest.fixture
+def failed_state():
+    """Provides a state right after a failing test run."""
+    return GraphState(
+        input_code="def hello():\n    return 'world'",
+        file_path="src/hello.py",
+        test_type="unit",
+        framework="pytest",
+        project_root="/tmp/proj",
+        output_project_root="/tmp/proj/output",
+        output_path="/tmp/proj/output/test_hello.py",
+        status="failed",
+        output_hashes=["a"],
+        error_hashes=["e1"],
+    )
+
+
+def test_policy_from_config_framework_override():
+    config = {"retry": {"max_retries": 6, "max_repeated_errors": 2, "jest": {"max_retries": 3}}}
+    assert RetryPolicy.from_config(config, "pytest").max_retries == 6
+    jest = RetryPolicy.from_config(config, "jest")
+    assert jest.max_retries == 3
+    assert jest.max_repeated_errors == 2
+    # Explicit CLI values win, None means "not given"
+    assert RetryPolicy.from_config(config, "jest", max_retries=8).max_retries == 8
+    assert RetryPolicy.from_config(config, "jest", max_retries=None).max_retries == 3
+
+
+def test_policy_to_state_deadline():
+    assert RetryPolicy().to_state()["deadline"] is None
+    assert RetryPolicy(time_budget=30).to_state(now=100.0)["deadline"] == 130.0
+
+
+def test_error_hash_ignores_volatile_output():
+    first = "FAILED test_a.py - assert 1 == 2\n1 failed in 0.12s at 0x7f3a2c"
+    second = "FAILED test_a.py - assert 1 == 2\n1 failed in 3.40s at 0x7f99aa"
+    assert error_hash(first) == error_hash(second)
+    assert error_hash(first) != error_hash("FAILED test_b.py")
+
+
+def test_stop_reason_retry(failed_state):
+    assert stop_reason(failed_state) is None
+    assert route_after_run(failed_state) == "repair"
+
+
+def test_stop_reason_passed(failed_state):
+    state = failed_state.model_copy(update={"status": "passed"})
+    assert stop_reason(state) == "passed"
+    assert route_after_run(state.model_copy(update={"stop_reason": "passed"})) == "notify"
+
+
+def test_stop_reason_max_retries(failed_state):
+    state = failed_state.model_copy(update={"retry_count": 3, "max_retries": 3})
+    assert stop_reason(state) == "max_retries"
+
+
+def test_stop_reason_repeated_output(failed_state):
+    state = failed_state.model_copy(update={"output_hashes": ["a", "b", "b"]})
+    assert stop_reason(state) == "repeated_output"
+    repaired = state.model_copy(update={"stop_reason": "repeated_output"})
+    assert route_after_repair(repaired, "save") == "notify"
+    assert route_after_repair(failed_state, "save") == "save"
+
+
+def test_stop_reason_repeated_error(failed_state):
+    state = failed_state.model_copy(update={"error_hashes": ["e1", "e2", "e2", "e2"]})
+    assert stop_reason(state) == "repeated_error"
+    state = failed_state.model_copy(update={"error_hashes": ["e2", "e2", "e1"]})
+    assert stop_reason(state) is None
+
+
+def test_stop_reason_after_repair(failed_state):
+    expired = failed_state.model_copy(update={"deadline": time.time() - 1})
+    assert stop_reason(expired, after_repair=True) == "time_budget"
+    repeated = failed_state.model_copy(update={"error_hashes": ["e1", "e1", "e1"]})
+    assert stop_reason(repeated, after_repair=True) == "repeated_error"
+    # The last allowed repair is still run
+    last = failed_state.model_copy(update={"retry_count": 3, "max_retries": 3})
+    assert stop_reason(last, after_repair=True) is None
+    assert stop_reason(last.model_copy(update={"retry_count": 4}), after_repair=True) == (
+        "max_retries"
+    )
+
+
+def test_stop_reason_time_budget(failed_state):
+    state = failed_state.model_copy(update={"deadline": time.time() - 1})
+    assert stop_reason(state) == "time_budget"
@@ -1,3 +1,5 @@
+import sys
+import threading
 from pathlib import Path
 from unittest.mock import MagicMock, mock_open, patch
 
@@ -5,13 +7,22 @@ import pytest
 
 # Assuming the code to be tested is in 'graph/workflow.py'
 # and the test file is 'graph/test_workflow.py'
+from common.e2e import E2ESessionError
+from common.forkserver import ForkServerError
+from common.runcache import RunCache
 from graph.workflow import (
     GraphState,
+    _run_subprocess,
     approval_node,
     build_repair_workflow,
     build_workflow,
+    candidate_path,
+    generation_node,
+    next_node,
     output_node,
+    repair_node,
     runner_node,
+    speculative_node,
     validation_node,
 )
 
@@ -44,6 +55,29 @@ def test_build_workflow_compiles():
     assert workflow is not None
 
 
+def test_next_node_follows_workflow_edges(base_state):
+    """Test next_node picks the node the workflow would run after a checkpoint."""
+    assert next_node("generate", base_state) == "validate"
+    assert next_node("save", base_state) == "run"
+    assert next_node("approve", base_state.model_copy(update={"status": "approved"})) == "save"
+    assert (
+        next_node("approve", base_state.model_copy(update={"status": "awaiting_approval"})) is None
+    )
+    passed = base_state.model_copy(update={"status": "passed", "stop_reason": "passed"})
+    assert next_node("run", passed) == "notify"
+    assert next_node("run", base_state.model_copy(update={"status": "failed"})) == "repair"
+    assert next_node("repair", base_state) == "validate"
+    assert next_node("notify", base_state) is None
+
+
+def test_build_workflow_starts_at_entry(base_state):
+    """Test that a workflow built with an entry node starts there."""
+    state = base_state.model_copy(update={"status": "passed"})
+    with patch("graph.workflow.notifier"):
+        steps = [next(iter(step)) for step in build_workflow("notify").stream(state)]
+    assert steps == ["notify"]
+
+
 def test_build_repair_workflow_compiles():
     """Test that the repair workflow graph compiles without errors."""
     repair_workflow = build_repair_workflow()
@@ -76,16 +110,16 @@ def test_validation_node_failure_none(base_state):
         validation_node(state)
 
 
-@patch("graph.workflow.post_slack_notification")
+@patch("graph.workflow.notifier")
 @patch("builtins.open", new_callable=mock_open)
-def test_approval_node_manual_awaiting(mock_file_open, mock_slack, base_state):
+def test_approval_node_manual_awaiting(mock_file_open, mock_notifier, base_state):
     """Test approval_node for manual tests that need approval."""
     state = base_state.model_copy(update={"test_type": "manual", "approved": False})
 
     updated_state = approval_node(state)
 
     assert updated_state.status == "awaiting_approval"
-    mock_slack.assert_called_once()
+    mock_notifier.post.assert_called_once()
     mock_file_open.assert_called_once_with("pending_state.json", "w")
     # Get the actual JSON content that was written
     written_content = mock_file_open().write.call_args[0][0]
@@ -172,6 +206,248 @@ def test_runner_node_exception(mock_subprocess, base_state):
     assert "Error running tests: command not found" in updated_state.test_results
 
 
+@patch("graph.workflow.subprocess.run")
+@patch("graph.workflow.forkservers")
+def test_runner_node_uses_fork_server(mock_forkservers, mock_subprocess, base_state):
+    """Test runner_node runs pytest files through the fork server when enabled."""
+    mock_forkservers.enabled = True
+    mock_forkservers.run.return_value = (1, "E   AssertionError")
+    updated_state = runner_node(base_state)
+    mock_forkservers.run.assert_called_once_with(
+        "/tmp/proj", [str(Path(base_state.output_path).resolve())], timeout=300, cancelled=None
+    )
+    mock_subprocess.assert_not_called()
+    assert updated_state.status == "failed"
+    assert updated_state.test_results == "E   AssertionError"
+    assert len(updated_state.error_hashes) == 1
+
+
+@patch("graph.workflow.subprocess.run")
+@patch("graph.workflow.forkservers")
+def test_runner_node_falls_back_without_fork_server(mock_forkservers, mock_subprocess, base_state):
+    """Test runner_node uses a subprocess when the fork server cannot run."""
+    mock_forkservers.enabled = True
+    mock_forkservers.run.side_effect = ForkServerError("Fork server did not start")
+    mock_subprocess.return_value = MagicMock(returncode=0, stdout="1 passed", stderr="")
+    updated_state = runner_node(base_state)
+    mock_subprocess.assert_called_once()
+    assert updated_state.status == "passed"
+
+
+@patch("graph.workflow.subprocess.run")
+def test_runner_node_reuses_cached_result(mock_subprocess, base_state, tmp_path):
+    """Test runner_node skips the run when tests and source are unchanged."""
+    test_file = tmp_path / "test_hello.py"
+    test_file.write_text("def test_hello():\n    assert False\n")
+    state = base_state.model_copy(
+        update={"project_root": str(tmp_path), "output_path": str(test_file)}
+    )
+    mock_subprocess.return_value = MagicMock(returncode=1, stdout="1 failed", stderr="")
+    cache = RunCache(str(tmp_path / "cache"))
+    cache.enabled = True
+
+    with patch("graph.workflow.run_cache", cache):
+        first = runner_node(state)
+        second = runner_node(state)
+        test_file.write_text("def test_hello():\n    assert True\n")
+        runner_node(state)
+
+    assert mock_subprocess.call_count == 2
+    assert second.status == first.status == "failed"
+    assert second.test_results == first.test_results
+    assert second.error_hashes == first.error_hashes
+
+
+@patch("graph.workflow.forkservers")
+def test_runner_node_does_not_reuse_timed_out_runs(mock_forkservers, base_state, tmp_path):
+    """Test runner_node runs again after a timeout instead of reusing it."""
+    test_file = tmp_path / "test_hello.py"
+    test_file.write_text("def test_hello():\n    assert True\n")
+    state = base_state.model_copy(
+        update={"project_root": str(tmp_path), "output_path": str(test_file)}
+    )
+    mock_forkservers.enabled = True
+    mock_forkservers.run.side_effect = [(-9, "collected 1 item\nTest run timed out."), (0, "ok")]
+    cache = RunCache(str(tmp_path / "cache"))
+    cache.enabled = True
+
+    with patch("graph.workflow.run_cache", cache):
+        first = runner_node(state)
+        second = runner_node(state)
+
+    assert mock_forkservers.run.call_count == 2
+    assert first.status == "failed" and second.status == "passed"
+
+
+@patch("graph.workflow.subprocess.run")
+@patch("graph.workflow.e2e_sessions")
+def test_runner_node_uses_shared_e2e_session(mock_sessions, mock_subprocess, base_state):
+    """Test runner_node sends e2e specs through the shared session when enabled."""
+    state = base_state.model_copy(
+        update={"test_type": "e2e", "framework": "cypress", "output_path": "/tmp/a.spec.js"}
+    )
+    mock_sessions.enabled = True
+    mock_sessions.run.return_value = (0, "2 tests passed")
+    updated_state = runner_node(state)
+    mock_sessions.run.assert_called_once_with(
+        "/tmp/proj", "cypress", "/tmp/a.spec.js", timeout=300, cancelled=None
+    )
+    mock_subprocess.assert_not_called()
+    assert updated_state.status == "passed"
+
+    mock_sessions.run.side_effect = E2ESessionError("App server did not answer")
+    mock_subprocess.return_value = MagicMock(returncode=1, stdout="", stderr="failed")
+    updated_state = runner_node(state)
+    assert "cypress" in mock_subprocess.call_args.args[0]
+    assert updated_state.status == "failed"
+
+
+@patch("graph.workflow.create_generation_chain")
+def test_generation_node_splits_large_documents(mock_create_chain, base_state):
+    """Test that large manual documents are generated per section and merged."""
+    chain = mock_create_chain.return_value
+    chain.batch.return_value = [
+        MagicMock(content="Checklist:\n1. [ ] Check A.\nUser stories:\n1. As a user, I want A."),
+        MagicMock(content="Checklist:\n1. [ ] Check B.\nUser stories:\n1. As a user, I want A."),
+    ]
+    document = "# A\n\n" + "a" * 9000 + "\n\n# B\n\n" + "b" * 9000 + "\n"
+    state = base_state.model_copy(
+        update={"test_type": "manual", "framework": "", "input_code": document}
+    )
+
+    updated_state = generation_node(state)
+
+    chain.invoke.assert_not_called()
+    inputs = chain.batch.call_args.args[0]
+    assert [i["code"].splitlines()[0] for i in inputs] == ["Section: A", "Section: B"]
+    assert "2. [ ] Check B." in updated_state.generated_tests
+    assert updated_state.generated_tests.count("I want A") == 1
+
+
+@patch("graph.workflow.create_repair_chain")
+@patch("graph.workflow.create_generation_chain")
+@patch("graph.workflow.example_indexes")
+def test_generation_and_repair_show_the_same_examples(
+    mock_indexes, mock_generation, mock_repair, base_state
+):
+    """Test that examples are retrieved once and sent with generation and repair."""
+    mock_indexes.enabled = True
+    mock_indexes.examples.return_value = "def test_existing(): ..."
+    mock_generation.return_value.invoke.return_value = MagicMock(content="def test_a(): ...")
+    mock_repair.return_value.invoke.return_value = MagicMock(content="def test_b(): ...")
+
+    generated = generation_node(base_state)
+    repair_node(generated.model_copy(update={"test_results": "1 failed"}))
+
+    mock_indexes.examples.assert_called_once_with(
+        ["/tmp/proj", "/tmp/proj/output"], "pytest", "src/hello.py", base_state.input_code
+    )
+    generation_inputs = mock_generation.return_value.invoke.call_args.args[0]
+    repair_inputs = mock_repair.return_value.invoke.call_args.args[0]
+    assert "def test_existing(): ..." in generation_inputs["examples"]
+    assert repair_inputs["examples"] == generation_inputs["examples"]
+
+
+def test_candidate_path_keeps_test_extensions():
+    """Test that candidates sit next to the test file and match the same patterns."""
+    assert candidate_path("/p/tests/test_a.py", 2) == Path("/p/tests/test_a__candidate2.py")
+    assert candidate_path("/p/a.test.js", 1) == Path("/p/a__candidate1.test.js")
+
+
+def _candidate_chains(outputs):
+    # One chain per sampling temperature, each returning its own test code
+    def create_chain(test_type, framework, temperature=None):
+        chain = MagicMock()
+        chain.invoke.return_value = MagicMock(content=outputs[temperature])
+        return chain
+
+    return create_chain
+
+
+def _run_by_content(state):
+    passed = "passes" in Path(state.output_path).read_text()
+    return state.copy(
+        update={"status": "passed" if passed else "failed", "test_results": state.output_path}
+    )
+
+
+@patch("graph.workflow.runner_node", side_effect=_run_by_content)
+@patch("graph.workflow.create_generation_chain")
+def test_speculative_node_keeps_passing_candidate(mock_create_chain, _runner, base_state, tmp_path):
+    """Test that the passing candidate becomes the test file and candidates are removed."""
+    mock_create_chain.side_effect = _candidate_chains(
+        {None: "def test_a():\n    assert False", 0.4: "def test_a():\n    # passes\n"}
+    )
+    output = tmp_path / "test_hello.py"
+    state = base_state.model_copy(update={"output_path": str(output), "candidates": 2})
+
+    updated_state = speculative_node(state)
+
+    assert updated_state.status == "passed"
+    assert updated_state.output_path == str(output)
+    assert "passes" in output.read_text()
+    assert updated_state.test_results == str(output)
+    assert [p.name for p in tmp_path.iterdir()] == ["test_hello.py"]
+
+
+@patch("graph.workflow.runner_node", side_effect=_run_by_content)
+@patch("graph.workflow.create_generation_chain")
+def test_speculative_node_repairs_when_no_candidate_passes(
+    mock_create_chain, _runner, base_state, tmp_path
+):
+    """Test that without a passing candidate, a failing one goes on to repair."""
+    mock_create_chain.side_effect = _candidate_chains(
+        {None: "def test_a():\n    assert False", 0.4: "def test_b():\n    assert False"}
+    )
+    output = tmp_path / "test_hello.py"
+    state = base_state.model_copy(update={"output_path": str(output), "candidates": 2})
+
+    updated_state = speculative_node(state)
+
+    assert updated_state.status == "failed"
+    assert next_node("speculate", updated_state) == "repair"
+    assert output.read_text().startswith("def test_")
+    assert [p.name for p in tmp_path.iterdir()] == ["test_hello.py"]
+
+
+@patch("graph.workflow.create_generation_chain")
+def test_speculative_node_kills_losing_test_runs(mock_create_chain, base_state, tmp_path):
+    """Test that a candidate's test run is killed once another candidate passes."""
+    mock_create_chain.side_effect = _candidate_chains(
+        {None: "def test_a():\n    assert False", 0.4: "def test_a():\n    # passes\n"}
+    )
+    killed = threading.Event()
+
+    def run(state):
+        if "passes" in Path(state.output_path).read_text():
+            return _run_by_content(state)
+        try:
+            _run_subprocess([sys.executable, "-c", "import time; time.sleep(30)"], tmp_path, {}, 60)
+        except RuntimeError:
+            killed.set()
+        return state.copy(update={"status": "failed", "test_results": "cancelled"})
+
+    state = base_state.model_copy(
+        update={"output_path": str(tmp_path / "test_hello.py"), "candidates": 2}
+    )
+    with patch("graph.workflow.runner_node", side_effect=run):
+        assert speculative_node(state).status == "passed"
+
+    assert killed.wait(10)
+
+
+def test_build_workflow_speculates_with_candidates(base_state):
+    """Test that files with several candidates start at the speculate node."""
+    state = base_state.model_copy(update={"candidates": 3})
+    passed = state.model_copy(update={"status": "passed", "stop_reason": "passed"})
+    with patch("graph.workflow.speculative_node", return_value=passed) as mock_speculate, patch(
+        "graph.workflow.notifier"
+    ):
+        steps = [next(iter(step)) for step in build_workflow().stream(state)]
+    mock_speculate.assert_called_once()
+    assert steps == ["speculate", "notify"]
+
+
 def test_runner_node_manual_skip(base_state):
     """Test that runner_node skips manual tests."""
     state = base_state.model_copy(update={"test_type": "manual"})
@@ -195,3 +471,65 @@ def test_output_node(mock_file_open, mock_clean_fences, base_state):
         mock_file_open.assert_called_once_with(Path(state.output_path), "w")
         mock_file_open().write.assert_called_once_with(state.generated_tests)
         assert updated_state.status == "saving"
+
+
+def test_nodes_resolve_blob_refs(base_state, tmp_path):
+    """Test that nodes read large payloads through the blob store."""
+    from common.blobstore import blobs
+
+    tests = "def test_hello():\n    assert hello() == 'world'\n" * 100
+    output_path = tmp_path / "test_hello.py"
+    state = base_state.model_copy(
+        update={"generated_tests": blobs.externalize(tests), "output_path": str(output_path)}
+    )
+    assert blobs.is_ref(state.generated_tests)
+
+    assert validation_node(state).validated is True
+    output_node(state)
+    assert output_path.read_text() == tests.strip()
+
+
+@patch("graph.workflow.notifier")
+@patch("graph.workflow.subprocess.run")
+@patch("graph.workflow.create_repair_chain")
+def test_repair_workflow_starts_from_known_failure(
+    mock_chain, mock_subprocess, _mock_notifier, base_state, tmp_path
+):
+    """A failure collected by a suite run is repaired without running the tests first."""
+    mock_chain.return_value.invoke.return_value = MagicMock(content="def test_fixed():\n    pass")
+    mock_subprocess.return_value = MagicMock(stdout="1 passed", stderr="", returncode=0)
+    state = base_state.copy(
+        update={
+            "output_path": str(tmp_path / "test_hello.py"),
+            "status": "failed",
+            "test_results": "E   assert 1 == 2",
+        }
+    )
+
+    nodes = [next(iter(step)) for step in build_repair_workflow().stream(state)]
+
+    assert nodes == ["repair", "save", "run", "notify"]
+    assert mock_subprocess.call_count == 1
+
+
+@patch("graph.workflow.notifier")
+@patch("graph.workflow.create_repair_chain")
+def test_stop_after_repair_is_reported_as_routed(mock_chain, mock_notifier, base_state, tmp_path):
+    """The reason a repair stopped on is the one notify reports, not a recomputed one."""
+    mock_chain.return_value.invoke.return_value = MagicMock(content="def test_fixed():\n    pass")
+    state = base_state.copy(
+        update={
+            "output_path": str(tmp_path / "test_hello.py"),
+            "status": "failed",
+            "test_results": "E   assert 1 == 2",
+            "retry_count": 2,
+            "max_retries": 3,
+            "deadline": 1.0,
+        }
+    )
+
+    steps = [step for step in build_repair_workflow().stream(state)]
+
+    assert [next(iter(step)) for step in steps] == ["repair", "notify"]
+    assert steps[-1]["notify"]["stop_reason"] == "time_budget"
+    assert "*Stop Reason:* time_budget" in mock_notifier.report.call_args[0][0]
@@ -1,21 +1,40 @@
+import contextvars
 import os
 import subprocess
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 
 import click
 from langgraph.graph import END, START, StateGraph
 from pydantic import create_model
 
-from common.slack import post_slack_notification
+from common.blobstore import blobs
+from common.e2e import E2ESessionError, e2e_sessions
+from common.forkserver import ForkServerError, forkservers
+from common.manual import MAX_PARALLEL_SECTIONS, merge_checklists, split_sections
+from common.runcache import run_cache
+from common.slack import notifier
+from common.testindex import example_indexes
+from common.tracing import tracer
 from common.utils import clean_code_fences
-from graph.prompt_node import create_generation_chain, create_repair_chain
+from graph.prompt_node import (
+    create_generation_chain,
+    create_repair_chain,
+    examples_section,
+)
+from graph.retry_policy import content_hash, error_hash, route_after_run, stop_reason
 
+# input_code, generated_tests and test_results hold either the text itself or,
+# for large payloads, a reference into the shared blob store
 GraphState = create_model(
     "GraphState",
     input_code=(str, ...),
     file_path=(str, ...),  # relative path inside project
+    source_path=(Optional[str], None),  # source under test, when file_path is the test file
     test_type=(str, ...),
     framework=(str, ...),
     project_root=(str, ...),  # --project
@@ -28,14 +47,77 @@ GraphState = create_model(
     test_results=(Optional[str], None),
     slack_webhook=(Optional[str], None),
     retry_count=(int, 0),
+    max_retries=(int, 10),
+    max_repeated_outputs=(int, 2),
+    max_repeated_errors=(int, 3),
+    deadline=(Optional[float], None),  # epoch seconds, from the per-file time budget
+    output_hashes=(List[str], []),
+    error_hashes=(List[str], []),
+    stop_reason=(Optional[str], None),
+    candidates=(int, 1),  # test files generated and run side by side before repairing
+    examples=(Optional[str], None),  # existing project tests retrieved for the prompts
+)
+
+# Sampling temperature of each speculative candidate; the first keeps the model's own
+CANDIDATE_TEMPERATURES = [None, 0.4, 0.8, 1.0]
+
+# Set while a speculative candidate runs; its test run is killed once the event is set
+_cancelled: "contextvars.ContextVar[Optional[threading.Event]]" = contextvars.ContextVar(
+    "autoqa_cancelled", default=None
 )
 
 
+def _with_examples(state: GraphState):  # type: ignore
+    # Retrieved once per file, so generation and every repair share the prompt prefix
+    if state.examples is not None or not example_indexes.enabled or state.test_type == "manual":
+        return state
+    examples = example_indexes.examples(
+        [state.project_root, state.output_project_root],
+        state.framework,
+        state.source_path or state.file_path,
+        blobs.resolve(state.input_code),
+    )
+    return state.copy(update={"examples": examples})
+
+
+def _generate(state: GraphState, temperature: Optional[float] = None):  # type: ignore
+    state = _with_examples(state)
+    chain = create_generation_chain(state.test_type, state.framework, temperature)
+    code = blobs.resolve(state.input_code)
+    sections = split_sections(code) if state.test_type == "manual" else []
+    if len(sections) > 1:
+        click.echo(
+            f"[AutoQA] [Manual]: Generating {len(sections)} sections of {state.file_path} "
+            "in parallel."
+        )
+        results = chain.batch(
+            [
+                {"code": f"Section: {s.title}\n\n{s.text}", "file_path": state.file_path}
+                for s in sections
+            ],
+            config={"max_concurrency": MAX_PARALLEL_SECTIONS},
+        )
+        content = merge_checklists([(s.title, r.content) for s, r in zip(sections, results)])
+    else:
+        content = chain.invoke(
+            {
+                "code": code,
+                "file_path": state.file_path,
+                "examples": examples_section(state.examples),
+            }
+        ).content
+    return state.copy(
+        update={
+            "generated_tests": blobs.externalize(content),
+            "status": "generating",
+            "output_hashes": [*state.output_hashes, content_hash(content)],
+        }
+    )
+
+
 # Prompt generation node as a chain
 def generation_node(state: GraphState):  # type: ignore
-    chain = create_generation_chain(state.test_type, state.framework)
-    result = chain.invoke({"code": state.input_code, "file_path": state.file_path})
-    return state.copy(update={"generated_tests": result.content, "status": "generating"})
+    return _generate(state)
 
 
 def approval_node(state: GraphState):  # type: ignore
@@ -50,7 +132,8 @@ def approval_node(state: GraphState):  # type: ignore
                 f"*Test Type:* {state.test_type}\n"
                 f"*Framework:* {state.framework}\n"
             )
-            post_slack_notification(text, webhook_url=state.slack_webhook)
+            notifier.post(text, webhook_url=state.slack_webhook)
+            blobs.persist(state.input_code, state.generated_tests, state.test_results)
             with open("pending_state.json", "w") as f:
                 f.write(state.json())
             return state.copy(update={"status": "awaiting_approval"})
@@ -60,13 +143,17 @@ def approval_node(state: GraphState):  # type: ignore
 
 # Simple validation node
 def validation_node(state: GraphState):  # type: ignore
-    if not state.generated_tests or len(state.generated_tests.strip()) < 10:
+    generated_tests = blobs.resolve(state.generated_tests)
+    if not generated_tests or len(generated_tests.strip()) < 10:
         raise ValueError("Generated tests too short.")
     return state.copy(update={"validated": True, "status": "validating"})
 
 
 # Notification node stub
 def notify_node(state: GraphState):  # type: ignore
+    # Recorded by the run or repair that routed here
+    reason = state.stop_reason
+
     # For MVP, just log to console
     click.echo("\n=== [AutoQA] Notification ===")
     click.echo("Test generation workflow completed.")
@@ -75,6 +162,7 @@ def notify_node(state: GraphState):  # type: ignore
     click.echo(f"Output Path: {state.output_path}")
     click.echo(f"Status: {state.status}")
     click.echo(f"Retries: {state.retry_count}")
+    click.echo(f"Stop Reason: {reason}")
     click.echo("==========================\n")
 
     # Post to Slack
@@ -86,11 +174,12 @@ def notify_node(state: GraphState):  # type: ignore
         f"*Output Path:* `{state.output_path}`\n"
         f"*Status:* {state.status}\n"
         f"*Retries:* {state.retry_count}\n"
+        f"*Stop Reason:* {reason}\n"
     )
 
-    post_slack_notification(text, webhook_url=state.slack_webhook)
+    notifier.report(text, state.file_path, state.status, webhook_url=state.slack_webhook)
 
-    return state.copy(update={"status": "completed"})
+    return state.copy(update={"status": "completed", "stop_reason": reason})
 
 
 def output_node(state: GraphState):  # type: ignore
@@ -99,7 +188,7 @@ def output_node(state: GraphState):  # type: ignore
     output_text = (
         "\n\n".join(state.generated_tests)
         if isinstance(state.generated_tests, list)
-        else state.generated_tests
+        else blobs.resolve(state.generated_tests)
     )
 
     # Clean code fences
@@ -114,7 +203,27 @@ def output_node(state: GraphState):  # type: ignore
     return state.copy(update={"status": "saving", "output_path": str(output_path)})
 
 
+def _test_result(state: GraphState, output: str, exit_code: int):  # type: ignore
+    status = "passed" if exit_code == 0 else "failed"
+    error_hashes = (
+        state.error_hashes if status == "passed" else [*state.error_hashes, error_hash(output)]
+    )
+    return state.copy(
+        update={
+            "status": status,
+            "test_results": blobs.externalize(output),
+            "error_hashes": error_hashes,
+        }
+    )
+
+
 def runner_node(state: GraphState):  # type: ignore
+    # Recorded here so that routing, notify and the run report agree on it
+    state = _run(state)
+    return state.copy(update={"stop_reason": stop_reason(state)})
+
+
+def _run(state: GraphState):  # type: ignore
     env = os.environ.copy()
     env["CI"] = "1"
 
@@ -144,59 +253,278 @@ def runner_node(state: GraphState):  # type: ignore
     else:
         raise ValueError(f"Unsupported test type: {state.test_type}")
 
-    try:
-        result = subprocess.run(
-            command,
-            capture_output=True,
-            text=True,
-            cwd=Path(state.project_root),
-            timeout=300,
-            env=env,
+    key = None
+    if run_cache.enabled and state.test_type == "unit" and Path(resolved_path).is_file():
+        key = run_cache.key(
+            state.project_root,
+            state.test_type,
+            state.framework,
+            resolved_path,
+            Path(resolved_path).read_text(),
+            blobs.resolve(state.input_code),
         )
-        output = result.stdout + "\n" + result.stderr
-        exit_code = result.returncode
-        status = "passed" if exit_code == 0 else "failed"
-
-        return state.copy(update={"status": status, "test_results": output})
+        cached = run_cache.get(key)
+        if cached is not None:
+            click.echo(
+                f"[AutoQA] [Runner]: Unchanged tests, reusing the last result for {state.file_path}."
+            )
+            return _test_result(state, cached[1], cached[0])
 
+    try:
+        exit_code, output = _run_tests(state, command, resolved_path, env)
     except Exception as e:
+        output = f"Error running tests: {str(e)}"
         return state.copy(
             update={
                 "status": "failed",
-                "test_results": f"Error running tests: {str(e)}",
+                "test_results": output,
+                "error_hashes": [*state.error_hashes, error_hash(output)],
             }
         )
+    if key is not None and run_cache.cacheable(state.test_type, exit_code, output):
+        run_cache.put(key, exit_code, output)
+    return _test_result(state, output, exit_code)
+
+
+def _run_tests(state: GraphState, command: List[str], resolved_path: str, env: dict):  # type: ignore
+    # Set for speculative candidates; each runner kills the run once it is set
+    cancelled = _cancelled.get()
+    if state.test_type == "e2e" and e2e_sessions.enabled:
+        try:
+            with tracer.span("test run", "subprocess", runner="e2e session"):
+                return e2e_sessions.run(
+                    state.project_root,
+                    state.framework,
+                    resolved_path,
+                    timeout=300,
+                    cancelled=cancelled,
+                )
+        except E2ESessionError as e:
+            click.echo(f"[AutoQA] [Runner]: Shared e2e session unavailable, running alone: {e}")
+
+    if state.test_type == "unit" and state.framework == "pytest" and forkservers.enabled:
+        try:
+            with tracer.span("test run", "subprocess", runner="fork server"):
+                return forkservers.run(
+                    state.project_root, [resolved_path], timeout=300, cancelled=cancelled
+                )
+        except ForkServerError as e:
+            click.echo(f"[AutoQA] [Runner]: Fork server unavailable, using a subprocess: {e}")
+
+    with tracer.span("test run", "subprocess", runner="subprocess", command=" ".join(command)):
+        return _run_subprocess(command, Path(state.project_root), env, timeout=300)
+
+
+def _run_subprocess(command: List[str], cwd: Path, env: dict, timeout: float):
+    """
+    Runs command like subprocess.run, but kills it as soon as the current
+    candidate is cancelled.
+    """
+    cancelled = _cancelled.get()
+    if cancelled is None:
+        result = subprocess.run(
+            command, capture_output=True, text=True, cwd=cwd, timeout=timeout, env=env
+        )
+        return result.returncode, result.stdout + "\n" + result.stderr
+
+    deadline = time.monotonic() + timeout
+    with subprocess.Popen(
+        command,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        cwd=cwd,
+        env=env,
+    ) as process:
+        while True:
+            try:
+                stdout, stderr = process.communicate(timeout=0.2)
+                return process.returncode, stdout + "\n" + stderr
+            except subprocess.TimeoutExpired:
+                if cancelled.is_set():
+                    process.kill()
+                    process.communicate()
+                    raise RuntimeError("Candidate cancelled: another candidate passed.")
+                if time.monotonic() > deadline:
+                    process.kill()
+                    process.communicate()
+                    raise subprocess.TimeoutExpired(command, timeout)
+
+
+def candidate_path(output_path: str, index: int) -> Path:
+    """
+    Returns where candidate index of a test file is written: next to it, with
+    the same extensions so the test runner picks it up (test_a.py becomes
+    test_a__candidate1.py, a.test.js becomes a__candidate1.test.js).
+    """
+    path = Path(output_path)
+    base, dot, extensions = path.name.partition(".")
+    return path.with_name(f"{base}__candidate{index}{dot}{extensions}")
+
+
+def speculative_node(state: GraphState):  # type: ignore
+    """
+    Generates state.candidates test files in parallel, each sampled at a
+    different temperature, and runs them side by side. The first one to pass
+    becomes the file's tests and the others are abandoned, killing their test
+    runs. If none passes, the first one that finished goes on to the repair loop.
+    """
+    state = _with_examples(state)
+    decided = threading.Event()
+
+    def attempt(index: int):
+        _cancelled.set(decided)
+        path = candidate_path(state.output_path, index)
+        candidate = state.copy(update={"output_path": str(path)})
+        temperature = CANDIDATE_TEMPERATURES[index % len(CANDIDATE_TEMPERATURES)]
+        try:
+            with tracer.span("candidate", "workflow", candidate=index):
+                candidate = validation_node(_generate(candidate, temperature))
+                # A candidate that lost while generating is not worth running
+                if decided.is_set():
+                    return None
+                return runner_node(output_node(candidate))
+        finally:
+            if path.exists():
+                path.unlink()
+
+    click.echo(
+        f"[AutoQA] [Speculate]: Generating {state.candidates} candidates for {state.file_path}."
+    )
+    executor = ThreadPoolExecutor(state.candidates, thread_name_prefix="autoqa-candidate")
+    # Each candidate runs in a copy of this context, so its spans nest under this node
+    futures = {
+        executor.submit(contextvars.copy_context().run, attempt, index): index
+        for index in range(state.candidates)
+    }
+    finished = []
+    errors = []
+    try:
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                errors.append(e)
+                continue
+            finished.append((futures[future], result))
+            if result.status == "passed":
+                decided.set()
+                break
+    finally:
+        # Abandoned candidates stop before their test run or have it killed
+        decided.set()
+        executor.shutdown(wait=False)
+
+    if not finished:
+        raise errors[0]
+    index, chosen = next(
+        ((i, c) for i, c in finished if c.status == "passed"),
+        finished[0],
+    )
+    verdict = "passed" if chosen.status == "passed" else "failed, repairing it"
+    click.echo(f"[AutoQA] [Speculate]: Candidate {index} of {state.file_path} {verdict}.")
+
+    # The test output names the candidate file, which is gone; point it at the real one
+    output = blobs.resolve(chosen.test_results) or ""
+    output = output.replace(
+        candidate_path(state.output_path, index).name, Path(state.output_path).name
+    )
+    error_hashes = chosen.error_hashes
+    if chosen.status != "passed":
+        error_hashes = [*error_hashes[:-1], error_hash(output)]
+    chosen = chosen.copy(
+        update={
+            "output_path": state.output_path,
+            "approved": True,
+            "validated": True,
+            "test_results": blobs.externalize(output),
+            "error_hashes": error_hashes,
+        }
+    )
+    status = chosen.status
+    saved = output_node(chosen).copy(update={"status": status})
+    return saved.copy(update={"stop_reason": stop_reason(saved)})
 
 
 def repair_node(state: GraphState):  # type: ignore
+    state = _with_examples(state)
     chain = create_repair_chain(state.framework)
     result = chain.invoke(
         {
-            "code": state.input_code,
-            "failing_tests": state.generated_tests,
-            "error_output": state.test_results,
+            "code": blobs.resolve(state.input_code),
+            "file_path": state.source_path or state.file_path,
+            "examples": examples_section(state.examples),
+            "failing_tests": blobs.resolve(state.generated_tests),
+            "error_output": blobs.resolve(state.test_results),
         }
     )
-    return state.copy(
-        update={"generated_tests": result.content, "retry_count": state.retry_count + 1}
+    state = state.copy(
+        update={
+            "generated_tests": blobs.externalize(result.content),
+            "retry_count": state.retry_count + 1,
+            "output_hashes": [*state.output_hashes, content_hash(result.content)],
+        }
     )
+    # Identical test code cannot pass, and an exhausted time budget allows no more runs
+    return state.copy(update={"stop_reason": stop_reason(state, after_repair=True)})
+
+
+def route_after_repair(state: GraphState, next_node: str) -> str:  # type: ignore
+    return "notify" if state.stop_reason else next_node
+
 
+def next_node(node: str, state: GraphState) -> Optional[str]:  # type: ignore
+    """
+    Returns the node build_workflow runs after node finished with state, or
+    None when the workflow ended there. Mirrors the edges below.
+    """
+    if node == "approve":
+        return None if state.status == "awaiting_approval" else "save"
+    if node in ("run", "speculate"):
+        return route_after_run(state)
+    if node == "repair":
+        return route_after_repair(state, "validate")
+    return {"generate": "validate", "validate": "approve", "save": "run"}.get(node)
 
-def build_workflow():
+
+def _first_node(state: GraphState) -> str:  # type: ignore
+    if state.approved:
+        return "save"
+    # Manual checklists are not run, so there is nothing to pick a candidate by
+    if state.candidates > 1 and state.test_type != "manual":
+        return "speculate"
+    return "generate"
+
+
+def _traced(node: str, function):
+    def run(state: GraphState):  # type: ignore
+        with tracer.span(node, "node", file=state.file_path, node=node):
+            return function(state)
+
+    return run
+
+
+def build_workflow(entry: Optional[str] = None):
+    """
+    Builds the generation workflow. With entry, it starts at that node instead,
+    e.g. to continue from a run journal checkpoint.
+    """
     graph = StateGraph(GraphState)
     # Add nodes
-    graph.add_node("generate", generation_node)
-    graph.add_node("validate", validation_node)
-    graph.add_node("approve", approval_node)
-    graph.add_node("save", output_node)
-    graph.add_node("run", runner_node)
-    graph.add_node("repair", repair_node)
-    graph.add_node("notify", notify_node)
-
+    graph.add_node("generate", _traced("generate", generation_node))
+    graph.add_node("validate", _traced("validate", validation_node))
+    graph.add_node("approve", _traced("approve", approval_node))
+    graph.add_node("save", _traced("save", output_node))
+    graph.add_node("run", _traced("run", runner_node))
+    graph.add_node("repair", _traced("repair", repair_node))
+    graph.add_node("notify", _traced("notify", notify_node))
+    graph.add_node("speculate", _traced("speculate", speculative_node))
+
+    nodes = ["generate", "validate", "approve", "save", "run", "repair", "notify", "speculate"]
     graph.add_conditional_edges(
         START,
-        lambda state: "save" if state.approved else "generate",
-        {"save": "save", "generate": "generate"},
+        lambda state: entry or _first_node(state),
+        {node: node for node in nodes},
     )
 
     # Define edges
@@ -213,17 +541,16 @@ def build_workflow():
 
     graph.add_edge("save", "run")
 
+    graph.add_conditional_edges("run", route_after_run, {"notify": "notify", "repair": "repair"})
     graph.add_conditional_edges(
-        "run",
-        lambda state: (
-            "notify"
-            if state.status == "passed"
-            else "repair" if state.retry_count < 10 else "notify"
-        ),
-        {"notify": "notify", "repair": "repair"},
+        "speculate", route_after_run, {"notify": "notify", "repair": "repair"}
     )
 
-    graph.add_edge("repair", "validate")
+    graph.add_conditional_edges(
+        "repair",
+        lambda state: route_after_repair(state, "validate"),
+        {"validate": "validate", "notify": "notify"},
+    )
     graph.add_edge("notify", END)
 
     return graph.compile()
@@ -232,26 +559,27 @@ def build_workflow():
 def build_repair_workflow():
     graph = StateGraph(GraphState)
     # Add nodes
-    graph.add_node("run", runner_node)
-    graph.add_node("repair", repair_node)
-    graph.add_node("save", output_node)
-    graph.add_node("notify", notify_node)
+    graph.add_node("run", _traced("run", runner_node))
+    graph.add_node("repair", _traced("repair", repair_node))
+    graph.add_node("save", _traced("save", output_node))
+    graph.add_node("notify", _traced("notify", notify_node))
 
     # Define edges
-    graph.set_entry_point("run")
-
+    # Failures already collected by a suite run go straight to repair
     graph.add_conditional_edges(
-        "run",
-        lambda state: (
-            "notify"
-            if state.status == "passed"
-            else "repair" if state.retry_count < 10 else "notify"
-        ),
-        {"notify": "notify", "repair": "repair"},
+        START,
+        lambda state: "repair" if state.status == "failed" and state.test_results else "run",
+        {"repair": "repair", "run": "run"},
     )
 
+    graph.add_conditional_edges("run", route_after_run, {"notify": "notify", "repair": "repair"})
+
     # After repair, save the fixed test file
-    graph.add_edge("repair", "save")
+    graph.add_conditional_edges(
+        "repair",
+        lambda state: route_after_repair(state, "save"),
+        {"save": "save", "notify": "notify"},
+    )
     graph.add_edge("save", "run")
     graph.add_edge("notify", END)
 